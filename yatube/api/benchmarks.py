@@ -0,0 +1,48 @@
+"""Процессорное время HTML-страниц и их JSON-двойников."""
+import time
+
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from core.metrics import percentile
+from posts.benchmarks import bench_targets
+
+PAIRS = (
+    ('posts:index', 'api:index', ()),
+    ('posts:group_list', 'api:group_posts', ('slug',)),
+    ('posts:profile', 'api:profile', ('username',)),
+    ('posts:post_detail', 'api:post_detail', ('post_id',)),
+    ('posts:follow_index', 'api:follow_index', ()),
+)
+
+
+def cpu_ms(client, url, requests):
+    """CPU процесса на запрос в миллисекундах, кеш сбрасывается."""
+    timings = []
+    for _ in range(requests):
+        cache.clear()
+        started = time.process_time()
+        client.get(url)
+        timings.append((time.process_time() - started) * 1000)
+    return {
+        'p50': percentile(timings, 50),
+        'mean': sum(timings) / len(timings),
+    }
+
+
+def run(requests=50):
+    reader, values = bench_targets()
+    client = Client()
+    client.force_login(reader)
+    results = {}
+    for html, api, keys in PAIRS:
+        args = [values[key] for key in keys]
+        row = {}
+        for kind, name in (('html', html), ('json', api)):
+            url = reverse(name, args=args)
+            client.get(url)
+            row[kind] = cpu_ms(client, url, requests)
+        row['ratio'] = row['html']['mean'] / (row['json']['mean'] or 1e-9)
+        results[html] = row
+    return results
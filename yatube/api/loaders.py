@@ -0,0 +1,95 @@
+"""Загрузчики данных, живущие один запрос.
+
+Ключи копятся через load(), а dispatch() достаёт все накопленные
+ключи одного типа одним запросом IN (...). Повторные ключи и уже
+загруженные объекты в запрос не попадают.
+"""
+from django.db.models import Count
+
+from posts.models import Comment, Group, Post, User
+
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+
+
+class DataLoader:
+    def __init__(self, batch):
+        self.batch = batch
+        self.cache = {}
+        self.pending = set()
+
+    def load(self, *keys):
+        self.pending.update(
+            key for key in keys if key is not None and key not in self.cache
+        )
+
+    def dispatch(self):
+        keys = sorted(self.pending)
+        self.pending.clear()
+        for start in range(0, len(keys), IN_CHUNK):
+            chunk = keys[start:start + IN_CHUNK]
+            found = self.batch(chunk)
+            for key in chunk:
+                self.cache[key] = found.get(key)
+
+    def prime(self, key, value):
+        self.pending.discard(key)
+        self.cache[key] = value
+
+    def get(self, key):
+        if key in self.pending:
+            self.dispatch()
+        return self.cache.get(key)
+
+
+def by(field, rows):
+    return {row[field]: row for row in rows}
+
+
+def batch_posts(ids):
+    return by('id', Post.objects.filter(id__in=ids).order_by().values(
+        'id', 'text', 'pub_date', 'image', 'views', 'author_id', 'group_id'
+    ))
+
+
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+def batch_users(ids):
+    return by('id', User.objects.filter(id__in=ids).values(*USER_FIELDS))
+
+
+def batch_usernames(names):
+    return by('username', User.objects.filter(
+        username__in=names
+    ).values(*USER_FIELDS))
+
+
+def batch_groups(ids):
+    return by('id', Group.objects.filter(id__in=ids).values(
+        'id', 'slug', 'title'
+    ))
+
+
+def batch_comment_counts(ids):
+    counts = dict(Comment.objects.filter(post_id__in=ids).order_by().values(
+        'post'
+    ).annotate(count=Count('id')).values_list('post', 'count'))
+    return {post_id: counts.get(post_id, 0) for post_id in ids}
+
+
+class Loaders:
+    """Набор загрузчиков одного запроса."""
+
+    def __init__(self):
+        self.posts = DataLoader(batch_posts)
+        self.users = DataLoader(batch_users)
+        self.usernames = DataLoader(batch_usernames)
+        self.groups = DataLoader(batch_groups)
+        self.comment_counts = DataLoader(batch_comment_counts)
+
+
+def get_loaders(request):
+    if not hasattr(request, '_loaders'):
+        request._loaders = Loaders()
+    return request._loaders
@@ -0,0 +1,25 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает CPU на запрос у HTML-страниц и JSON API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--output', help='Куда сохранить JSON')
+
+    def handle(self, *args, **options):
+        results = benchmarks.run(options['requests'])
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<20} html {row["html"]["mean"]:7.2f}  '
+                f'json {row["json"]["mean"]:7.2f} ms CPU  '
+                f'x{row["ratio"]:.1f}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
@@ -0,0 +1,56 @@
+"""Преобразование строк values() в JSON без создания моделей."""
+from posts.thumbnails import thumbnail_url
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'image', 'views',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+COMMENT_FIELDS = ('id', 'text', 'text_html', 'created', 'author__username')
+
+
+def related(row, prefix):
+    """Поля связанной модели из плоской строки values()."""
+    return {
+        key[len(prefix):]: value for key, value in row.items()
+        if key.startswith(prefix)
+    }
+
+
+def user_json(user):
+    return {
+        'username': user['username'],
+        'full_name': f'{user["first_name"]} {user["last_name"]}'.strip(),
+    }
+
+
+def group_json(group):
+    if not group or not group['slug']:
+        return None
+    return {'slug': group['slug'], 'title': group['title']}
+
+
+def post_json(row, author=None, group=None):
+    """Пост из строки POST_FIELDS или из строки поста и его связей."""
+    if author is None:
+        author = related(row, 'author__')
+        group = related(row, 'group__')
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'views': row['views'],
+        'author': user_json(author),
+        'group': group_json(group),
+        'thumbnail': thumbnail_url(row['image']),
+    }
+
+
+def comment_json(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'text_html': row['text_html'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from api.loaders import DataLoader
+from posts.models import Comment, Group, Post, User
+
+
+class BatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            text='Комментарий', author=cls.author, post=cls.posts[0]
+        )
+
+    def test_items_in_request_order_with_errors(self):
+        """Элементы идут в порядке ключей, ошибки — по элементам."""
+        ids = [str(post.id) for post in self.posts]
+        response = self.client.get(reverse('api:batch'), {
+            'posts': ','.join([ids[1], ids[0], ids[1], '0', 'abc']),
+            'users': 'author,ghost',
+        })
+        results = response.json()['results']
+        self.assertEqual(
+            [item['key'] for item in results],
+            [ids[1], ids[0], ids[1], '0', 'abc', 'author', 'ghost']
+        )
+        self.assertEqual(results[0]['data']['group']['slug'], 'group')
+        self.assertEqual(results[1]['data']['comments_count'], 1)
+        self.assertIsNone(results[1]['data']['group'])
+        self.assertEqual(results[3]['error'], 'not_found')
+        self.assertEqual(results[4]['error'], 'invalid')
+        self.assertEqual(
+            results[5]['data'],
+            {'username': 'author', 'full_name': 'Лев Толстой'}
+        )
+        self.assertEqual(results[6]['error'], 'not_found')
+
+    def test_unparsable_ids_are_invalid(self):
+        """Не-ASCII цифры и id вне INTEGER — ошибка элемента, а не 500."""
+        keys = ['²', '٣', '99999999999999999999999', '9223372036854775807']
+        response = self.client.get(reverse('api:batch'), {
+            'posts': ','.join(keys)
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['error'] for item in response.json()['results']],
+            ['invalid', 'invalid', 'invalid', 'not_found']
+        )
+
+    def test_one_query_per_type(self):
+        """Число запросов не зависит от числа ключей; автор, найденный
+        по имени, повторно не запрашивается."""
+        ids = ','.join(str(post.id) for post in self.posts)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('api:batch'), {
+                'posts': ids, 'users': 'author'
+            })
+
+    def test_limit(self):
+        response = self.client.get(
+            reverse('api:batch'), {'posts': ','.join(['1'] * 101)}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_loader_dedupes_keys(self):
+        """Загрузчик не запрашивает повторно уже загруженные ключи."""
+        calls = []
+
+        def batch(keys):
+            calls.append(keys)
+            return {key: key * 2 for key in keys}
+
+        loader = DataLoader(batch)
+        loader.load(1, 2, 2, None)
+        self.assertEqual(loader.get(2), 4)
+        loader.load(2, 3)
+        self.assertEqual(loader.get(3), 6)
+        self.assertEqual(calls, [[1, 2], [3]])
@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.pagination import encode_cursor
+from posts import feeds
+from posts.models import FeedMarker, Follow, Group, GroupFollow, Post, User
+
+
+class FollowNewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        GroupFollow.objects.create(user=cls.reader, group=cls.group)
+        cls.first = Post.objects.create(text='Первый', author=cls.author)
+        cls.url = reverse('api:follow_new')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_anonymous(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_feed_page_sets_marker(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        marker = FeedMarker.objects.get(user=self.reader)
+        self.assertEqual(marker.last_id, self.first.id)
+        self.assertEqual(
+            response.context['newest_cursor'],
+            encode_cursor(self.first.pub_date, self.first.id)
+        )
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    def test_unchanged_feed_head_is_not_written(self):
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse([
+            query for query in queries
+            if 'feedmarker' in query['sql']
+            and not query['sql'].startswith('SELECT')
+        ])
+        second = Post.objects.create(text='Второй', author=self.author)
+        self.client.get(url)
+        self.assertEqual(
+            FeedMarker.objects.get(user=self.reader).last_id, second.id
+        )
+
+    def test_counts_new_posts_once(self):
+        """Пост автора в группе из подписок считается один раз,
+        чужие посты не считаются."""
+        since = encode_cursor(self.first.pub_date, self.first.id)
+        Post.objects.create(text='Чужой', author=self.stranger)
+        self.assertEqual(
+            self.client.get(self.url, {'since': since}).status_code, 204
+        )
+        Post.objects.create(text='Второй', author=self.author,
+                            group=self.group)
+        Post.objects.create(text='В группе', author=self.stranger,
+                            group=self.group)
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.json(), {'new': 2, 'capped': False})
+        response = self.client.get(
+            self.url, {'since': since},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_poll_is_one_query(self):
+        since = encode_cursor(self.first.pub_date, self.first.id)
+        feeds.cached_sources(self.reader)
+        with self.assertNumQueries(1):
+            self.assertEqual(feeds.new_count(self.reader, (
+                self.first.pub_date, self.first.id
+            )), 0)
+        Follow.objects.create(user=self.reader, author=self.stranger)
+        Post.objects.create(text='Новый', author=self.stranger)
+        self.assertEqual(
+            self.client.get(self.url, {'since': since}).json()['new'], 1
+        )
+
+    def test_cap_and_bad_cursor(self):
+        Post.objects.create(text='Второй', author=self.author)
+        self.assertEqual(feeds.new_count(self.reader, cap=1), 1)
+        self.assertEqual(
+            self.client.get(self.url, {'since': 'испорчен'}).status_code,
+            400
+        )
@@ -0,0 +1,133 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from api import benchmarks
+from core.pagination import decode_cursor, encode_cursor
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(15)
+        )
+        cls.post = Post.objects.order_by('id').first()
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {number}', author=cls.reader,
+                    post=cls.post)
+            for number in range(25)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def collect(self, url):
+        ids, cursor = [], None
+        while True:
+            data = self.client.get(url, {'cursor': cursor} if cursor else {})
+            data = data.json()
+            ids += [row['id'] for row in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                return ids
+
+    def test_feeds_walk_all_posts_by_cursor(self):
+        """Курсор проходит ленту целиком без повторов и пропусков."""
+        expected = list(Post.objects.order_by('-pub_date', '-id')
+                        .values_list('id', flat=True))
+        for url in (
+            reverse('api:index'),
+            reverse('api:group_posts', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+            reverse('api:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.collect(url), expected)
+
+    def test_post_fields(self):
+        """Пост отдаётся с автором, группой и первой страницей
+        комментариев."""
+        data = self.client.get(
+            reverse('api:post_detail', args=(self.post.id,))
+        ).json()
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['author']['username'], 'author')
+        self.assertEqual(data['group'], {'slug': 'group', 'title': 'Группа'})
+        self.assertIsNone(data['thumbnail'])
+        self.assertEqual(len(data['comments']['results']), 20)
+        comments = self.collect(
+            reverse('api:post_comments', args=(self.post.id,))
+        )
+        self.assertEqual(len(comments), 25)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304."""
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_errors(self):
+        """Ошибки отдаются в JSON с нужным кодом."""
+        self.assertEqual(self.client.get(
+            reverse('api:index'), {'cursor': '!!!'}
+        ).status_code, 400)
+        self.assertEqual(self.client.get(
+            reverse('api:post_detail', args=(0,))
+        ).status_code, 404)
+        self.client.logout()
+        self.assertEqual(
+            self.client.get(reverse('api:follow_index')).status_code, 401
+        )
+
+    def test_oversized_cursor_is_bad_request(self):
+        """id курсора вне INTEGER — испорченный курсор, а не 500."""
+        date = self.post.pub_date
+        for pk in (0, 2 ** 63, 10 ** 30):
+            cursor = encode_cursor(date, pk)
+            with self.subTest(pk=pk):
+                self.assertRaises(ValueError, decode_cursor, cursor)
+                self.assertEqual(self.client.get(
+                    reverse('api:index'), {'cursor': cursor}
+                ).status_code, 400)
+                self.assertEqual(self.client.get(
+                    reverse('api:follow_new'), {'since': cursor}
+                ).status_code, 400)
+                self.assertEqual(self.client.get(
+                    reverse('api:post_comments', args=(self.post.id,)),
+                    {'cursor': cursor}
+                ).status_code, 400)
+                url = reverse('posts:follow_index')
+                self.assertRedirects(
+                    self.client.get(url, {'cursor': cursor}), url
+                )
+                url = reverse('posts:post_detail', args=(self.post.id,))
+                self.assertRedirects(
+                    self.client.get(url, {'cursor': cursor}), url
+                )
+
+    def test_cursor_roundtrip(self):
+        date = self.post.pub_date
+        self.assertEqual(
+            decode_cursor(encode_cursor(date, 7)), (date, 7)
+        )
+
+    def test_benchmark_covers_pairs(self):
+        """Бенчмарк сравнивает каждую пару HTML/JSON."""
+        results = benchmarks.run(requests=1)
+        self.assertEqual(
+            set(results), {html for html, _, _ in benchmarks.PAIRS}
+        )
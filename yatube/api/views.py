@@ -0,0 +1,229 @@
+import json
+from hashlib import md5
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
+
+from core.pagination import (
+    MAX_ID, decode_cursor, encode_cursor, page_limit, paginate,
+)
+from posts.feeds import (
+    NEW_POSTS_CAP, in_order, merged_ids, new_count, seen_position,
+)
+from posts.models import Comment, Group, Post, User
+
+from .loaders import get_loaders
+from .serializers import (
+    COMMENT_FIELDS, POST_FIELDS, comment_json, post_json, user_json,
+)
+
+BATCH_LIMIT = 100
+
+
+def json_response(request, data):
+    """Компактный JSON с ETag; на совпавший If-None-Match — 304."""
+    content = json.dumps(
+        data, cls=DjangoJSONEncoder, ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode()
+    etag = f'"{md5(content).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            content, content_type='application/json; charset=utf-8'
+        )
+    response['ETag'] = etag
+    response['Vary'] = 'Cookie'
+    return response
+
+
+def error(status, message):
+    return JsonResponse({'detail': message}, status=status)
+
+
+def feed(request, queryset):
+    try:
+        rows, cursor = paginate(queryset.values(*POST_FIELDS), request)
+    except ValueError:
+        return error(400, 'Некорректный курсор.')
+    return json_response(request, {
+        'results': [post_json(row) for row in rows],
+        'next': cursor,
+    })
+
+
+@require_GET
+def index(request):
+    return feed(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed(request, Post.objects.filter(group=group))
+
+
+@require_GET
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed(request, Post.objects.filter(author=author))
+
+
+@require_GET
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Требуется авторизация.')
+    cursor = request.GET.get('cursor')
+    limit = page_limit(request)
+    try:
+        ids, more = merged_ids(
+            request.user, cursor and decode_cursor(cursor), limit
+        )
+    except ValueError:
+        return error(400, 'Некорректный курсор.')
+    rows = in_order(
+        Post.objects.filter(id__in=ids).values(*POST_FIELDS), ids
+    )
+    next_cursor = None
+    if more and rows:
+        next_cursor = encode_cursor(rows[-1]['pub_date'], rows[-1]['id'])
+    return json_response(request, {
+        'results': [post_json(row) for row in rows],
+        'next': next_cursor,
+    })
+
+
+@require_GET
+def follow_new(request):
+    """Сколько новых постов в ленте после since или после последнего
+    просмотра ленты. Ничего нового — пустой 204, тот же ответ — 304."""
+    if not request.user.is_authenticated:
+        return error(401, 'Требуется авторизация.')
+    since = request.GET.get('since')
+    try:
+        position = (
+            decode_cursor(since) if since else seen_position(request.user)
+        )
+    except ValueError:
+        return error(400, 'Некорректный курсор.')
+    count = new_count(request.user, position)
+    if not count:
+        return HttpResponse(status=204)
+    return json_response(request, {
+        'new': count, 'capped': count == NEW_POSTS_CAP,
+    })
+
+
+def comments_page(request, post_id):
+    rows, cursor = paginate(
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        request, date_field='created', limit=settings.QUANTITY_COMMENTS,
+    )
+    return {'results': [comment_json(row) for row in rows], 'next': cursor}
+
+
+@require_GET
+def post_detail(request, post_id):
+    row = Post.objects.filter(id=post_id).values(*POST_FIELDS).first()
+    if row is None:
+        return error(404, 'Пост не найден.')
+    try:
+        comments = comments_page(request, post_id)
+    except ValueError:
+        return error(400, 'Некорректный курсор.')
+    return json_response(request, {**post_json(row), 'comments': comments})
+
+
+@require_GET
+def post_comments(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        return error(404, 'Пост не найден.')
+    try:
+        return json_response(request, comments_page(request, post_id))
+    except ValueError:
+        return error(400, 'Некорректный курсор.')
+
+
+def batch_keys(request, name):
+    return [key for key in request.GET.get(name, '').split(',') if key]
+
+
+def post_item(loaders, key, post_id):
+    item = {'type': 'post', 'key': key}
+    post = loaders.posts.get(post_id)
+    if post_id is None:
+        item['error'] = 'invalid'
+    elif post is None:
+        item['error'] = 'not_found'
+    else:
+        item['data'] = post_json(
+            post,
+            loaders.users.get(post['author_id']),
+            loaders.groups.get(post['group_id']),
+        )
+        item['data']['comments_count'] = (
+            loaders.comment_counts.get(post_id)
+        )
+    return item
+
+
+def user_item(loaders, key):
+    item = {'type': 'user', 'key': key}
+    user = loaders.usernames.get(key)
+    if user is None:
+        item['error'] = 'not_found'
+    else:
+        item['data'] = user_json(user)
+    return item
+
+
+def parse_post_id(key):
+    """id поста из ключа или None.
+
+    str.isdigit пропускает «²» и цифры других алфавитов, поэтому
+    ключ проверяется на ASCII, а значение — на диапазон INTEGER.
+    """
+    if not (key.isascii() and key.isdigit()):
+        return None
+    post_id = int(key)
+    return post_id if post_id <= MAX_ID else None
+
+
+@require_GET
+def batch(request):
+    """Посты и пользователи по спискам ключей за один запрос.
+
+    ?posts=1,2,3&users=leo,anna. Ответ идёт в порядке ключей; для
+    ненайденных и некорректных ключей в элементе стоит error.
+    """
+    post_keys = batch_keys(request, 'posts')
+    usernames = batch_keys(request, 'users')
+    if len(post_keys) + len(usernames) > BATCH_LIMIT:
+        return error(400, f'Не больше {BATCH_LIMIT} ключей за запрос.')
+    loaders = get_loaders(request)
+    post_ids = {
+        key: post_id for key, post_id in
+        ((key, parse_post_id(key)) for key in post_keys)
+        if post_id is not None
+    }
+    loaders.posts.load(*post_ids.values())
+    loaders.usernames.load(*usernames)
+    loaders.posts.dispatch()
+    loaders.usernames.dispatch()
+    for user in loaders.usernames.cache.values():
+        if user:
+            loaders.users.prime(user['id'], user)
+    for post_id in post_ids.values():
+        post = loaders.posts.get(post_id)
+        if post:
+            loaders.users.load(post['author_id'])
+            loaders.groups.load(post['group_id'])
+            loaders.comment_counts.load(post_id)
+
+    results = [post_item(loaders, key, post_ids.get(key)) for key in post_keys]
+    results += [user_item(loaders, key) for key in usernames]
+    return json_response(request, {'results': results})
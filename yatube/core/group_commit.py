@@ -0,0 +1,141 @@
+"""Групповой коммит коротких записей под SQLite.
+
+SQLite пишет одним писателем: каждая короткая транзакция запроса
+ждёт блокировку записи и платит за свой fsync. С WRITE_BATCHING
+write() отдаёт запись единственному потоку-писателю. Он собирает всё,
+что пришло за WRITE_BATCH_WINDOW секунд (не больше WRITE_BATCH_MAX),
+выполняет одной транзакцией, каждую запись в своей точке сохранения,
+чтобы ошибка одной не откатила соседей, и отдаёт результаты сразу
+после коммита. Запрос ждёт коммита своей пачки, поэтому редирект
+уходит, когда запись уже на диске. Сигналы выполняются в потоке
+писателя, там же после раздачи результатов — on_commit всей пачки:
+упавший обработчик только пишется в лог, запись уже закоммичена.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitWriter:
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def _ensure_thread(self):
+        """Поток поднимается при первой записи, в каждом воркере
+        после форка — свой."""
+        if self.pid != os.getpid():
+            self._reset()
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._run, name='group-commit', daemon=True
+                )
+                self.thread.start()
+
+    def submit(self, func):
+        """Future с результатом func после коммита её пачки."""
+        self._ensure_thread()
+        future = Future()
+        self.queue.put((future, func))
+        return future
+
+    def in_writer(self):
+        return threading.current_thread() is self.thread
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + settings.WRITE_BATCH_WINDOW
+        while len(batch) < settings.WRITE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self.queue.get(timeout=remaining) if remaining > 0
+                    else self.queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _execute(self, batch):
+        """Пачка в одной транзакции: итоги записей и её on_commit."""
+        results = []
+        with transaction.atomic():
+            for future, func in batch:
+                try:
+                    with transaction.atomic():
+                        results.append((future, func(), None))
+                except Exception as error:
+                    results.append((future, None, error))
+            # Обработчики on_commit забираются из транзакции,
+            # чтобы их ошибка не подменила итог закоммиченных записей.
+            hooks = [hook for _, hook in connection.run_on_commit]
+            connection.run_on_commit = []
+        return results, hooks
+
+    def commit(self, batch):
+        """Выполняет пачку одной транзакцией и раздаёт результаты.
+
+        Записи, отменённые по таймауту до начала пачки, пропускаются.
+        """
+        batch = [
+            (future, func) for future, func in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        try:
+            results, hooks = self._execute(batch)
+        except Exception as error:
+            connection.close()
+            for future, _ in batch:
+                future.set_exception(error)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception:
+                logger.exception('Обработчик on_commit пачки упал')
+
+    def _run(self):
+        while True:
+            self.commit(self._collect())
+
+
+writer = GroupCommitWriter()
+
+
+def write(func, batched=None):
+    """Вызывает func сразу или через общий коммит писателя.
+
+    Исключение func поднимается в вызывающем потоке, как при
+    прямом вызове. Если за WRITE_BATCH_TIMEOUT пачка не началась,
+    запись снимается с очереди и поднимается TimeoutError: в базу
+    она не попадёт. Начатой пачки запрос дожидается до конца.
+    """
+    batched = settings.WRITE_BATCHING if batched is None else batched
+    if not batched or writer.in_writer():
+        return func()
+    future = writer.submit(func)
+    try:
+        return future.result(settings.WRITE_BATCH_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            raise
+    return future.result()
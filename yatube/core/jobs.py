@@ -0,0 +1,238 @@
+"""Фоновая очередь задач в таблице базы.
+
+Обработчик регистрируется декоратором @job('имя'), задача ставится
+через enqueue или, из view, через enqueue_on_commit: строка появится
+только если транзакция запроса закоммитилась. Воркер (run_jobs)
+одним UPDATE берёт в аренду готовые задачи по убыванию приоритета,
+не больше, чем свободных потоков в пуле: освободившийся поток сразу
+получает следующую задачу, не дожидаясь соседей. Пока задача
+выполняется, воркер продлевает её аренду каждую треть JOBS_LEASE,
+поэтому долгая задача не уходит второму воркеру. Задача, чей воркер
+умер, возвращается в работу, когда истечёт аренда. Упавшая
+задача повторяется с удвоением паузы, после JOBS_MAX_ATTEMPTS
+попыток остаётся в статусе failed. Ключ идемпотентности уникален:
+повторная постановка с тем же ключом ничего не делает, пока
+выполненная задача хранится (JOBS_KEEP).
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .metrics import registry
+from .models import Job
+
+logger = logging.getLogger(__name__)
+REGISTRY = {}
+PURGE_INTERVAL = 3600
+
+
+def job(name):
+    """Регистрирует обработчик задачи; аргументы — поля payload."""
+    def register(func):
+        REGISTRY[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, key=None, priority=0, delay=0,
+            max_attempts=None):
+    """Ставит задачу в очередь; с уже известным key — ничего."""
+    Job.objects.bulk_create([Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        key=key,
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )], ignore_conflicts=True)
+
+
+def enqueue_on_commit(name, payload=None, **options):
+    """enqueue после коммита текущей транзакции: откат запроса
+    не оставит задачу, которой не на чем работать."""
+    transaction.on_commit(lambda: enqueue(name, payload, **options))
+
+
+def enqueue_window(name, interval, payload=None, **options):
+    """Одна задача на окно в interval секунд, в конце окна.
+
+    Сколько бы событий ни пришло за окно, ключ у них один, и задача
+    обработает их все разом. Ставится после коммита.
+    """
+    now = time.time()
+    window = int(now // interval)
+    enqueue_on_commit(
+        name, payload, key=f'{name}:{window}',
+        delay=(window + 1) * interval - now, **options
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit, lease=None):
+    """Берёт в аренду до limit готовых задач одним UPDATE.
+
+    Условия повторены во внешнем WHERE: если два воркера выбрали
+    одни и те же строки, второй после блокировки их уже не обновит.
+    """
+    now = timezone.now()
+    lease = lease or settings.JOBS_LEASE
+    token = f'{worker}:{uuid.uuid4().hex}'
+    ready = (
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+    candidates = Job.objects.filter(ready).order_by(
+        '-priority', 'run_at', 'id'
+    ).values('id')[:limit]
+    Job.objects.filter(ready, id__in=candidates).update(
+        status=Job.RUNNING,
+        locked_by=token,
+        locked_until=now + timedelta(seconds=lease),
+        attempts=F('attempts') + 1,
+    )
+    return list(Job.objects.filter(locked_by=token))
+
+
+def renew(jobs, lease=None):
+    """Продлевает аренду выполняемых задач этого воркера."""
+    lease = lease or settings.JOBS_LEASE
+    return Job.objects.filter(
+        locked_by__in={job.locked_by for job in jobs}, status=Job.RUNNING
+    ).update(locked_until=timezone.now() + timedelta(seconds=lease))
+
+
+def _finish(job, **fields):
+    """Пишет итог, только если аренда всё ещё наша."""
+    return Job.objects.filter(
+        id=job.id, locked_by=job.locked_by, status=Job.RUNNING
+    ).update(locked_until=None, **fields)
+
+
+def run_job(job):
+    """Выполняет задачу и пишет итог; в потоке пула."""
+    try:
+        handler = REGISTRY.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f'Нет обработчика задачи {job.name}')
+            handler(**json.loads(job.payload))
+        except Exception as error:
+            logger.exception('Задача %s #%s упала', job.name, job.id)
+            now = timezone.now()
+            if job.attempts >= job.max_attempts:
+                _finish(job, status=Job.FAILED, finished=now,
+                        last_error=repr(error))
+                return Job.FAILED
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            _finish(job, status=Job.QUEUED, last_error=repr(error),
+                    run_at=now + timedelta(seconds=delay))
+            return Job.QUEUED
+        _finish(job, status=Job.DONE, finished=timezone.now())
+        return Job.DONE
+    finally:
+        connection.close()
+
+
+def purge(keep=None):
+    """Удаляет выполненные задачи старше keep секунд; их ключи
+    снова свободны."""
+    keep = settings.JOBS_KEEP if keep is None else keep
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE, finished__lt=timezone.now() - timedelta(seconds=keep)
+    ).delete()
+    return deleted
+
+
+def _collect(running, timeout):
+    """Ждёт первую завершённую задачу; число завершённых."""
+    finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+    for future in finished:
+        job = running.pop(future)
+        if future.exception() is not None:
+            logger.error(
+                'Не записан итог задачи %s #%s', job.name, job.id,
+                exc_info=future.exception()
+            )
+    return len(finished)
+
+
+def work(threads=None, once=False, poll=None, stop=None, worker=None):
+    """Цикл воркера: аренда на свободные потоки, продление аренды
+    выполняемых задач, ожидание новых.
+
+    once=True — выйти, когда готовых задач не осталось. После stop
+    новые задачи не берутся, начатые доводятся до конца.
+    Возвращает число выполненных попыток.
+    """
+    threads = threads or settings.JOBS_THREADS
+    poll = settings.JOBS_POLL_INTERVAL if poll is None else poll
+    stop = stop or threading.Event()
+    worker = worker or worker_name()
+    heartbeat = settings.JOBS_LEASE / 3
+    running = {}
+    done = 0
+    purged = 0.0
+    renewed = time.monotonic()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while running or not stop.is_set():
+            free = threads - len(running)
+            if free and not stop.is_set():
+                for job in claim(worker, free):
+                    running[executor.submit(run_job, job)] = job
+            if running:
+                done += _collect(running, min(poll, heartbeat))
+                if running and time.monotonic() - renewed > heartbeat:
+                    renew(running.values())
+                    renewed = time.monotonic()
+                continue
+            renewed = time.monotonic()
+            if time.monotonic() - purged > PURGE_INTERVAL:
+                purge()
+                purged = time.monotonic()
+            if once:
+                break
+            connection.close()
+            stop.wait(poll)
+    connection.close()
+    return done
+
+
+def depth():
+    """Задачи по статусам для метрик."""
+    counts = dict(Job.objects.values_list('status').annotate(
+        total=Count('id')
+    ).order_by())
+    return {
+        (('status', status),): counts.get(status, 0)
+        for status, _ in Job.STATUSES
+    }
+
+
+def lag():
+    """Сколько секунд ждёт самая старая готовая задача."""
+    now = timezone.now()
+    oldest = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).aggregate(oldest=Min('run_at'))['oldest']
+    return {(): (now - oldest).total_seconds() if oldest else 0.0}
+
+
+registry.gauge('yatube_jobs', 'Фоновые задачи по статусам.', depth)
+registry.gauge(
+    'yatube_jobs_lag_seconds',
+    'Ожидание самой старой готовой фоновой задачи.', lag
+)
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+CHILD = (
+    'import time; started = time.perf_counter(); '
+    'from core.preload import profile_workers; '
+    'profile_workers({workers}, {path!r}, started)'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает холодный старт и память воркеров '
+        'с предзагрузкой и без неё.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--path', default='/')
+
+    def run_mode(self, preload, workers, path):
+        env = dict(os.environ, PYTHONPATH=settings.BASE_DIR)
+        env.pop('YATUBE_PRELOAD', None)
+        if preload:
+            env['YATUBE_PRELOAD'] = '1'
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD.format(workers=workers, path=path)],
+            env=env, cwd=settings.BASE_DIR, check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        return json.loads(output.decode().strip().splitlines()[-1])
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"режим":<8} {"старт, s":>9} {"мастер RSS":>11} '
+            f'{"1-й запрос, ms":>15} {"воркер PSS":>11} '
+            f'{"воркер dirty":>13}'
+        )
+        for mode, preload in (('lazy', False), ('preload', True)):
+            report = self.run_mode(
+                preload, options['workers'], options['path']
+            )
+            workers = report['workers']
+            count = len(workers) or 1
+            first = sum(w['first_request'] for w in workers) / count
+            pss = sum(w['memory'].get('pss', 0) for w in workers) / count
+            dirty = sum(
+                w['memory'].get('private_dirty', 0) for w in workers
+            ) / count
+            self.stdout.write(
+                f'{mode:<8} {report["startup"]:>9.2f} '
+                f'{report["master"]["rss"]:>8} kB '
+                f'{first * 1000:>15.1f} {pss:>8.0f} kB {dirty:>10.0f} kB'
+            )
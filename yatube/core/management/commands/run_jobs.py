@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import work
+
+
+class Command(BaseCommand):
+    help = ('Воркер фоновых задач. Процессов можно запустить несколько: '
+            'задачи берутся в аренду атомарно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=None,
+            help='Потоков пула (по умолчанию JOBS_THREADS).'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=None,
+            help='Пауза при пустой очереди (по умолчанию '
+                 'JOBS_POLL_INTERVAL).'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # SIGTERM дожидается текущих задач, а не обрывает их.
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        try:
+            done = work(
+                threads=options['threads'], once=options['once'],
+                poll=options['poll'], stop=stop,
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
@@ -0,0 +1,57 @@
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Печатает самые тяжёлые формы запросов из журнала медленных SQL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument('--top', type=int, default=10)
+
+    def aggregate(self, path):
+        groups = {}
+        with open(path, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                group = groups.setdefault(record['fingerprint'], {
+                    'count': 0, 'total': 0.0, 'max': 0.0,
+                    'views': Counter(), 'plan': None,
+                })
+                group['count'] += 1
+                group['total'] += record['ms']
+                group['max'] = max(group['max'], record['ms'])
+                group['views'][record['view']] += 1
+                if record.get('plan'):
+                    group['plan'] = record['plan']
+        return groups
+
+    def handle(self, *args, **options):
+        try:
+            groups = self.aggregate(options['log'])
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {options["log"]} не найден')
+        top = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True
+        )[:options['top']]
+        for number, (shape, group) in enumerate(top, 1):
+            views = ', '.join(
+                f'{view} ({count})'
+                for view, count in group['views'].most_common(3)
+            )
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'#{number}: {group["total"]:.1f} ms всего, '
+                f'{group["count"]} раз, среднее '
+                f'{group["total"] / group["count"]:.1f} ms, '
+                f'максимум {group["max"]:.1f} ms'
+            ))
+            self.stdout.write(f'  views: {views}')
+            self.stdout.write(f'  {shape}')
+            for row in group['plan'] or ():
+                self.stdout.write(f'    {row}')
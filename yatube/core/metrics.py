@@ -0,0 +1,127 @@
+"""Гистограммы задержек в памяти процесса и вычисляемые gauge
+в формате Prometheus."""
+import threading
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ''
+    text = ','.join(
+        '{}="{}"'.format(key, str(value).replace('"', '\\"'))
+        for key, value in pairs
+    )
+    return '{' + text + '}'
+
+
+class Histogram:
+    """Счётчики по фиксированным корзинам: память не растёт с трафиком."""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class HistogramFamily:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = Histogram(len(self.buckets) + 1)
+                self._children[key] = child
+            child.counts[index] += 1
+            child.sum += value
+            child.count += 1
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            children = [
+                (key, list(child.counts), child.sum, child.count)
+                for key, child in sorted(self._children.items())
+            ]
+        for key, counts, total, count in children:
+            cumulative = 0
+            for bound, value in zip(self.buckets + ('+Inf',), counts):
+                cumulative += value
+                yield '{}_bucket{} {}'.format(
+                    self.name, _labels(key, le=bound), cumulative
+                )
+            yield f'{self.name}_sum{_labels(key)} {total}'
+            yield f'{self.name}_count{_labels(key)} {count}'
+
+
+class GaugeFamily:
+    """Значения считаются при каждом чтении метрик: callback
+    возвращает {кортеж пар (метка, значение): число}."""
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def collect(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} gauge'
+        for key, value in sorted(self.callback().items()):
+            yield f'{self.name}{_labels(key)} {value}'
+
+
+class Registry:
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, documentation, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            if name not in self._families:
+                self._families[name] = HistogramFamily(
+                    name, documentation, buckets
+                )
+            return self._families[name]
+
+    def gauge(self, name, documentation, callback):
+        with self._lock:
+            if name not in self._families:
+                self._families[name] = GaugeFamily(
+                    name, documentation, callback
+                )
+            return self._families[name]
+
+    def render(self):
+        lines = []
+        for family in list(self._families.values()):
+            lines.extend(family.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
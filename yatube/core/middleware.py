@@ -0,0 +1,76 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import profiling
+from .metrics import COUNT_BUCKETS, registry
+from .slow_queries import slow_query_wrapper
+
+VIEW_SECONDS = registry.histogram(
+    'yatube_view_seconds', 'Полное время обработки запроса.'
+)
+SQL_QUERIES = registry.histogram(
+    'yatube_view_sql_queries', 'Число SQL-запросов за запрос.',
+    buckets=COUNT_BUCKETS,
+)
+SQL_SECONDS = registry.histogram(
+    'yatube_view_sql_seconds', 'Время в SQL-запросах.'
+)
+TEMPLATE_SECONDS = registry.histogram(
+    'yatube_view_template_seconds', 'Время рендера шаблонов.'
+)
+THUMBNAIL_SECONDS = registry.histogram(
+    'yatube_view_thumbnail_seconds', 'Время в теге {% thumbnail %}.'
+)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class ProfilingMiddleware:
+    """Время запроса по каждому view; подробная разбивка — по выборке.
+
+    Полное время пишется всегда. Разбивка на SQL, шаблоны и миниатюры
+    собирается для доли запросов PROFILING_SAMPLE_RATE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        profiling.install()
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            response = self.get_response(request)
+            VIEW_SECONDS.observe(
+                time.perf_counter() - started, view=view_name(request)
+            )
+            return response
+        with profiling.profile_request() as profile:
+            response = self.get_response(request)
+        view = view_name(request)
+        VIEW_SECONDS.observe(time.perf_counter() - started, view=view)
+        SQL_QUERIES.observe(profile.sql_count, view=view)
+        SQL_SECONDS.observe(profile.sql_time, view=view)
+        TEMPLATE_SECONDS.observe(profile.template_time, view=view)
+        THUMBNAIL_SECONDS.observe(profile.thumbnail_time, view=view)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал yatube.slow_queries запросы дольше порога."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = slow_query_wrapper(lambda: view_name(request))
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return self.get_response(request)
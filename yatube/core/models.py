@@ -9,3 +9,46 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Job(CreatedModel):
+    """Отложенная задача фоновой очереди (core.jobs)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.TextField('Аргументы (JSON)', default='{}')
+    key = models.CharField(
+        'Ключ идемпотентности', max_length=200, unique=True, null=True,
+        blank=True
+    )
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    run_at = models.DateTimeField('Запустить не раньше')
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Попыток всего')
+    locked_by = models.CharField('Аренда', max_length=100, blank=True)
+    locked_until = models.DateTimeField('Аренда до', null=True, blank=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at']),
+            models.Index(fields=['locked_by']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,70 @@
+"""Курсорная пагинация по (дата, id)."""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+MAX_LIMIT = 100
+# Больше не помещается в INTEGER SQLite.
+MAX_ID = 2 ** 63 - 1
+
+
+def encode_cursor(date, pk):
+    raw = f'{date.isoformat()}|{pk}'.encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(дата, id) из курсора; ValueError, если курсор испорчен.
+
+    id вне диапазона INTEGER иначе дошёл бы до SQLite и упал там
+    OverflowError.
+    """
+    try:
+        raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, pk = raw.split('|')
+        date, pk = parse_datetime(date), int(pk)
+        if date is None or not 1 <= pk <= MAX_ID:
+            raise ValueError(cursor)
+        return date, pk
+    except (TypeError, UnicodeDecodeError) as error:
+        raise ValueError(cursor) from error
+
+
+def page_limit(request, default=None):
+    default = default or settings.QUANTITY_POSTS
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def paginate(queryset, request, date_field='pub_date', limit=None):
+    """Страница строк и курсор следующей страницы.
+
+    Подходит и для values(), и для обычных querysets. Условие
+    дата <= курсора идёт диапазоном по индексу, поэтому глубокие
+    страницы стоят столько же, сколько первая.
+    """
+    limit = page_limit(request, limit)
+    queryset = queryset.order_by(f'-{date_field}', '-id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(**{f'{date_field}__lte': date}).filter(
+            Q(**{f'{date_field}__lt': date}) | Q(id__lt=pk)
+        )
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            _value(rows[-1], date_field), _value(rows[-1], 'id')
+        )
+    return rows, next_cursor
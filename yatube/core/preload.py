@@ -0,0 +1,125 @@
+"""Предзагрузка приложения в мастер-процессе перед форком воркеров."""
+import gc
+import json
+import os
+import time
+from importlib import import_module
+from importlib.util import find_spec
+from wsgiref.util import setup_testing_defaults
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+APP_MODULES = ('models', 'views', 'urls', 'forms', 'admin', 'signals')
+
+
+def template_names():
+    """Все шаблоны из TEMPLATES_DIR."""
+    for root, _, files in os.walk(settings.TEMPLATES_DIR):
+        for name in files:
+            if name.endswith('.html'):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, settings.TEMPLATES_DIR)
+
+
+def import_app_modules():
+    for app_config in apps.get_app_configs():
+        for module in APP_MODULES:
+            name = f'{app_config.name}.{module}'
+            if find_spec(name) is not None:
+                import_module(name)
+
+
+def preload():
+    """Загружает то, что воркер иначе импортирует на первом запросе."""
+    import_app_modules()
+    get_resolver().reverse_dict
+    for name in template_names():
+        get_template(name)
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    Image.init()
+    default.backend, default.engine, default.kvstore, default.storage
+
+
+def freeze():
+    """Переносит все объекты мастера в постоянное поколение GC.
+
+    Сборщик мусора больше не обходит их в воркерах и не пачкает
+    разделяемые после форка страницы памяти.
+    """
+    connections.close_all()
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+
+def memory_usage():
+    """Память процесса в килобайтах: rss, pss и private_dirty."""
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Dirty'):
+                    usage[key.lower()] = int(value.split()[0])
+    except OSError:
+        import resource
+
+        usage['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def serve(application, path):
+    """Прогоняет один GET-запрос через WSGI-приложение без сети."""
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    statuses = []
+    response = application(
+        environ, lambda status, headers, *args: statuses.append(status)
+    )
+    for _ in response:
+        pass
+    response.close()
+    return statuses[0]
+
+
+def profile_workers(workers, path, started):
+    """Замеряет холодный старт и память воркеров, печатает JSON.
+
+    Запускается в отдельном интерпретаторе: режим предзагрузки
+    выбирается переменной YATUBE_PRELOAD до импорта wsgi.
+    """
+    from yatube.wsgi import application
+
+    report = {
+        'startup': time.perf_counter() - started,
+        'master': memory_usage(),
+        'workers': [],
+    }
+    for _ in range(workers):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            started = time.perf_counter()
+            status = serve(application, path)
+            worker = {
+                'status': status,
+                'first_request': time.perf_counter() - started,
+                'memory': memory_usage(),
+            }
+            os.write(write, json.dumps(worker).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as pipe:
+            report['workers'].append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    print(json.dumps(report))
@@ -0,0 +1,94 @@
+"""Разбивка времени запроса на SQL, шаблоны и {% thumbnail %}."""
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.base import Template
+from sorl.thumbnail.templatetags.thumbnail import ThumbnailNode
+
+_local = threading.local()
+_installed = False
+
+
+class RequestProfile:
+    __slots__ = (
+        'sql_count', 'sql_time', 'template_time', 'thumbnail_time',
+        'template_depth', 'thumbnail_depth',
+    )
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.thumbnail_time = 0.0
+        self.template_depth = 0
+        self.thumbnail_depth = 0
+
+
+def current():
+    return getattr(_local, 'profile', None)
+
+
+def _timed_render(render, attribute):
+    """Оборачивает render, учитывая только внешний вызов.
+
+    Глубина своя у каждого счётчика: {% thumbnail %} всегда
+    рендерится внутри шаблона, и общая глубина его бы не учла.
+    """
+    depth = attribute.replace('_time', '_depth')
+
+    def wrapper(self, context):
+        profile = current()
+        if profile is None or getattr(profile, depth):
+            return render(self, context)
+        setattr(profile, depth, getattr(profile, depth) + 1)
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            setattr(profile, depth, getattr(profile, depth) - 1)
+            setattr(
+                profile, attribute,
+                getattr(profile, attribute) + time.perf_counter() - started
+            )
+    return wrapper
+
+
+def install():
+    """Подменяет render шаблонов и миниатюр один раз на процесс."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template.render = _timed_render(Template.render, 'template_time')
+    ThumbnailNode.render = _timed_render(
+        ThumbnailNode.render, 'thumbnail_time'
+    )
+
+
+def _sql_wrapper(profile):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.sql_time += time.perf_counter() - started
+            profile.sql_count += 1
+    return wrapper
+
+
+@contextmanager
+def profile_request():
+    """Собирает RequestProfile для кода внутри блока."""
+    profile = RequestProfile()
+    _local.profile = profile
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(_sql_wrapper(profile))
+                )
+            yield profile
+    finally:
+        _local.profile = None
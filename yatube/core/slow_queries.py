@@ -0,0 +1,78 @@
+"""Журнал медленных SQL-запросов с планами выполнения."""
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('yatube.slow_queries')
+
+_local = threading.local()
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER = re.compile(r'%s|\?')
+IN_LIST = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+
+EXPLAIN = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+def fingerprint(sql):
+    """Форма запроса: литералы и параметры заменены на ?, IN-списки
+    свёрнуты, чтобы одинаковые запросы попадали в одну группу."""
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = PLACEHOLDER.sub('?', sql)
+    sql = IN_LIST.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def explain(connection, sql, params):
+    prefix = EXPLAIN.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [' '.join(map(str, row)) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN failed: {error}']
+    finally:
+        _local.explaining = False
+
+
+def slow_query_wrapper(get_view):
+    """execute_wrapper, пишущий в журнал запросы дольше порога."""
+    def wrapper(execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            if elapsed >= settings.SLOW_QUERY_THRESHOLD_MS:
+                record = {
+                    'time': timezone.now().isoformat(),
+                    'view': get_view(),
+                    'ms': round(elapsed, 3),
+                    'fingerprint': fingerprint(sql),
+                    'sql': sql,
+                }
+                sampled = random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+                if sampled and not many:
+                    record['plan'] = explain(
+                        context['connection'], sql, params
+                    )
+                logger.warning(json.dumps(record, ensure_ascii=False))
+    return wrapper
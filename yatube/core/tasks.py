@@ -0,0 +1,16 @@
+from django.core.mail import EmailMultiAlternatives
+
+from .jobs import job
+
+
+@job('core.send_mail')
+def send_mail(subject, body, from_email, to, html=None):
+    """Письмо, отрисованное в запросе и отправленное воркером.
+
+    Текст лежит в payload открытым текстом до JOBS_KEEP, поэтому
+    письма с секретами (ссылками сброса пароля) сюда не ставятся.
+    """
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html:
+        message.attach_alternative(html, 'text/html')
+    message.send()
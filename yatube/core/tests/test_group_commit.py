@@ -0,0 +1,121 @@
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from unittest import mock
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import group_commit
+from core.group_commit import GroupCommitWriter, write
+from posts.models import Comment, Follow, Post, User
+
+
+def entries(*funcs):
+    """Пачка для commit() в обход очереди и потока писателя."""
+    return [(Future(), func) for func in funcs]
+
+
+@override_settings(WRITE_BATCH_WINDOW=0.05, WRITE_BATCH_MAX=10)
+class GroupCommitTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+
+    def comment(self, text):
+        return Comment.objects.create(
+            post=self.post, author=self.author, text=text
+        ).text
+
+    def test_batch_commits_once_and_isolates_errors(self):
+        """Пачка — одна транзакция; упавшая запись откатывается одна."""
+        batch = entries(
+            lambda: self.comment('первый'),
+            lambda: Follow.objects.create(user=self.author, author=None),
+            lambda: self.comment('второй'),
+        )
+        futures = [future for future, _ in batch]
+        with CaptureQueriesContext(connection) as queries:
+            GroupCommitWriter().commit(batch)
+        self.assertEqual(futures[0].result(), 'первый')
+        self.assertRaises(IntegrityError, futures[1].result)
+        self.assertEqual(futures[2].result(), 'второй')
+        self.assertEqual(
+            sorted(Comment.objects.values_list('text', flat=True)),
+            ['второй', 'первый']
+        )
+        begins = [q for q in queries if q['sql'].startswith('BEGIN')]
+        self.assertEqual(len(begins), 1)
+
+    def test_failing_on_commit_hook_keeps_results(self):
+        """Упавший on_commit не подменяет итог закоммиченной пачки
+        и не отменяет остальные обработчики."""
+        hooks = []
+
+        def broken_hook():
+            raise ValueError('сломалось')
+
+        def with_hooks(text):
+            transaction.on_commit(broken_hook)
+            transaction.on_commit(lambda: hooks.append(text))
+            return self.comment(text)
+
+        batch = entries(lambda: with_hooks('первый'),
+                        lambda: with_hooks('второй'))
+        with self.assertLogs('core.group_commit', 'ERROR') as logs:
+            GroupCommitWriter().commit(batch)
+        self.assertEqual([future.result() for future, _ in batch],
+                         ['первый', 'второй'])
+        self.assertEqual(hooks, ['первый', 'второй'])
+        self.assertEqual(len(logs.records), 2)
+
+    def test_cancelled_entry_is_skipped(self):
+        batch = entries(lambda: self.comment('отменён'),
+                        lambda: self.comment('записан'))
+        self.assertTrue(batch[0][0].cancel())
+        GroupCommitWriter().commit(batch)
+        self.assertEqual(batch[1][0].result(), 'записан')
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)),
+            ['записан']
+        )
+
+    @override_settings(WRITE_BATCH_TIMEOUT=0.01)
+    def test_timed_out_write_is_withdrawn(self):
+        """Запись, которую писатель не начал, снимается с очереди."""
+        future = Future()
+        with mock.patch.object(group_commit.writer, 'submit',
+                               return_value=future):
+            with self.assertRaises(TimeoutError):
+                write(lambda: self.comment('поздно'), batched=True)
+        self.assertTrue(future.cancelled())
+
+    def test_concurrent_writes_wait_for_commit(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda number: write(
+                    lambda: self.comment(f'{number}'), batched=True
+                ),
+                range(20)
+            ))
+        self.assertEqual(results, [f'{number}' for number in range(20)])
+        self.assertEqual(Comment.objects.count(), 20)
+
+    @override_settings(WRITE_BATCHING=True)
+    def test_views_write_through_writer(self):
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.id,)),
+            {'text': 'Из очереди'}
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertTrue(Comment.objects.filter(text='Из очереди').exists())
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=self.author).exists()
+        )
@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+from datetime import timedelta
+
+from django.core import mail
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.metrics import registry
+from core.models import Job
+from posts.models import User
+
+calls = []
+release = threading.Event()
+
+
+@jobs.job('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@jobs.job('tests.slow')
+def slow():
+    release.wait(10)
+    calls.append('slow')
+
+
+@jobs.job('tests.fail')
+def fail():
+    raise ValueError('сломалось')
+
+
+@override_settings(JOBS_RETRY_DELAY=10, JOBS_MAX_ATTEMPTS=2)
+class JobQueueTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_key_is_idempotent(self):
+        jobs.enqueue('tests.record', {'value': 1}, key='one')
+        jobs.enqueue('tests.record', {'value': 2}, key='one')
+        jobs.enqueue('tests.record', {'value': 3})
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(jobs.work(threads=2, once=True), 2)
+        self.assertEqual(sorted(calls), [1, 3])
+
+    def test_claim_by_priority_and_lease(self):
+        jobs.enqueue('tests.record', {'value': 'low'})
+        jobs.enqueue('tests.record', {'value': 'high'}, priority=5)
+        jobs.enqueue('tests.record', {'value': 'later'}, delay=60)
+        first = jobs.claim('a', 1)
+        self.assertEqual(first[0].payload, '{"value": "high"}')
+        self.assertEqual(first[0].attempts, 1)
+        second = jobs.claim('b', 5)
+        self.assertEqual([job.payload for job in second],
+                         ['{"value": "low"}'])
+        self.assertEqual(jobs.claim('c', 5), [])
+        Job.objects.filter(id=first[0].id).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        reclaimed = jobs.claim('c', 5)
+        self.assertEqual([job.id for job in reclaimed], [first[0].id])
+        self.assertEqual(jobs.run_job(first[0]), Job.DONE)
+        self.assertEqual(
+            Job.objects.get(id=first[0].id).status, Job.RUNNING,
+            'Итог истёкшей аренды не перезаписывает новую'
+        )
+
+    @override_settings(JOBS_LEASE=0.3)
+    def test_slow_job_keeps_lease_and_frees_other_threads(self):
+        """Пока долгая задача идёт, второй поток выполняет остальные,
+        а аренда долгой продлевается дольше JOBS_LEASE."""
+        release.clear()
+        jobs.enqueue('tests.slow', priority=5)
+        for value in range(3):
+            jobs.enqueue('tests.record', {'value': value})
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=jobs.work, kwargs={'threads': 2, 'poll': 0.05,
+                                      'stop': stop}
+        )
+        worker.start()
+        try:
+            deadline = time.monotonic() + 5
+            while len(calls) < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(sorted(calls), [0, 1, 2])
+            time.sleep(0.6)
+            slow_job = Job.objects.get(name='tests.slow')
+            self.assertEqual(slow_job.status, Job.RUNNING)
+            self.assertGreater(slow_job.locked_until, timezone.now())
+        finally:
+            release.set()
+            stop.set()
+            worker.join()
+        self.assertEqual(Job.objects.get(name='tests.slow').status, Job.DONE)
+
+    def test_renew_extends_only_running_jobs(self):
+        jobs.enqueue('tests.record', {'value': 1})
+        claimed = jobs.claim('a', 1, lease=1)
+        self.assertEqual(jobs.renew(claimed, lease=600), 1)
+        self.assertGreater(
+            Job.objects.get().locked_until,
+            timezone.now() + timedelta(seconds=500)
+        )
+        jobs.run_job(claimed[0])
+        self.assertEqual(jobs.renew(claimed), 0)
+
+    def test_failed_job_is_retried_then_failed(self):
+        jobs.enqueue('tests.fail')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_job(jobs.claim('a', 1)[0]), Job.QUEUED)
+        job = Job.objects.get()
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('сломалось', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_job(jobs.claim('a', 1)[0]), Job.FAILED)
+
+    def test_enqueue_on_commit(self):
+        with transaction.atomic():
+            jobs.enqueue_on_commit('tests.record', {'value': 1})
+            transaction.set_rollback(True)
+        self.assertFalse(Job.objects.exists())
+        with transaction.atomic():
+            jobs.enqueue_on_commit('tests.record', {'value': 2})
+            self.assertFalse(Job.objects.exists())
+        self.assertTrue(Job.objects.exists())
+
+    def test_window_coalesces(self):
+        for _ in range(3):
+            jobs.enqueue_window('tests.record', 3600, {'value': 1})
+        job = Job.objects.get()
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_purge_frees_key(self):
+        jobs.enqueue('tests.record', {'value': 1}, key='one')
+        jobs.work(once=True)
+        Job.objects.update(finished=timezone.now() - timedelta(days=2))
+        self.assertEqual(jobs.purge(), 1)
+        jobs.enqueue('tests.record', {'value': 1}, key='one')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_metrics(self):
+        jobs.enqueue('tests.record', {'value': 1})
+        body = registry.render()
+        self.assertIn('yatube_jobs{status="queued"} 1', body)
+        self.assertIn('yatube_jobs_lag_seconds ', body)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+)
+class PasswordResetJobTests(TransactionTestCase):
+    def test_reset_email_is_sent_by_worker(self):
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'users.password_reset')
+        self.assertNotIn('token', job.payload)
+        self.assertNotIn('/reset/', job.payload)
+        jobs.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        link = re.search(r'http://\S+/reset/\S+/', mail.outbox[0].body)
+        response = self.client.get(link.group())
+        self.assertRedirects(
+            response, response.url, fetch_redirect_response=False
+        )
+        self.assertTrue(response.url.endswith('/set-password/'))
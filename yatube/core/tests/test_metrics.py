@@ -0,0 +1,52 @@
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import HistogramFamily
+from posts.models import User
+
+
+class HistogramTests(SimpleTestCase):
+    def test_histogram_is_cumulative(self):
+        """Корзины накопительные, +Inf равна числу наблюдений."""
+        family = HistogramFamily('test_seconds', 'Тест', buckets=(0.1, 1))
+        for value in (0.05, 0.5, 5):
+            family.observe(value, view='posts:index')
+        lines = list(family.collect())
+        self.assertIn('test_seconds_bucket{view="posts:index",le="0.1"} 1',
+                      lines)
+        self.assertIn('test_seconds_bucket{view="posts:index",le="1"} 2',
+                      lines)
+        self.assertIn('test_seconds_bucket{view="posts:index",le="+Inf"} 3',
+                      lines)
+        self.assertIn('test_seconds_count{view="posts:index"} 3', lines)
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, METRICS_TOKEN='secret')
+class MetricsViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_metrics_require_token(self):
+        """Метрики закрыты для анонимов и открыты по токену."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = Client(HTTP_AUTHORIZATION='Bearer secret').get(
+            reverse('metrics')
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_view_breakdown_is_recorded(self):
+        """Для выбранного запроса пишутся SQL и шаблоны по имени view."""
+        self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        response = Client(HTTP_AUTHORIZATION='Bearer secret').get(
+            reverse('metrics')
+        )
+        body = response.content.decode()
+        for name in ('yatube_view_seconds_count', 'yatube_view_sql_queries',
+                     'yatube_view_template_seconds_sum'):
+            with self.subTest(name=name):
+                self.assertIn(name, body)
+        self.assertIn('view="posts:profile"', body)
@@ -0,0 +1,26 @@
+import gc
+import sys
+
+from django.test import SimpleTestCase
+
+from core import preload
+
+
+class PreloadTests(SimpleTestCase):
+    def test_preload_imports_app_modules(self):
+        """Предзагрузка импортирует модули всех приложений."""
+        preload.preload()
+        for module in ('posts.views', 'posts.forms', 'users.views'):
+            with self.subTest(module=module):
+                self.assertIn(module, sys.modules)
+
+    def test_freeze_moves_objects_to_permanent_generation(self):
+        """После freeze объекты мастера не участвуют в сборке мусора."""
+        if not hasattr(gc, 'freeze'):
+            self.skipTest('gc.freeze недоступен')
+        self.addCleanup(gc.unfreeze)
+        preload.freeze()
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_memory_usage_reports_rss(self):
+        self.assertGreater(preload.memory_usage()['rss'], 0)
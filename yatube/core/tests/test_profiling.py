@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
+from django.test import TestCase, override_settings
+
+from core import profiling
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ProfilingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_thumbnail_time_inside_template(self):
+        """{% thumbnail %} внутри шаблона считается отдельно."""
+        post = Post.objects.create(
+            text='Пост с картинкой',
+            author=User.objects.create_user(username='auth'),
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        profiling.install()
+        with profiling.profile_request() as profile:
+            render_to_string(
+                'posts/includes/post_list.html', {'postq': post}
+            )
+        self.assertGreater(profile.template_time, 0)
+        self.assertGreater(profile.thumbnail_time, 0)
+        self.assertLessEqual(profile.thumbnail_time, profile.template_time)
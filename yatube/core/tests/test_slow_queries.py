@@ -0,0 +1,45 @@
+import json
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.slow_queries import fingerprint
+from posts.models import User
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists_are_normalized(self):
+        """Запросы с разными параметрами получают одну форму."""
+        first = fingerprint(
+            'SELECT * FROM "posts_post" WHERE "id" IN (%s, %s, %s) '
+            "AND text = 'a' LIMIT 10"
+        )
+        second = fingerprint(
+            'SELECT *  FROM "posts_post" WHERE "id" IN (%s)\n'
+            "AND text = 'b''c' LIMIT 20"
+        )
+        self.assertEqual(first, second)
+        self.assertEqual(
+            first,
+            'SELECT * FROM "posts_post" WHERE "id" IN (...) '
+            'AND text = ? LIMIT ?'
+        )
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+class SlowQueryMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_slow_queries_logged_with_view_and_plan(self):
+        """Медленный запрос пишется с именем view и планом."""
+        with self.assertLogs('yatube.slow_queries') as logs:
+            self.client.get(
+                reverse('posts:profile', args=(self.user.username,))
+            )
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertTrue(records)
+        self.assertEqual(records[0]['view'], 'posts:profile')
+        self.assertTrue(any(record.get('plan') for record in records))
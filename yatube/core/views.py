@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -7,3 +12,20 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics_allowed(request):
+    if request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics(request):
+    """Гистограммы процесса в текстовом формате Prometheus."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4'
+    )
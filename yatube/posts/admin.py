@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, Group, Post, Follow
+from .models import Comment, Group, GroupFollow, Post, Follow, Tag
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -23,7 +23,17 @@ class FollowAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class GroupFollowAdmin(admin.ModelAdmin):
+    empty_value_display = '-пусто-'
+
+
+class TagAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(GroupFollow, GroupFollowAdmin)
+admin.site.register(Tag, TagAdmin)
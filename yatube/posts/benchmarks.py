@@ -0,0 +1,294 @@
+"""Замеры задержки и числа SQL-запросов для всех адресов posts."""
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from itertools import cycle, product
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections
+from django.db.models import Count
+from django.template import engines
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from core.group_commit import write
+from core.metrics import percentile
+
+from . import urls
+from .models import Comment, Follow, Group, Post, Reaction, Tag, User
+from .reactions import set_reaction
+from .rows import post_rows
+
+POST_DATA = {
+    'posts:add_comment': {'text': 'Комментарий из бенчмарка'},
+    'posts:post_create': {'text': 'Пост из бенчмарка'},
+    'posts:react': {'on': '1'},
+}
+
+
+@contextmanager
+def count_queries():
+    """Считает SQL-запросы на всех соединениях внутри блока."""
+    counter = [0]
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield counter
+
+
+def bench_targets():
+    """Самые тяжёлые объекты базы: на них и меряем."""
+    authors = User.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count')[:2]
+    reader, author = (list(authors) * 2)[:2]
+    group = Group.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').first()
+    posts = Post.objects.filter(author=reader).annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count')
+    post = posts.first()
+    # Комментарии из бенчмарка пишем в другой пост, чтобы не менять
+    # объём данных, на котором меряется post_detail.
+    quiet_post = posts.last()
+    tag = Tag.objects.annotate(
+        posts_count=Count('posts')
+    ).order_by('-posts_count').first()
+    return reader, {
+        'slug': group.slug if group else 'missing',
+        'username': author.username,
+        'post_id': post.pk if post else 0,
+        'tag': tag.name if tag else 'missing',
+        'kind': Reaction.LIKE,
+        'posts:add_comment': {'post_id': quiet_post.pk if post else 0},
+    }
+
+
+def url_cases(values):
+    """Адрес и метод для каждого маршрута из posts/urls.py."""
+    for pattern in urls.urlpatterns:
+        name = f'{urls.app_name}:{pattern.name}'
+        kwargs = {key: values[key] for key in pattern.pattern.converters}
+        kwargs.update(values.get(name, {}))
+        method = 'post' if name in POST_DATA else 'get'
+        yield name, method, reverse(name, kwargs=kwargs)
+
+
+def measure(client, method, url, data, requests, keep_cache=False):
+    timings, queries = [], []
+    for _ in range(requests):
+        if not keep_cache:
+            cache.clear()
+        with count_queries() as counter:
+            started = time.perf_counter()
+            getattr(client, method)(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(counter[0])
+    return {
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'p99': percentile(timings, 99),
+        'mean': sum(timings) / len(timings),
+        'queries': max(queries),
+    }
+
+
+def run(requests=50, keep_cache=False):
+    """Результаты по каждому view в миллисекундах."""
+    reader, values = bench_targets()
+    client = Client()
+    client.force_login(reader)
+    results = {}
+    for name, method, url in url_cases(values):
+        data = POST_DATA.get(name)
+        getattr(client, method)(url, data)
+        results[name] = measure(
+            client, method, url, data, requests, keep_cache
+        )
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Список view, где p95 или число запросов хуже базового прогона."""
+    found = []
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current['p95'] > base['p95'] * (1 + tolerance):
+            found.append(
+                f'{name}: p95 {current["p95"]:.1f} ms '
+                f'против {base["p95"]:.1f} ms'
+            )
+        if current['queries'] > base['queries']:
+            found.append(
+                f'{name}: {current["queries"]} SQL-запросов '
+                f'против {base["queries"]}'
+            )
+    return found
+
+
+FEED_TEMPLATE = (
+    '{% for postq in page_obj %}'
+    '{% include "posts/includes/post_list.html" %}'
+    '{% endfor %}'
+)
+
+
+def feed_page(fast):
+    """Первая страница ленты со всеми объектами, которые нужны шаблону."""
+    page_obj = Paginator(Post.objects.all(), settings.QUANTITY_POSTS).page(1)
+    if fast:
+        page_obj.object_list = post_rows(page_obj.object_list)
+    else:
+        page_obj.object_list = list(page_obj.object_list)
+    for post in page_obj:
+        post.author, post.group
+    return page_obj
+
+
+def allocations(func):
+    """Живые блоки результата func и пиковая память за вызов."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, 'filename')
+    )
+    return blocks, peak
+
+
+def compare_rows(repeat=200):
+    """Страница ленты из моделей и из posts.rows: память и время."""
+    template = engines['django'].from_string(FEED_TEMPLATE)
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    results = {}
+    for name, fast in (('models', False), ('rows', True)):
+        template.render({'page_obj': feed_page(fast)}, request)
+        blocks, peak = allocations(lambda: feed_page(fast))
+        fetch, render = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            page_obj = feed_page(fast)
+            fetched = time.perf_counter()
+            template.render({'page_obj': page_obj}, request)
+            fetch.append((fetched - started) * 1000)
+            render.append((time.perf_counter() - fetched) * 1000)
+        results[name] = {
+            'blocks': blocks,
+            'peak_kib': peak / 1024,
+            'fetch_ms': percentile(fetch, 50),
+            'render_ms': percentile(render, 50),
+        }
+    return results
+
+
+def like_storm(post_id, users, threads=8, shards=None, on=True):
+    """Одновременные лайки одного поста из нескольких потоков."""
+    def worker(chunk):
+        done = errors = 0
+        try:
+            for user in chunk:
+                try:
+                    done += set_reaction(
+                        user, post_id, Reaction.LIKE, on, shards
+                    )
+                except OperationalError:
+                    errors += 1
+        finally:
+            connections.close_all()
+        return done, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(
+            worker, [users[number::threads] for number in range(threads)]
+        ))
+    elapsed = time.perf_counter() - started
+    done = sum(result[0] for result in results)
+    return {
+        'changed': done,
+        'errors': sum(result[1] for result in results),
+        'seconds': elapsed,
+        'per_second': len(users) / elapsed,
+    }
+
+
+def _write_actions(post):
+    """Комментарий, подписка и отписка: подписки после замера те же."""
+    def comment(user):
+        Comment(post=post, author=user, text='Комментарий из бенчмарка').save()
+
+    def follow(user):
+        Follow.objects.get_or_create(user=user, author_id=post.author_id)
+
+    def unfollow(user):
+        Follow.objects.filter(user=user, author_id=post.author_id).delete()
+
+    return comment, follow, unfollow
+
+
+def _write_worker(actions, users, deadline, batched):
+    timings, errors = [], 0
+    try:
+        for user, action in cycle(product(users, actions)):
+            started = time.perf_counter()
+            if started >= deadline:
+                break
+            try:
+                write(partial(action, user), batched)
+            except OperationalError:
+                errors += 1
+            timings.append(time.perf_counter() - started)
+    finally:
+        connections.close_all()
+    return timings, errors
+
+
+def write_storm(post, users, threads=8, duration=3.0, batched=False):
+    """Комментарии и подписки из threads потоков в течение duration
+    секунд: по транзакции на запись или через групповой коммит.
+    Пользователи, уже подписанные на автора post, не участвуют."""
+    following = set(Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True))
+    users = [
+        user for user in users
+        if user.id not in following and user.id != post.author_id
+    ]
+    actions = _write_actions(post)
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(
+            partial(_write_worker, actions, deadline=deadline,
+                    batched=batched),
+            [users[number::threads] for number in range(threads)]
+        ))
+    elapsed = time.perf_counter() - started
+    timings = [value * 1000 for result in results for value in result[0]]
+    return {
+        'writes': len(timings),
+        'errors': sum(result[1] for result in results),
+        'per_second': len(timings) / elapsed,
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+    }
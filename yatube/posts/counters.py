@@ -0,0 +1,108 @@
+"""Счётчики просмотров с отложенной записью в базу.
+
+Просмотры копятся в словаре внутри процесса и пишутся пачкой
+UPDATE ... SET views = views + n раз в VIEW_COUNTER_FLUSH_INTERVAL
+секунд. Если процесс упадёт, пропадут просмотры только за последний
+интервал (и не больше VIEW_COUNTER_MAX_PENDING постов).
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import F
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+
+
+class BufferedCounter:
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.started = False
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.thread = None
+        self.stop = threading.Event()
+
+    def _check_fork(self):
+        """После форка буфер и поток родителя не наши: начинаем заново."""
+        if self.pid != os.getpid():
+            self._reset()
+            if self.started:
+                self._start_thread()
+
+    def incr(self, pk, amount=1):
+        self._check_fork()
+        with self.lock:
+            self.pending[pk] += amount
+            full = len(self.pending) >= settings.VIEW_COUNTER_MAX_PENDING
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Пишет накопленное; одна команда UPDATE на каждую величину
+        прироста. При ошибке базы счётчики возвращаются в буфер."""
+        self._check_fork()
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+        if not pending:
+            return 0
+        by_amount = defaultdict(list)
+        for pk, amount in pending.items():
+            by_amount[amount].append(pk)
+        try:
+            for amount, ids in by_amount.items():
+                for start in range(0, len(ids), IN_CHUNK):
+                    self.model.objects.filter(
+                        pk__in=ids[start:start + IN_CHUNK]
+                    ).update(**{self.field: F(self.field) + amount})
+        except DatabaseError:
+            logger.exception('Не удалось записать счётчики %s', self.field)
+            with self.lock:
+                self.pending.update(pending)
+            return 0
+        return len(pending)
+
+    def _run(self):
+        while not self.stop.wait(settings.VIEW_COUNTER_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def _start_thread(self):
+        self.thread = threading.Thread(
+            target=self._run, name=f'{self.field}-flusher', daemon=True
+        )
+        self.thread.start()
+
+    def start(self):
+        """Запускает фоновую запись; в каждом воркере после форка
+        поток поднимается заново при первом инкременте."""
+        self._check_fork()
+        if not self.started:
+            self.started = True
+            self._start_thread()
+            atexit.register(self.shutdown)
+
+    def shutdown(self):
+        if self.started:
+            self.started = False
+            self.stop.set()
+            self.thread.join()
+        self.flush()
+
+
+post_views = BufferedCounter(Post, 'views')
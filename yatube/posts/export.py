@@ -0,0 +1,88 @@
+"""Потоковая выгрузка всех данных пользователя в ZIP."""
+import json
+import time
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+CHUNK_SIZE = 2000
+COPY_BUFFER = 64 * 1024
+
+
+class ZipStream:
+    """Файл только на запись: ZipFile пишет в него, а генератор
+    забирает накопленные байты, так что архив не держится в памяти."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def user_records(user):
+    """Имя файла в архиве и итератор строк для него."""
+    return (
+        ('posts.ndjson', user.posts.order_by('pk').values(
+            'id', 'text', 'pub_date', 'group__slug', 'image'
+        ).iterator(chunk_size=CHUNK_SIZE)),
+        ('comments.ndjson', user.comments.order_by('pk').values(
+            'id', 'post_id', 'text', 'created'
+        ).iterator(chunk_size=CHUNK_SIZE)),
+        ('following.ndjson', user.follower.order_by('pk').values(
+            'author__username'
+        ).iterator(chunk_size=CHUNK_SIZE)),
+    )
+
+
+def _entry(name, compress_type):
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = compress_type
+    return info
+
+
+def export_chunks(user):
+    """Генератор байтов ZIP-архива с NDJSON и исходными картинками."""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for name, rows in user_records(user):
+            entry = _entry(name, zipfile.ZIP_DEFLATED)
+            with archive.open(entry, 'w', force_zip64=True) as target:
+                for row in rows:
+                    target.write(json.dumps(
+                        row, cls=DjangoJSONEncoder, ensure_ascii=False
+                    ).encode() + b'\n')
+                    data = stream.pop()
+                    if data:
+                        yield data
+            yield stream.pop()
+        images = user.posts.exclude(image='').order_by('pk').values_list(
+            'image', flat=True
+        ).iterator(chunk_size=CHUNK_SIZE)
+        for image in images:
+            if not default_storage.exists(image):
+                continue
+            # Картинки уже сжаты, повторное сжатие только тратит CPU.
+            entry = _entry(f'images/{image}', zipfile.ZIP_STORED)
+            with default_storage.open(image) as source, \
+                    archive.open(entry, 'w', force_zip64=True) as target:
+                for block in iter(lambda: source.read(COPY_BUFFER), b''):
+                    target.write(block)
+                    yield stream.pop()
+            yield stream.pop()
+    yield stream.pop()
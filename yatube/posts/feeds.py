@@ -0,0 +1,240 @@
+"""Лента подписок: k-way слияние авторов и групп по (pub_date, id).
+
+Каждый источник — диапазон по индексу (источник, pub_date, id)
+после курсора длиной не больше страницы. Головы источников читаются
+одним UNION ALL на SOURCES_PER_QUERY источников и сливаются кучей,
+поэтому глубокая страница стоит столько же, сколько первая, а OR по
+авторам и группам с сортировкой всей выборки не строится вовсе.
+"""
+import heapq
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+
+from core.pagination import decode_cursor, encode_cursor
+
+from .follow_graph import get_graph
+from .models import FeedMarker, Follow, GroupFollow, Post
+from .rows import post_rows
+
+# Старые сборки SQLite: не больше 999 параметров и 500 SELECT в запросе,
+# у источника с курсором четыре параметра.
+SOURCES_PER_QUERY = 200
+# Больше новых постов опрос не считает: клиенту хватит «100+».
+NEW_POSTS_CAP = 100
+
+
+def sources(user):
+    """Источники ленты: ('author', id) и ('group', id)."""
+    if settings.FOLLOW_GRAPH_ENABLED:
+        authors = get_graph().following(user.id)
+    else:
+        authors = Follow.objects.filter(user=user).values_list(
+            'author_id', flat=True
+        )
+    groups = GroupFollow.objects.filter(user=user).values_list(
+        'group_id', flat=True
+    )
+    return (
+        [('author', author) for author in authors]
+        + [('group', group) for group in groups]
+    )
+
+
+def _source_sql(field, position, limit, newer=False):
+    """Голова одного источника; параметры — id источника и курсор.
+
+    Условие курсора то же, что в core.pagination.paginate:
+    дата <= курсора идёт диапазоном по индексу. С newer=True берутся
+    посты новее курсора.
+    """
+    ops = connection.ops
+    table = ops.quote_name(Post._meta.db_table)
+    column = ops.quote_name(Post._meta.get_field(field).column)
+    date, pk = ops.quote_name('pub_date'), ops.quote_name('id')
+    where = f'{column} = %s'
+    if position and newer:
+        where += f' AND {date} >= %s AND ({date} > %s OR {pk} > %s)'
+    elif position:
+        where += f' AND {date} <= %s AND ({date} < %s OR {pk} < %s)'
+    return (
+        f'SELECT {date}, {pk} FROM {table} WHERE {where} '
+        f'ORDER BY {date} DESC, {pk} DESC LIMIT {int(limit)}'
+    )
+
+
+def heads(sources, position, limit, newer=False):
+    """Ключи (pub_date, id) каждого источника по убыванию.
+
+    Значения дат приходят из базы как есть, поэтому сравниваются
+    так же, как их сравнивает индекс.
+    """
+    queries = {
+        field: _source_sql(field, position, limit, newer)
+        for field in ('author', 'group')
+    }
+    cursor_params = []
+    if position:
+        date = connection.ops.adapt_datetimefield_value(position[0])
+        cursor_params = [date, date, position[1]]
+    keys = [[] for _ in sources]
+    for start in range(0, len(sources), SOURCES_PER_QUERY):
+        parts, params = [], []
+        for number in range(start, min(start + SOURCES_PER_QUERY,
+                                       len(sources))):
+            field, value = sources[number]
+            parts.append(
+                f'SELECT {number}, * FROM ({queries[field]}) '
+                f'AS source_{number}'
+            )
+            params += [value, *cursor_params]
+        with connection.cursor() as cursor:
+            cursor.execute(' UNION ALL '.join(parts), params)
+            for number, date, pk in cursor.fetchall():
+                keys[number].append((date, pk))
+    for source in keys:
+        source.sort(reverse=True)
+    return keys
+
+
+def merged_ids(user, position=None, limit=None, feed_sources=None,
+               per_source=None):
+    """id постов страницы и есть ли следующая.
+
+    Пост автора из группы, на которую тоже есть подписка, приходит
+    из двух источников подряд и попадает в ленту один раз.
+    per_source меньше limit даёт не точную страницу, а выборку,
+    в которой один источник занимает не больше per_source мест.
+    """
+    limit = limit or settings.QUANTITY_POSTS
+    if feed_sources is None:
+        feed_sources = sources(user)
+    ids = []
+    merged = heapq.merge(
+        *heads(feed_sources, position, per_source or limit + 1),
+        reverse=True
+    )
+    for _, pk in merged:
+        if ids and ids[-1] == pk:
+            continue
+        if len(ids) == limit:
+            return ids, True
+        ids.append(pk)
+    return ids, False
+
+
+def cached_sources(user):
+    """Источники ленты из кеша: опрос новых постов не ходит за ними
+    в базу.
+
+    Сигналы Follow и GroupFollow сбрасывают запись только в CACHES
+    того процесса, который обработал подписку. С LocMemCache другие
+    процессы считают новые посты по старому списку источников
+    не дольше FEED_SOURCES_TTL.
+    """
+    key = f'feed_sources:{user.id}'
+    feed_sources = cache.get(key)
+    if feed_sources is None:
+        feed_sources = sources(user)
+        cache.set(key, feed_sources, settings.FEED_SOURCES_TTL)
+    return feed_sources
+
+
+def invalidate_sources(user_id):
+    cache.delete(f'feed_sources:{user_id}')
+
+
+def new_count(user, position=None, cap=NEW_POSTS_CAP):
+    """Сколько постов ленты новее курсора, но не больше cap."""
+    keys = heads(cached_sources(user), position, cap, newer=True)
+    return min(len({pk for source in keys for _, pk in source}), cap)
+
+
+def mark_seen(user, post):
+    """Запоминает самый новый пост, который пользователь видел.
+
+    Если голова ленты не изменилась, в базу ничего не пишется:
+    первая страница открывается куда чаще, чем появляются посты.
+    """
+    seen = FeedMarker.objects.filter(user=user).values_list(
+        'pub_date', 'last_id'
+    ).first()
+    if seen == (post.pub_date, post.id):
+        return
+    FeedMarker.objects.update_or_create(user=user, defaults={
+        'pub_date': post.pub_date, 'last_id': post.id,
+    })
+
+
+def seen_position(user):
+    marker = FeedMarker.objects.filter(user=user).first()
+    return marker.position if marker else None
+
+
+def in_order(rows, ids, key='id'):
+    """Строки в порядке ids: словари values() или объекты."""
+    position = {pk: number for number, pk in enumerate(ids)}
+    return sorted(rows, key=lambda row: position[
+        row[key] if isinstance(row, dict) else getattr(row, key)
+    ])
+
+
+def fetch_posts(ids):
+    """Посты в порядке ids: строки быстрого пути или модели."""
+    queryset = Post.objects.filter(id__in=ids)
+    if settings.FEED_FAST_PATH:
+        posts = post_rows(queryset)
+    else:
+        posts = queryset.select_related('author', 'group')
+    return in_order(posts, ids)
+
+
+class FeedPaginator(Paginator):
+    """Paginator готовой страницы курсорной ленты.
+
+    Общее число страниц неизвестно: известно лишь, есть ли следующая,
+    поэтому страница остаётся обычной Page, а переход дальше идёт
+    по next_cursor.
+    """
+
+    def __init__(self, object_list, per_page, number, next_cursor):
+        super().__init__(object_list, per_page)
+        self.number = number
+        self.next_cursor = next_cursor
+
+    @cached_property
+    def count(self):
+        return (self.number - 1) * self.per_page + len(self.object_list)
+
+    @cached_property
+    def num_pages(self):
+        return self.number + bool(self.next_cursor)
+
+    def current_page(self):
+        page = Page(self.object_list, self.number, self)
+        page.next_cursor = self.next_cursor
+        return page
+
+
+def page_number(value, cursor):
+    try:
+        return max(int(value), 2) if cursor else 1
+    except (TypeError, ValueError):
+        return 2
+
+
+def follow_page(user, cursor=None, number=None, limit=None):
+    """Страница ленты подписок; ValueError, если курсор испорчен."""
+    limit = limit or settings.QUANTITY_POSTS
+    position = decode_cursor(cursor) if cursor else None
+    ids, more = merged_ids(user, position, limit)
+    posts = fetch_posts(ids)
+    next_cursor = None
+    if more and posts:
+        next_cursor = encode_cursor(posts[-1].pub_date, posts[-1].id)
+    return FeedPaginator(
+        posts, limit, page_number(number, cursor), next_cursor
+    ).current_page()
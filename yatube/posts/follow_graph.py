@@ -0,0 +1,301 @@
+"""Граф подписок в памяти процесса.
+
+Рёбра posts_follow хранятся в двух сжатых списках смежности (CSR):
+отсортированные id пользователей, смещения и отсортированные id
+соседей, всё в массивах int32. Граф строится из базы или читается
+из файла снимка через mmap, тогда страницы памяти разделяют все
+процессы сервера. Изменения после сборки лежат в небольшом оверлее,
+который пополняют сигналы Follow.
+
+Граф строится при старте процесса (warm() из wsgi), при предзагрузке
+— в мастере до форка. Граф старше FOLLOW_GRAPH_MAX_AGE пересобирается
+в фоновом потоке, а запросы тем временем читают прежний: подписки,
+пришедшие во время пересборки, переносятся в новый граф.
+
+Сигналы видит только процесс, который сделал запись, поэтому другие
+процессы узнают о подписке при пересборке, не позже чем через
+FOLLOW_GRAPH_MAX_AGE секунд.
+"""
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow
+
+logger = logging.getLogger(__name__)
+MAGIC = b'YFG1'
+HEADER = struct.Struct('<4sd6q')
+TYPECODE = 'i'
+
+
+class Adjacency:
+    """Соседи каждого ключа: keys[i] -> values[offsets[i]:offsets[i+1]]."""
+
+    def __init__(self, keys, offsets, values):
+        self.keys = keys
+        self.offsets = offsets
+        self.values = values
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Из пар (ключ, сосед), отсортированных по обоим полям."""
+        keys, offsets, values = array(TYPECODE), array(TYPECODE), array(
+            TYPECODE
+        )
+        for key, value in pairs:
+            if not keys or keys[-1] != key:
+                keys.append(key)
+                offsets.append(len(values))
+            values.append(value)
+        offsets.append(len(values))
+        return cls(keys, offsets, values)
+
+    def _bounds(self, key):
+        index = bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return 0, 0
+        return self.offsets[index], self.offsets[index + 1]
+
+    def neighbours(self, key):
+        start, stop = self._bounds(key)
+        return self.values[start:stop]
+
+    def count(self, key):
+        start, stop = self._bounds(key)
+        return stop - start
+
+    def contains(self, key, value):
+        start, stop = self._bounds(key)
+        index = bisect_left(self.values, value, start, stop)
+        return index < stop and self.values[index] == value
+
+    def arrays(self):
+        return self.keys, self.offsets, self.values
+
+
+class FollowGraph:
+    def __init__(self, following, followers, built=None):
+        self.following_index = following
+        self.followers_index = followers
+        self.built = built or time.time()
+        self.lock = threading.Lock()
+        self.added = defaultdict(set)
+        self.removed = defaultdict(set)
+        self.followers_delta = defaultdict(int)
+        # Изменения во время фоновой пересборки: None, пока её нет.
+        self.pending = None
+
+    def is_following(self, user_id, author_id):
+        if author_id in self.added.get(user_id, ()):
+            return True
+        if author_id in self.removed.get(user_id, ()):
+            return False
+        return self.following_index.contains(user_id, author_id)
+
+    def following(self, user_id):
+        """id авторов, на которых подписан пользователь, по возрастанию."""
+        removed = self.removed.get(user_id, ())
+        authors = [
+            author for author in self.following_index.neighbours(user_id)
+            if author not in removed
+        ]
+        return sorted(authors + list(self.added.get(user_id, ())))
+
+    def following_count(self, user_id):
+        return (
+            self.following_index.count(user_id)
+            + len(self.added.get(user_id, ()))
+            - len(self.removed.get(user_id, ()))
+        )
+
+    def followers_count(self, author_id):
+        return (
+            self.followers_index.count(author_id)
+            + self.followers_delta.get(author_id, 0)
+        )
+
+    def add(self, user_id, author_id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append(('add', user_id, author_id))
+            if self.is_following(user_id, author_id):
+                return
+            if author_id in self.removed.get(user_id, ()):
+                self.removed[user_id].discard(author_id)
+            else:
+                self.added[user_id].add(author_id)
+            self.followers_delta[author_id] += 1
+
+    def remove(self, user_id, author_id):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append(('remove', user_id, author_id))
+            if not self.is_following(user_id, author_id):
+                return
+            if author_id in self.added.get(user_id, ()):
+                self.added[user_id].discard(author_id)
+            else:
+                self.removed[user_id].add(author_id)
+            self.followers_delta[author_id] -= 1
+
+    def save(self, path):
+        """Пишет снимок атомарно: во временный файл и rename.
+
+        Временный файл у каждого вызова свой, поэтому процессы,
+        одновременно пересобравшие граф, не пишут в один файл.
+        """
+        arrays = (
+            self.following_index.arrays() + self.followers_index.arrays()
+        )
+        descriptor, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(path) or None,
+            prefix=os.path.basename(path) + '.',
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as snapshot:
+                snapshot.write(HEADER.pack(
+                    MAGIC, self.built, *(len(values) for values in arrays)
+                ))
+                for values in arrays:
+                    snapshot.write(array(TYPECODE, values).tobytes())
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+
+def build():
+    """Граф из базы: два прохода по индексам posts_follow."""
+    pairs = Follow.objects.values_list('user', 'author')
+    following = Adjacency.from_pairs(
+        pairs.order_by('user', 'author').iterator()
+    )
+    followers = Adjacency.from_pairs(
+        (author, user) for user, author in
+        pairs.order_by('author', 'user').iterator()
+    )
+    return FollowGraph(following, followers)
+
+
+def load(path):
+    """Граф из снимка; массивы указывают прямо в mmap файла."""
+    with open(path, 'rb') as snapshot:
+        mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, built, *lengths = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError(f'{path} не снимок графа подписок')
+    view = memoryview(mapped)
+    position, arrays = HEADER.size, []
+    size = array(TYPECODE).itemsize
+    for length in lengths:
+        arrays.append(
+            view[position:position + length * size].cast(TYPECODE)
+        )
+        position += length * size
+    return FollowGraph(
+        Adjacency(*arrays[:3]), Adjacency(*arrays[3:]), built
+    )
+
+
+_graph = None
+_lock = threading.Lock()
+_refresher = None
+
+
+def _fresh(built):
+    return time.time() - built < settings.FOLLOW_GRAPH_MAX_AGE
+
+
+def _current():
+    """Свежий снимок FOLLOW_GRAPH_SNAPSHOT через mmap, иначе граф
+    из базы; построенный граф перезаписывает снимок для остальных
+    процессов."""
+    path = settings.FOLLOW_GRAPH_SNAPSHOT
+    if path and os.path.exists(path):
+        graph = load(path)
+        if _fresh(graph.built):
+            return graph
+    graph = build()
+    if path:
+        graph.save(path)
+    return graph
+
+
+def warm():
+    """Строит граф процесса до первого запроса, если граф включён."""
+    global _graph
+    if not settings.FOLLOW_GRAPH_ENABLED:
+        return None
+    with _lock:
+        _graph = _current()
+    return _graph
+
+
+def _refresh(old):
+    """Пересборка в фоне; подменяет граф, если его не сбросили."""
+    global _graph
+    try:
+        graph = _current()
+        with old.lock:
+            for method, user_id, author_id in old.pending:
+                getattr(graph, method)(user_id, author_id)
+            old.pending = None
+            if _graph is old:
+                _graph = graph
+    except Exception:
+        logger.exception('Не удалось пересобрать граф подписок')
+        with old.lock:
+            old.pending = None
+    finally:
+        connection.close()
+
+
+def get_graph():
+    """Граф процесса.
+
+    Граф старше FOLLOW_GRAPH_MAX_AGE отдаётся как есть, а пересборка
+    уходит в фоновый поток. Синхронно граф строится, только если
+    его ещё нет: warm() не вызывали или граф сбросили.
+    """
+    global _graph, _refresher
+    graph = _graph
+    if graph is not None and _fresh(graph.built):
+        return graph
+    with _lock:
+        if _graph is None:
+            _graph = _current()
+        elif not _fresh(_graph.built) and not (
+            _refresher and _refresher.is_alive()
+        ):
+            _graph.pending = []
+            _refresher = threading.Thread(
+                target=_refresh, args=(_graph,), name='follow-graph',
+                daemon=True,
+            )
+            _refresher.start()
+        return _graph
+
+
+def reset(snapshot=False):
+    """Сбрасывает граф процесса, например после массового импорта.
+
+    С snapshot=True удаляет и снимок, чтобы остальные процессы
+    не подхватили его до истечения FOLLOW_GRAPH_MAX_AGE.
+    """
+    global _graph
+    with _lock:
+        _graph = None
+        path = settings.FOLLOW_GRAPH_SNAPSHOT
+        if snapshot and path and os.path.exists(path):
+            os.remove(path)
@@ -1,9 +1,18 @@
 from django import forms
 
 from .models import Comment, Post
+from .rendering import render_instance
 
 
-class PostForm(forms.ModelForm):
+class RenderedTextMixin:
+    """Рендерит text в text_html при сохранении формы."""
+
+    def save(self, commit=True):
+        render_instance(self.instance)
+        return super().save(commit)
+
+
+class PostForm(RenderedTextMixin, forms.ModelForm):
     class Meta:
         model = Post
         labels = {
@@ -19,7 +28,7 @@ class PostForm(forms.ModelForm):
         fields = ('text', 'group', 'image')
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(RenderedTextMixin, forms.ModelForm):
     class Meta:
         model = Comment
         labels = {
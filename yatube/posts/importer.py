@@ -0,0 +1,368 @@
+"""Потоковый импорт постов, комментариев и подписок из NDJSON/CSV."""
+import csv
+import json
+import os
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import follow_graph, ranking, rendering, tagging
+from .models import Comment, Follow, Group, Post, User
+from .recommendations import mark_stale
+
+BATCH_SIZE = 5000
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+TABLES = (Post._meta.db_table, Comment._meta.db_table, Follow._meta.db_table)
+# text_html заполняет rendering.backfill в finalize().
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'group', 'author', 'image', 'text_html',
+    'render_version', 'views',
+)
+COMMENT_FIELDS = (
+    'text', 'created', 'author', 'post', 'text_html', 'render_version',
+)
+FOLLOW_FIELDS = ('user', 'author')
+
+
+def read_records(path, kind=None):
+    """Записи файла по одной: NDJSON или CSV с заголовком."""
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(source):
+                row.setdefault('type', kind)
+                yield row
+            return
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault('type', kind)
+                yield record
+
+
+def chunks(items, size=IN_CHUNK):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_date(value, default):
+    if not value:
+        return default
+    date = parse_datetime(value)
+    if date is None:
+        return default
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+def insert_rows(model, fields, rows, ignore_conflicts=False):
+    """INSERT через executemany: без модели и компилятора ORM на строку."""
+    if not rows:
+        return
+    ops = connection.ops
+    columns = ', '.join(
+        ops.quote_name(model._meta.get_field(name).column) for name in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = '{} {} ({}) VALUES ({}) {}'.format(
+        ops.insert_statement(ignore_conflicts=ignore_conflicts),
+        ops.quote_name(model._meta.db_table),
+        columns,
+        placeholders,
+        ops.ignore_conflicts_suffix_sql(ignore_conflicts=ignore_conflicts),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+class Checkpoint:
+    """Номер последней записанной строки и соответствие внешних id.
+
+    Пишется после каждого закоммиченного батча, поэтому прерванный
+    импорт продолжается с первой незаписанной строки.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {'line': 0, 'indexes': []}
+        self.post_ids = {}
+        if path and os.path.exists(path):
+            with open(path) as checkpoint:
+                self.state = json.load(checkpoint)
+            with open(self.ids_path) as ids:
+                for line in ids:
+                    external, _, pk = line.rstrip('\n').rpartition('\t')
+                    self.post_ids[external] = int(pk)
+
+    @property
+    def ids_path(self):
+        return self.path and self.path + '.ids'
+
+    def save(self, line, new_post_ids):
+        if not self.path:
+            return
+        with open(self.ids_path, 'a') as ids:
+            ids.writelines(
+                f'{external}\t{pk}\n' for external, pk in new_post_ids
+            )
+        self.state['line'] = line
+        with open(self.path + '.tmp', 'w') as checkpoint:
+            json.dump(self.state, checkpoint)
+        os.replace(self.path + '.tmp', self.path)
+
+    def remove(self):
+        for path in (self.path, self.ids_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+
+class Importer:
+    def __init__(self, checkpoint=None, create_users=False,
+                 batch_size=BATCH_SIZE):
+        self.checkpoint = Checkpoint(checkpoint)
+        self.create_users = create_users
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.next_post_id = (
+            Post.objects.aggregate(last=Max('id'))['last'] or 0
+        ) + 1
+        self.first_post_id = min(
+            self.checkpoint.post_ids.values(), default=self.next_post_id
+        )
+        self.batch_post_ids = set()
+        self.password = make_password(None)
+        self.now = timezone.now()
+        self.stats = {'post': 0, 'comment': 0, 'follow': 0, 'skipped': 0}
+
+    def defer_indexes(self):
+        """Снимает неуникальные индексы на время импорта (SQLite)."""
+        if connection.vendor != 'sqlite' or self.checkpoint.state['indexes']:
+            return
+        placeholders = ', '.join(['%s'] * len(TABLES))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                f"AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+                TABLES
+            )
+            indexes = [
+                (name, sql) for name, sql in cursor.fetchall()
+                if not sql.upper().startswith('CREATE UNIQUE')
+            ]
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX "{name}"')
+        self.checkpoint.state['indexes'] = indexes
+
+    def restore_indexes(self):
+        """Возвращает снятые индексы. IF NOT EXISTS — на случай, если
+        процесс убили посреди восстановления и импорт продолжают."""
+        with connection.cursor() as cursor:
+            for _, sql in self.checkpoint.state['indexes']:
+                cursor.execute(sql.replace(
+                    'CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1
+                ))
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [Post, Comment, Follow]
+            ):
+                cursor.execute(sql)
+        self.checkpoint.state['indexes'] = []
+
+    def user_id(self, username, pending):
+        if username in self.users:
+            return self.users[username]
+        if not self.create_users or not username:
+            return None
+        pending.append(User(username=username, password=self.password))
+        self.users[username] = None
+        return None
+
+    def resolve_users(self, pending):
+        """Создаёт недостающих авторов одним запросом на батч."""
+        if not pending:
+            return
+        User.objects.bulk_create(pending, ignore_conflicts=True)
+        for names in chunks(user.username for user in pending):
+            self.users.update(User.objects.filter(
+                username__in=names
+            ).values_list('username', 'id'))
+
+    def existing_posts(self, records):
+        """Какие из упомянутых в комментариях постов уже есть в базе."""
+        wanted = {
+            self.post_id(record.get('post')) for record in records
+            if record.get('type') == 'comment'
+        }
+        wanted.discard(None)
+        existing = set()
+        for ids in chunks(wanted):
+            existing.update(
+                Post.objects.filter(id__in=ids).values_list('id', flat=True)
+            )
+        return existing
+
+    def reserve_post_ids(self):
+        """Первый свободный id постов, прочитанный внутри транзакции
+        батча: посты, созданные сайтом во время импорта, не пересекутся
+        с импортируемыми. На SQLite блокировка записи берётся до
+        чтения, иначе сайт успел бы вставить пост между чтением и
+        вставкой."""
+        if connection.vendor == 'sqlite':
+            table = connection.ops.quote_name(Post._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(f'UPDATE {table} SET id = id WHERE 0')
+        last = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        self.next_post_id = max(self.next_post_id, last + 1)
+        self.batch_post_ids = set()
+
+    def is_imported(self, post_id):
+        """Пост из этого же батча: в базе его ещё нет."""
+        return post_id in self.batch_post_ids
+
+    def post_id(self, post):
+        """id поста на сайте по внешнему id из файла.
+
+        Только через соответствие импортированных постов: внешний id
+        может случайно совпасть с id поста сайта, и комментарий
+        к пропущенному посту ушёл бы к чужому.
+        """
+        if post is None:
+            return None
+        return self.checkpoint.post_ids.get(str(post))
+
+    def date(self, value):
+        return connection.ops.adapt_datetimefield_value(
+            parse_date(value, self.now)
+        )
+
+    def make_post(self, record, author, new_post_ids):
+        post_id = self.next_post_id
+        self.next_post_id += 1
+        self.batch_post_ids.add(post_id)
+        if record.get('id') not in (None, ''):
+            external = str(record['id'])
+            self.checkpoint.post_ids[external] = post_id
+            new_post_ids.append((external, post_id))
+        return (
+            post_id,
+            record.get('text', ''),
+            self.date(record.get('pub_date')),
+            self.groups.get(record.get('group')),
+            author,
+            record.get('image') or '',
+            '',
+            0,
+            0,
+        )
+
+    def write_batch(self, records):
+        self.reserve_post_ids()
+        pending_users = []
+        for record in records:
+            for key in ('author', 'user'):
+                self.user_id(record.get(key), pending_users)
+        self.resolve_users(pending_users)
+        known_posts = self.existing_posts(records)
+
+        posts, comments, follows, new_post_ids = [], [], [], []
+        for record in records:
+            kind = record.get('type')
+            author = self.users.get(record.get('author'))
+            if kind == 'post' and author:
+                posts.append(self.make_post(record, author, new_post_ids))
+                continue
+            post_id = self.post_id(record.get('post'))
+            if kind == 'comment' and author and post_id and (
+                post_id in known_posts or self.is_imported(post_id)
+            ):
+                comments.append((
+                    record.get('text', ''),
+                    self.date(record.get('created')),
+                    author,
+                    post_id,
+                    '',
+                    0,
+                ))
+                continue
+            user = self.users.get(record.get('user'))
+            if kind == 'follow' and author and user and user != author:
+                follows.append((user, author))
+                continue
+            self.stats['skipped'] += 1
+
+        insert_rows(Post, POST_FIELDS, posts)
+        insert_rows(Comment, COMMENT_FIELDS, comments)
+        insert_rows(Follow, FOLLOW_FIELDS, follows, ignore_conflicts=True)
+        mark_stale({user for user, _ in follows})
+        self.stats['post'] += len(posts)
+        self.stats['comment'] += len(comments)
+        self.stats['follow'] += len(follows)
+        return new_post_ids
+
+    def run(self, records, progress=None):
+        """Пишет записи батчами; каждый батч — отдельная транзакция.
+
+        Индексы возвращаются и после сбоя: иначе сайт жил бы без них
+        до продолжения импорта, а без контрольной точки их SQL
+        потерялся бы совсем. Продолжение снимет их заново.
+        """
+        line = self.checkpoint.state['line']
+        records = islice(records, line, None)
+        self.defer_indexes()
+        self.checkpoint.save(line, [])
+        synchronous = self.relax_sync()
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    new_post_ids = self.write_batch(batch)
+                line += len(batch)
+                self.checkpoint.save(line, new_post_ids)
+                if progress:
+                    progress(line, self.stats)
+        finally:
+            self.restore_sync(synchronous)
+            self.restore_indexes()
+            self.checkpoint.save(line, [])
+        self.finalize()
+        return self.stats
+
+    def relax_sync(self):
+        """Выключает fsync на время импорта (SQLite); прежнее значение.
+
+        Батчи всё равно повторяются с контрольной точки, а соединение
+        после импорта обслуживает и другие запросы, поэтому значение
+        возвращается в restore_sync.
+        """
+        if connection.vendor != 'sqlite' or connection.in_atomic_block:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA synchronous = OFF')
+        return synchronous
+
+    def restore_sync(self, synchronous):
+        if synchronous is None:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(synchronous)}')
+
+    def finalize(self):
+        """Отложенная работа, которая не нужна на каждую строку."""
+        for model in (Post, Comment):
+            rendering.backfill(model)
+        tagging.backfill(since_id=self.first_post_id - 1)
+        # Подписки записаны мимо сигналов: граф собирается заново.
+        follow_graph.reset(snapshot=True)
+        ranking.backfill_affinity()
+        self.checkpoint.remove()
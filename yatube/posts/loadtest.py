@@ -0,0 +1,251 @@
+"""Нагрузка на WSGI-приложение внутри процесса и профили трафика."""
+import io
+import multiprocessing
+import random
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+from urllib.parse import urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import OperationalError, connection, connections
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+
+from core.metrics import percentile
+
+from .benchmarks import POST_DATA, bench_targets
+from .models import User
+
+# Обёртка user_passes_test одна на все view под login_required.
+LOGIN_WRAPPER = login_required(lambda request: None).__code__
+LOG_LINE = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+"')
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def requires_login(view):
+    """Закрыт ли view декоратором login_required на любом уровне
+    обёрток: список таких view берётся из кода, а не ведётся руками."""
+    while view is not None:
+        if getattr(view, '__code__', None) is LOGIN_WRAPPER:
+            return True
+        view = getattr(view, '__wrapped__', None)
+    return False
+
+
+def entry(method, path, weight=1):
+    """Строка профиля: запрос, его вес и нужна ли авторизация."""
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return None
+    return {
+        'method': method,
+        'path': path,
+        'weight': weight,
+        'view': match.view_name,
+        'auth': requires_login(match.func),
+        'data': POST_DATA.get(match.view_name) if method == 'POST' else None,
+    }
+
+
+def default_profile():
+    """Смесь чтений и записей на самых тяжёлых объектах базы."""
+    _, values = bench_targets()
+    mix = (
+        ('GET', reverse('posts:index'), 40),
+        ('GET', reverse('posts:group_list', args=(values['slug'],)), 10),
+        ('GET', reverse('posts:profile', args=(values['username'],)), 15),
+        ('GET', reverse('posts:post_detail', args=(values['post_id'],)), 20),
+        ('GET', reverse('posts:follow_index'), 5),
+        ('POST', reverse('posts:add_comment', args=(values['post_id'],)), 5),
+        ('POST', reverse('posts:post_create'), 2),
+        ('GET', reverse('posts:profile_follow',
+                        args=(values['username'],)), 1.5),
+        ('GET', reverse('posts:profile_unfollow',
+                        args=(values['username'],)), 1.5),
+    )
+    return [entry(*line) for line in mix]
+
+
+def profile_from_log(lines):
+    """Профиль трафика из access-лога в формате common/combined."""
+    hits = Counter()
+    for line in lines:
+        match = LOG_LINE.search(line)
+        if match:
+            hits[match['method'], match['path']] += 1
+    profile = (entry(method, path, count)
+               for (method, path), count in hits.most_common())
+    return [line for line in profile if line]
+
+
+def make_sessions(count):
+    """Cookie и CSRF-токены для авторизованных запросов."""
+    sessions = []
+    for user in User.objects.order_by('-id')[:count]:
+        client = Client()
+        client.force_login(user)
+        request = HttpRequest()
+        token = get_token(request)
+        sessions.append({
+            'HTTP_COOKIE': '{}={}; {}={}'.format(
+                settings.SESSION_COOKIE_NAME,
+                client.cookies[settings.SESSION_COOKIE_NAME].value,
+                settings.CSRF_COOKIE_NAME,
+                request.META['CSRF_COOKIE'],
+            ),
+            'HTTP_X_CSRFTOKEN': token,
+        })
+    return sessions
+
+
+def make_environ(line, session):
+    url = urlsplit(line['path'])
+    body = urlencode(line['data'] or {}).encode()
+    environ = {
+        'REQUEST_METHOD': line['method'],
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    if line['auth'] and session:
+        environ.update(session)
+    setup_testing_defaults(environ)
+    return environ
+
+
+def call(application, environ):
+    statuses = []
+    response = application(
+        environ, lambda status, headers, *args: statuses.append(status)
+    )
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(statuses[0].split()[0])
+
+
+def _write_timer(waits):
+    """Время в пишущих запросах: на SQLite это в основном ожидание
+    блокировки записи. Ошибки database is locked считаются отдельно."""
+    def wrapper(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(WRITES):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if 'locked' in str(error):
+                waits['locked'] += 1
+            raise
+        finally:
+            waits['seconds'] += time.perf_counter() - started
+    return wrapper
+
+
+def worker(application, profile, sessions, deadline, count, seed):
+    """Крутит запросы из профиля до дедлайна или до count штук."""
+    rng = random.Random(seed)
+    weights = list(accumulate(line['weight'] for line in profile))
+    samples = []
+    waits = {'seconds': 0.0, 'locked': 0}
+    try:
+        with connection.execute_wrapper(_write_timer(waits)):
+            while time.perf_counter() < deadline and count != 0:
+                count -= 1
+                line = rng.choices(profile, cum_weights=weights)[0]
+                session = rng.choice(sessions) if sessions else None
+                environ = make_environ(line, session)
+                waits['seconds'], locked = 0.0, waits['locked']
+                started = time.perf_counter()
+                try:
+                    status = call(application, environ)
+                except Exception:
+                    status = 599
+                samples.append((
+                    line['view'], status, time.perf_counter() - started,
+                    waits['seconds'], waits['locked'] - locked,
+                ))
+    finally:
+        connection.close()
+    return samples
+
+
+_forked = {}
+
+
+def _process_worker(seed):
+    threads = _forked['threads']
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(worker, *_forked['args'], seed * 1000 + number)
+            for number in range(threads)
+        ]
+        return [sample for future in futures for sample in future.result()]
+
+
+def run(application, profile, threads=8, processes=0, duration=10.0,
+        requests=None, users=10):
+    """Гоняет профиль и возвращает отчёт по каждому view."""
+    sessions = make_sessions(users)
+    workers = threads * max(processes, 1)
+    count = -1 if requests is None else -(-requests // workers)
+    started = time.perf_counter()
+    args = (application, profile, sessions, started + duration, count)
+    if processes:
+        connections.close_all()
+        _forked.update(args=args, threads=threads)
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes) as pool:
+            chunks = pool.map(_process_worker, range(processes))
+        samples = [sample for chunk in chunks for sample in chunk]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [
+                executor.submit(worker, *args, seed)
+                for seed in range(threads)
+            ]
+            samples = [
+                sample for future in futures for sample in future.result()
+            ]
+    return report(samples, time.perf_counter() - started)
+
+
+def report(samples, elapsed):
+    by_view = defaultdict(list)
+    for sample in samples:
+        by_view[sample[0]].append(sample)
+    views = {}
+    for view, rows in sorted(by_view.items()):
+        timings = [row[2] * 1000 for row in rows]
+        views[view] = {
+            'requests': len(rows),
+            'rps': len(rows) / elapsed,
+            'p50': percentile(timings, 50),
+            'p95': percentile(timings, 95),
+            'p99': percentile(timings, 99),
+            'errors': sum(row[1] >= 500 for row in rows) / len(rows),
+            'write_ms': sum(row[3] for row in rows) * 1000 / len(rows),
+            'locked': sum(row[4] for row in rows),
+        }
+    total = len(samples) or 1
+    return {
+        'elapsed': elapsed,
+        'requests': len(samples),
+        'rps': len(samples) / elapsed,
+        'errors': sum(sample[1] >= 500 for sample in samples) / total,
+        'locked': sum(sample[4] for sample in samples),
+        'views': views,
+    }
@@ -0,0 +1,61 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import benchmarks
+from posts.models import Comment, Follow, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Меряет p50/p95/p99 и число SQL-запросов для каждого адреса posts '
+        'и сравнивает с базовым прогоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--output', help='Куда сохранить JSON')
+        parser.add_argument('--baseline', help='JSON прошлого прогона')
+        parser.add_argument('--tolerance', type=float, default=0.25)
+        parser.add_argument(
+            '--keep-cache', action='store_true',
+            help='Не сбрасывать кеш между запросами'
+        )
+
+    def handle(self, *args, **options):
+        results = benchmarks.run(options['requests'], options['keep_cache'])
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'requests': options['requests'],
+                'posts': Post.objects.count(),
+                'users': User.objects.count(),
+                'comments': Comment.objects.count(),
+                'follows': Follow.objects.count(),
+            },
+            'views': results,
+        }
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<24} p50 {stats["p50"]:7.1f}  p95 {stats["p95"]:7.1f}'
+                f'  p99 {stats["p99"]:7.1f} ms  SQL {stats["queries"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                base = json.load(baseline)['views']
+            found = benchmarks.regressions(
+                results, base, options['tolerance']
+            )
+            if found:
+                raise CommandError(
+                    'Регрессии производительности:\n' + '\n'.join(found)
+                )
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmarks, reactions
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Много одновременных лайков одного поста: пропускная способность '
+        'с одним шардом счётчика и с REACTION_SHARDS. Пост создаётся '
+        'на время замера и удаляется вместе с реакциями, настоящие '
+        'реакции пользователей не трогаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--users', type=int, default=500)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.order_by('id')[:options['users']])
+        if not users:
+            raise CommandError('Нет пользователей: сначала seed_bench')
+        post = Post.objects.create(
+            text='Пост бенчмарка реакций', author=users[0]
+        )
+        try:
+            for shards in (1, settings.REACTION_SHARDS):
+                result = benchmarks.like_storm(
+                    post.id, users, options['threads'], shards
+                )
+                benchmarks.like_storm(
+                    post.id, users, options['threads'], shards, on=False
+                )
+                reactions.compact()
+                self.stdout.write(
+                    f'шардов {shards:2}: '
+                    f'{result["per_second"]:7.0f} лайков/с, '
+                    f'изменено {result["changed"]}, '
+                    f'ошибок {result["errors"]}'
+                )
+        finally:
+            post.delete()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает страницу ленты из экземпляров моделей и из лёгких '
+        'строк: выделенная память, выборка и рендер.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        results = benchmarks.compare_rows(options['repeat'])
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<7} блоков {stats["blocks"]:6}  '
+                f'пик {stats["peak_kib"]:7.1f} KiB  '
+                f'выборка {stats["fetch_ms"]:6.2f} ms  '
+                f'рендер {stats["render_ms"]:6.2f} ms'
+            )
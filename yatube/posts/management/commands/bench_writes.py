@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts import benchmarks
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Записи комментариев и подписок в секунду при разном числе '
+        'потоков: по транзакции на запись и с групповым коммитом. '
+        'Пишет в базу, запускать на копии для замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', default='1,4,16,32',
+            help='Числа потоков через запятую.'
+        )
+        parser.add_argument('--duration', type=float, default=3.0)
+        parser.add_argument('--users', type=int, default=200)
+
+    def handle(self, *args, **options):
+        post = Post.objects.order_by('-views', '-id').first()
+        users = list(User.objects.order_by('id')[:options['users']])
+        self.stdout.write(
+            'потоков   напрямую: записей/с   p95 мс   '
+            'пачками: записей/с   p95 мс'
+        )
+        for threads in map(int, options['concurrency'].split(',')):
+            direct, batched = (
+                benchmarks.write_storm(
+                    post, users, threads, options['duration'], mode
+                ) for mode in (False, True)
+            )
+            self.stdout.write(
+                f'{threads:7}   {direct["per_second"]:18.0f} '
+                f'{direct["p95"]:8.1f}   {batched["per_second"]:17.0f} '
+                f'{batched["p95"]:8.1f}'
+                + (f'   ошибок {direct["errors"]}/{batched["errors"]}'
+                   if direct['errors'] or batched['errors'] else '')
+            )
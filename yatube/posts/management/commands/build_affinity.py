@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.ranking import BATCH_SIZE, backfill_affinity
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает интерес пользователей к авторам по истории '
+            'комментариев для ленты «сначала интересные».')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        created = backfill_affinity(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Записей: {created}'))
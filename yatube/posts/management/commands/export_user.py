@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import export_chunks
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии, подписки и картинки пользователя.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('-o', '--output', help='Файл архива')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {options["username"]} не найден')
+        path = options['output'] or f'{user.username}.zip'
+        size = 0
+        with open(path, 'wb') as archive:
+            for chunk in export_chunks(user):
+                archive.write(chunk)
+                size += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'{path}: {size} байт'))
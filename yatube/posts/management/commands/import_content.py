@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.importer import BATCH_SIZE, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из NDJSON или CSV '
+        'батчами с возможностью продолжить после сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .ndjson или .csv')
+        parser.add_argument(
+            '--kind', choices=('post', 'comment', 'follow'),
+            help='Тип записей, если в строках нет поля type'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл контрольной точки, по умолчанию <path>.checkpoint'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать авторов, которых нет в базе'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        importer = Importer(
+            checkpoint=(
+                options['checkpoint'] or options['path'] + '.checkpoint'
+            ),
+            create_users=options['create_users'],
+            batch_size=options['batch_size'],
+        )
+
+        def progress(line, stats):
+            rate = line / (time.perf_counter() - started)
+            self.stdout.write(f'{line} строк, {rate:.0f} строк/с', ending='\r')
+
+        stats = importer.run(
+            read_records(options['path'], options['kind']), progress
+        )
+        elapsed = time.perf_counter() - started
+        rows = sum(stats.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Постов: {stats["post"]}, комментариев: {stats["comment"]}, '
+            f'подписок: {stats["follow"]}, пропущено: {stats["skipped"]} '
+            f'за {elapsed:.1f} s ({rows / elapsed:.0f} строк/с)'
+        ))
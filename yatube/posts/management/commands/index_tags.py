@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.tagging import BATCH_SIZE, backfill
+
+
+class Command(BaseCommand):
+    help = 'Заполняет индекс хештегов и упоминаний для существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--since-id', type=int, default=0,
+            help='Обработать только посты с id больше этого'
+        )
+
+    def handle(self, *args, **options):
+        def progress(done):
+            self.stdout.write(f'{done} постов', ending='\r')
+
+        done = backfill(
+            options['since_id'], options['batch_size'], progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {done}'))
@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает WSGI-приложение внутри процесса смесью запросов '
+        'и печатает пропускную способность и задержки по view.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', help='JSON-профиль трафика')
+        parser.add_argument(
+            '--record', metavar='ACCESS_LOG',
+            help='Построить профиль по access-логу'
+        )
+        parser.add_argument('--save', help='Куда сохранить профиль')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--processes', type=int, default=0,
+            help='Число процессов, в каждом по --threads потоков'
+        )
+        parser.add_argument(
+            '--duration', type=float,
+            help='Секунд нагрузки, по умолчанию 10 (без --requests)'
+        )
+        parser.add_argument('--requests', type=int)
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--output', help='Куда сохранить отчёт JSON')
+
+    def load_profile(self, options):
+        if options['record']:
+            with open(options['record'], encoding='utf-8') as log:
+                return loadtest.profile_from_log(log)
+        if options['profile']:
+            with open(options['profile'], encoding='utf-8') as profile:
+                return json.load(profile)
+        return loadtest.default_profile()
+
+    def handle(self, *args, **options):
+        profile = self.load_profile(options)
+        if not profile:
+            raise CommandError('Профиль трафика пуст')
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as output:
+                json.dump(profile, output, indent=2, ensure_ascii=False)
+            if options['record']:
+                return
+
+        from yatube.wsgi import application
+
+        duration = options['duration']
+        if duration is None:
+            duration = float('inf') if options['requests'] else 10.0
+        result = loadtest.run(
+            application, profile,
+            threads=options['threads'],
+            processes=options['processes'],
+            duration=duration,
+            requests=options['requests'],
+            users=options['users'],
+        )
+        for view, stats in result['views'].items():
+            self.stdout.write(
+                f'{view:<24} {stats["requests"]:>6} req '
+                f'{stats["rps"]:>7.1f} rps  p50 {stats["p50"]:6.1f}  '
+                f'p95 {stats["p95"]:6.1f}  p99 {stats["p99"]:6.1f} ms  '
+                f'ошибок {stats["errors"]:.1%}  '
+                f'запись {stats["write_ms"]:.1f} ms  '
+                f'locked {stats["locked"]}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего {result["requests"]} запросов за '
+            f'{result["elapsed"]:.1f} s: {result["rps"]:.1f} rps, '
+            f'ошибок {result["errors"]:.1%}, '
+            f'database is locked: {result["locked"]}'
+        ))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(result, output, indent=2)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import BATCH_SIZE, recompute
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации «кого почитать»: по умолчанию '
+            'для пользователей, чьи подписки изменились.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать для всех пользователей'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f'{done}/{total} пользователей', ending='\r')
+
+        users, rows = recompute(
+            options['full'], options['batch_size'], progress
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователей: {users}, рекомендаций: {rows}'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.rendering import BATCH_SIZE, RENDERER_VERSION, backfill
+
+
+class Command(BaseCommand):
+    help = (
+        'Рендерит HTML постов и комментариев, у которых версия рендера '
+        'меньше текущей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        def progress(model, done):
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {done}', ending='\r'
+            )
+
+        for model in (Post, Comment):
+            done = backfill(model, options['batch_size'], progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {done} '
+                f'перерисовано до версии {RENDERER_VERSION}'
+            ))
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import seed
+
+SCALES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '3m': 3_000_000,
+}
+
+
+class Command(BaseCommand):
+    help = 'Наполняет базу данными для бенчмарков через bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k')
+        parser.add_argument('--posts', type=int, help='Точное число постов')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--groups', type=int)
+        parser.add_argument('--comments', type=int)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--image-ratio', type=float, default=0.1)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        created = seed(
+            options['posts'] or SCALES[options['scale']],
+            users=options['users'],
+            groups=options['groups'],
+            comments=options['comments'],
+            follows_per_user=options['follows_per_user'],
+            image_ratio=options['image_ratio'],
+            random_seed=options['seed'],
+        )
+        summary = ', '.join(
+            f'{key}: {value}' for key, value in created.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary} за {time.perf_counter() - started:.1f} s'
+        ))
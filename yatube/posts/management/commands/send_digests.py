@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = ('Отправляет дайджесты новых комментариев: одно письмо '
+            'на получателя. Запускать по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Потоков отправки (по умолчанию NOTIFY_WORKERS).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Получателей за проход (по умолчанию NOTIFY_BATCH).'
+        )
+
+    def handle(self, *args, **options):
+        result = send_digests(options['batch_size'], options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            'Писем: {emails}, событий закрыто: {events}'.format(**result)
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import update
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает популярные посты и группы и удаляет '
+            'истёкшие счётчики. Запускать по расписанию.')
+
+    def handle(self, *args, **options):
+        result = update()
+        self.stdout.write(self.style.SUCCESS(
+            'Постов: {posts}, групп: {groups}, '
+            'удалено интервалов: {expired}'.format(**result)
+        ))
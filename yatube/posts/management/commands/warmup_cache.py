@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает шаблоны, миниатюры и кеш первых страниц ленты, '
+        'популярных групп и профилей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, help='Страниц главной')
+        parser.add_argument('--groups', type=int, help='Популярных групп')
+        parser.add_argument('--profiles', type=int, help='Популярных профилей')
+        parser.add_argument(
+            '--concurrency', type=int, help='Параллельных запросов'
+        )
+        parser.add_argument('--host', help='HTTP_HOST для ключей кеша')
+
+    def handle(self, *args, **options):
+        results = warm_up(
+            pages=options['pages'],
+            groups=options['groups'],
+            profiles=options['profiles'],
+            concurrency=options['concurrency'],
+            host=options['host'],
+        )
+        for result in results:
+            line = (
+                f'{result.kind:<10} {result.seconds * 1000:8.1f} ms  '
+                f'{result.status}  {result.target}'
+            )
+            if result.status in (200, 'ok'):
+                self.stdout.write(line)
+            else:
+                self.stdout.write(self.style.WARNING(line))
+        total = sum(result.seconds for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето объектов: {len(results)}, '
+            f'суммарное время {total:.2f} s'
+        ))
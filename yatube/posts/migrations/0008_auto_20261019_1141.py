@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_auto_20230129_1804'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'ordering': ['-created'], 'verbose_name': 'Комментарий', 'verbose_name_plural': 'Коментарии'},
+        ),
+        migrations.AlterModelOptions(
+            name='follow',
+            options={'verbose_name_plural': 'Подписки'},
+        ),
+        migrations.AlterModelOptions(
+            name='group',
+            options={'verbose_name': 'Группа', 'verbose_name_plural': 'Группы'},
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендера'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Коментарий в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Версия рендера'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст поста в HTML'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор комментария'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.Post', verbose_name='К какому посту'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.CheckConstraint(check=models.Q(_negated=True, user=django.db.models.expressions.F('author')), name='user_not_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_user_author'),
+        ),
+    ]
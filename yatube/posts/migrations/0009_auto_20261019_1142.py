@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_auto_20261019_1141'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Хештег')),
+            ],
+            options={
+                'verbose_name': 'Хештег',
+                'verbose_name_plural': 'Хештеги',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaggedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged', to='posts.Post', verbose_name='Пост')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='posts', to='posts.Tag', verbose_name='Хештег')),
+            ],
+            options={
+                'verbose_name': 'Пост с хештегом',
+                'verbose_name_plural': 'Посты с хештегами',
+            },
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL, verbose_name='Упомянутый')),
+            ],
+            options={
+                'verbose_name': 'Упоминание',
+                'verbose_name_plural': 'Упоминания',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='taggedpost',
+            index=models.Index(fields=['tag', '-pub_date'], name='posts_tagge_tag_id_e2302b_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taggedpost',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='unique_tag_post'),
+        ),
+        migrations.AddIndex(
+            model_name='mention',
+            index=models.Index(fields=['user', '-pub_date'], name='posts_menti_user_id_b85441_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mention',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_user_post'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_auto_20261019_1142'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created'], name='posts_comme_post_id_581ffd_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_auto_20261019_1154'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupFollow',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name_plural': 'Подписки на группы',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='posts_post_author__075f1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='posts_post_group_i_6a7ae9_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupfollow',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='followers', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AddField(
+            model_name='groupfollow',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_follows', to=settings.AUTH_USER_MODEL, verbose_name='Юзер'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupfollow',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_user_group'),
+        ),
+    ]
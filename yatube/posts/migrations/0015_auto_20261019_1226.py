@@ -0,0 +1,80 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_auto_20261019_1223'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Популярная группа',
+                'verbose_name_plural': 'Популярные группы',
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Начало интервала')),
+                ('count', models.IntegerField(default=0, verbose_name='Событий')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Активность поста',
+                'verbose_name_plural': 'Активность постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Начало интервала')),
+                ('count', models.IntegerField(default=0, verbose_name='Событий')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postactivity',
+            index=models.Index(fields=['bucket'], name='posts_posta_bucket_9f87cf_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postactivity',
+            constraint=models.UniqueConstraint(fields=('post', 'bucket'), name='unique_post_bucket'),
+        ),
+        migrations.AddIndex(
+            model_name='groupactivity',
+            index=models.Index(fields=['bucket'], name='posts_group_bucket_4a79b0_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivity',
+            constraint=models.UniqueConstraint(fields=('group', 'bucket'), name='unique_group_bucket'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_auto_20261019_1226'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorAffinity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comments', models.IntegerField(default=0, verbose_name='Комментариев')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='affinities', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Интерес к автору',
+                'verbose_name_plural': 'Интерес к авторам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='authoraffinity',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_affinity'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0016_auto_20261019_1228'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedMarker',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_marker', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата поста')),
+                ('last_id', models.PositiveIntegerField(verbose_name='id поста')),
+            ],
+            options={
+                'verbose_name': 'Прочитано в ленте',
+                'verbose_name_plural': 'Прочитано в ленте',
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0017_feedmarker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inbox',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='Непрочитанных')),
+            ],
+            options={
+                'verbose_name': 'Непрочитанные уведомления',
+                'verbose_name_plural': 'Непрочитанные уведомления',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('sent', models.BooleanField(default=False, verbose_name='Отправлено в дайджесте')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Comment', verbose_name='Комментарий')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-id'], name='posts_notif_recipie_1bb815_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['sent', 'recipient'], name='posts_notif_sent_d171b5_idx'),
+        ),
+    ]
@@ -23,6 +23,12 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        'Текст поста в HTML', blank=True, editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        'Версия рендера', default=0, editable=False
+    )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
@@ -46,11 +52,19 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры', default=0, editable=False
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Диапазоны ленты подписок: источник, затем (дата, id).
+        indexes = [
+            models.Index(fields=['author', '-pub_date', '-id']),
+            models.Index(fields=['group', '-pub_date', '-id']),
+        ]
 
     def __str__(self):
         return self.text[:settings.QUANTITY_LETERS_FOR_STR]
@@ -58,6 +72,12 @@ class Post(models.Model):
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Коментарий')
+    text_html = models.TextField(
+        'Коментарий в HTML', blank=True, editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        'Версия рендера', default=0, editable=False
+    )
     created = models.DateTimeField(
         verbose_name='Дата коментария',
         auto_now_add=True
@@ -77,7 +97,8 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
-        verbose_name = 'Комментарий',
+        indexes = [models.Index(fields=['post', '-created'])]
+        verbose_name = 'Комментарий'
         verbose_name_plural = 'Коментарии'
 
     def __str__(self):
@@ -102,10 +123,363 @@ class Follow(models.Model):
         verbose_name_plural = 'Подписки'
         constraints = [
             models.CheckConstraint(
-                check=models.Q('user' != 'author'),
+                check=~models.Q(user=models.F('author')),
                 name='user_not_author'
             ),
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_user_author'
             ),
         ]
+
+
+class GroupFollow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_follows',
+        verbose_name='Юзер'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Подписки на группы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'group'], name='unique_user_group'
+            ),
+        ]
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=100, unique=True,
+                            verbose_name='Хештег')
+
+    class Meta:
+        verbose_name = 'Хештег'
+        verbose_name_plural = 'Хештеги'
+
+    def __str__(self):
+        return self.name
+
+
+class TaggedPost(models.Model):
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='posts',
+        verbose_name='Хештег'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tagged',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Пост с хештегом'
+        verbose_name_plural = 'Посты с хештегами'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'], name='unique_tag_post'
+            ),
+        ]
+        indexes = [models.Index(fields=['tag', '-pub_date'])]
+
+
+class Mention(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Упоминание'
+        verbose_name_plural = 'Упоминания'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_user_post'
+            ),
+        ]
+        indexes = [models.Index(fields=['user', '-pub_date'])]
+
+
+class Reaction(models.Model):
+    LIKE = 'like'
+    FIRE = 'fire'
+    SAD = 'sad'
+    KINDS = (
+        (LIKE, '👍'),
+        (FIRE, '🔥'),
+        (SAD, '😢'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пользователь'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reactions',
+        verbose_name='Пост'
+    )
+    kind = models.CharField('Реакция', max_length=10, choices=KINDS)
+    created = models.DateTimeField('Дата реакции', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Реакция'
+        verbose_name_plural = 'Реакции'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post', 'kind'], name='unique_user_post_kind'
+            ),
+        ]
+
+
+class ReactionCounter(models.Model):
+    """Часть счётчика реакций; сумма по шардам — итог поста."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='reaction_counters',
+        verbose_name='Пост'
+    )
+    kind = models.CharField('Реакция', max_length=10, choices=Reaction.KINDS)
+    shard = models.PositiveSmallIntegerField('Шард')
+    count = models.IntegerField('Количество', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчик реакций'
+        verbose_name_plural = 'Счётчики реакций'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'kind', 'shard'],
+                name='unique_post_kind_shard'
+            ),
+        ]
+
+
+class Recommendation(models.Model):
+    """Кого почитать: готовый топ авторов для пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name='Автор'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_recommendation'
+            ),
+        ]
+        indexes = [models.Index(fields=['user', '-score'])]
+
+
+class RecommendationQueue(models.Model):
+    """Пользователи, чьи подписки изменились после расчёта рекомендаций."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Пользователь'
+    )
+
+    class Meta:
+        verbose_name = 'Очередь рекомендаций'
+        verbose_name_plural = 'Очередь рекомендаций'
+
+
+class PostActivity(models.Model):
+    """Комментарии к посту за один интервал TRENDING_BUCKET."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Пост'
+    )
+    bucket = models.DateTimeField('Начало интервала')
+    count = models.IntegerField('Событий', default=0)
+
+    class Meta:
+        verbose_name = 'Активность поста'
+        verbose_name_plural = 'Активность постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'bucket'], name='unique_post_bucket'
+            ),
+        ]
+        indexes = [models.Index(fields=['bucket'])]
+
+
+class GroupActivity(models.Model):
+    """Комментарии и подписки в группе за один интервал TRENDING_BUCKET."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Группа'
+    )
+    bucket = models.DateTimeField('Начало интервала')
+    count = models.IntegerField('Событий', default=0)
+
+    class Meta:
+        verbose_name = 'Активность группы'
+        verbose_name_plural = 'Активность групп'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'bucket'], name='unique_group_bucket'
+            ),
+        ]
+        indexes = [models.Index(fields=['bucket'])]
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+
+
+class TrendingGroup(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Группа'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Популярная группа'
+        verbose_name_plural = 'Популярные группы'
+
+
+class AuthorAffinity(models.Model):
+    """Сколько раз пользователь комментировал посты автора."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='affinities',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    comments = models.IntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Интерес к автору'
+        verbose_name_plural = 'Интерес к авторам'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_affinity'
+            ),
+        ]
+
+
+class FeedMarker(models.Model):
+    """Самый новый пост ленты подписок, который видел пользователь."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_marker',
+        verbose_name='Пользователь'
+    )
+    pub_date = models.DateTimeField('Дата поста')
+    last_id = models.PositiveIntegerField('id поста')
+
+    class Meta:
+        verbose_name = 'Прочитано в ленте'
+        verbose_name_plural = 'Прочитано в ленте'
+
+    @property
+    def position(self):
+        return self.pub_date, self.last_id
+
+
+class Notification(models.Model):
+    """Событие «новый комментарий к вашему посту»."""
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Комментарий'
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    sent = models.BooleanField('Отправлено в дайджесте', default=False)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        indexes = [
+            models.Index(fields=['recipient', '-id']),
+            models.Index(fields=['sent', 'recipient']),
+        ]
+
+
+class Inbox(models.Model):
+    """Счётчик непрочитанных уведомлений пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='inbox',
+        verbose_name='Пользователь'
+    )
+    unread = models.PositiveIntegerField('Непрочитанных', default=0)
+
+    class Meta:
+        verbose_name = 'Непрочитанные уведомления'
+        verbose_name_plural = 'Непрочитанные уведомления'
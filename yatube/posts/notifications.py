@@ -0,0 +1,189 @@
+"""Уведомления о комментариях и их доставка дайджестами.
+
+Комментарий к чужому посту пишет одну короткую строку Notification
+и прибавляет единицу к счётчику Inbox автора поста: значок в шапке
+читает одну строку по ключу, а не считает уведомления. Письма из
+запроса не уходят. send_digests (задача очереди в конце окна
+NOTIFY_DIGEST_INTERVAL или команда по расписанию) собирает
+неотправленные события каждого получателя в одно письмо и отдаёт
+письма пулу из NOTIFY_WORKERS потоков; у потока одно почтовое
+соединение на все его письма. Событие отмечается отправленным только
+после того, как письмо ушло, поэтому упавшая отправка повторится
+при следующем запуске.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.template.loader import render_to_string
+
+from core.jobs import enqueue_window
+
+from .models import Inbox, Notification, User
+
+logger = logging.getLogger(__name__)
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+
+
+def _increment_sql():
+    ops = connection.ops
+    table = ops.quote_name(Inbox._meta.db_table)
+    user, unread = (
+        ops.quote_name(Inbox._meta.get_field(name).column)
+        for name in ('user', 'unread')
+    )
+    return (
+        f'INSERT INTO {table} ({user}, {unread}) VALUES (%s, 1) '
+        f'ON CONFLICT ({user}) '
+        f'DO UPDATE SET {unread} = {table}.{unread} + 1'
+    )
+
+
+def record_comment(comment):
+    """Событие для автора поста; свои комментарии не в счёт."""
+    recipient = comment.post.author_id
+    if comment.author_id == recipient:
+        return
+    Notification.objects.create(recipient_id=recipient, comment=comment)
+    with connection.cursor() as cursor:
+        cursor.execute(_increment_sql(), [recipient])
+    enqueue_window('posts.send_digests', settings.NOTIFY_DIGEST_INTERVAL)
+
+
+def unread_count(user):
+    return Inbox.objects.filter(user=user).values_list(
+        'unread', flat=True
+    ).first() or 0
+
+
+def mark_read(user, count):
+    """Вычитает count прочитанных: комментарии, пришедшие между
+    чтением счётчика и этим UPDATE, остаются непрочитанными."""
+    Inbox.objects.filter(user=user).update(
+        unread=Greatest(F('unread') - count, 0)
+    )
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def pending():
+    """id неотправленных событий по получателям: {user_id: [id, ...]}."""
+    rows = Notification.objects.filter(sent=False).order_by(
+        'recipient', 'id'
+    ).values_list('recipient', 'id')
+    return {
+        recipient: [pk for _, pk in group]
+        for recipient, group in groupby(rows.iterator(), lambda row: row[0])
+    }
+
+
+def build_digest(user, notifications, total):
+    """Письмо со свежими notifications из total новых событий."""
+    context = {
+        'user': user,
+        'notifications': notifications,
+        'total': total,
+        'more': total - len(notifications),
+    }
+    return EmailMessage(
+        render_to_string('posts/digest_subject.txt', context).strip(),
+        render_to_string('posts/digest.txt', context),
+        to=[user.email],
+    )
+
+
+def digests(batch):
+    """Письма для части получателей и id событий каждого письма.
+
+    В письмо попадают последние NOTIFY_DIGEST_ITEMS событий, об
+    остальных говорит число; отмечаются отправленными все.
+    У получателя без адреса письма нет, но его события всё равно
+    закрываются.
+    """
+    users = User.objects.in_bulk(list(batch))
+    shown = []
+    for ids in batch.values():
+        shown += ids[-settings.NOTIFY_DIGEST_ITEMS:]
+    loaded = {}
+    for ids in chunks(shown, IN_CHUNK):
+        loaded.update(Notification.objects.select_related(
+            'comment__author', 'comment__post'
+        ).in_bulk(ids))
+    messages, closed = [], []
+    for recipient, ids in batch.items():
+        user = users.get(recipient)
+        if user is None or not user.email:
+            closed += ids
+            continue
+        notifications = [
+            loaded[pk] for pk in reversed(ids[-settings.NOTIFY_DIGEST_ITEMS:])
+            if pk in loaded
+        ]
+        messages.append((build_digest(user, notifications, len(ids)), ids))
+    return messages, closed
+
+
+def _send(messages):
+    """Письма одного потока через одно соединение.
+
+    Возвращает id событий каждого ушедшего письма. На первой ошибке
+    поток останавливается: соединение, скорее всего, порвано, а
+    оставшиеся письма уйдут при следующем запуске.
+    """
+    delivered = []
+    try:
+        with get_connection() as mail:
+            for message, ids in messages:
+                mail.send_messages([message])
+                delivered.append(ids)
+    except Exception:
+        logger.exception('Не удалось отправить дайджест')
+    return delivered
+
+
+def deliver(messages, workers=None):
+    """Рассылает письма пулом потоков; id событий ушедших писем."""
+    workers = workers or settings.NOTIFY_WORKERS
+    parts = [part for part in (
+        messages[number::workers] for number in range(workers)
+    ) if part]
+    if not parts:
+        return []
+    with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+        return [ids for sent in executor.map(_send, parts) for ids in sent]
+
+
+def mark_sent(ids):
+    for part in chunks(ids, IN_CHUNK):
+        Notification.objects.filter(id__in=part).update(sent=True)
+
+
+def send_digests(batch_size=None, workers=None):
+    """Отправляет дайджесты всем получателям с новыми событиями.
+
+    Получатели идут частями по NOTIFY_BATCH, поэтому в памяти
+    не больше одной части писем. Возвращает число писем и событий.
+    """
+    batch_size = batch_size or settings.NOTIFY_BATCH
+    by_recipient = pending()
+    result = {'emails': 0, 'events': 0}
+    for part in chunks(list(by_recipient), batch_size):
+        messages, closed = digests({
+            recipient: by_recipient[recipient] for recipient in part
+        })
+        delivered = deliver(messages, workers)
+        for ids in delivered:
+            closed += ids
+        mark_sent(closed)
+        result['emails'] += len(delivered)
+        result['events'] += len(closed)
+    return result
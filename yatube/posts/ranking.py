@@ -0,0 +1,230 @@
+"""Лента подписок в порядке интереса.
+
+Кандидаты — первые CANDIDATES постов хронологической ленты
+(posts.feeds). Признаки готовы заранее: интерес к автору копится
+в AuthorAffinity на каждый комментарий, скорость обсуждения берётся
+из счётчиков posts.trending, свежесть — из даты. Оценка считается
+одним проходом по параллельным массивам признаков.
+
+Порядок id кешируется на пользователя вместе со списком источников
+и оценками. Новый пост ставит метку своему автору и группе; в запись
+кеша старше любой из меток своих источников досчитываются только
+посты новее её самого нового кандидата, а целиком порядок
+пересобирается раз в FEED_RANKED_TTL. Метки и кеш живут в CACHES,
+поэтому с LocMemCache другие процессы увидят новый пост не позже
+чем через FEED_RANKED_TTL.
+
+Полная пересборка стоит чуть дороже хронологической страницы
+(кандидатов больше, плюс признаки), поэтому режим включается
+FEED_RANKED_ENABLED и по умолчанию выключен.
+"""
+import math
+import time
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .feeds import heads, merged_ids, sources
+from .models import AuthorAffinity, Comment, Post, PostActivity
+
+CANDIDATES = 200
+# Один плодовитый автор не вытесняет из кандидатов остальных.
+CANDIDATES_PER_SOURCE = 10
+AFFINITY_WEIGHT = 1.0
+RECENCY_WEIGHT = 2.0
+VELOCITY_WEIGHT = 0.5
+RECENCY_HALF_LIFE = 12 * 3600
+VELOCITY_WINDOW = 6 * 3600
+BATCH_SIZE = 5000
+
+
+def _feed_key(user_id):
+    return f'ranked_feed:{user_id}'
+
+
+def _source_key(field, pk):
+    return f'feed_source:{field}:{pk}'
+
+
+def _increment_sql():
+    ops = connection.ops
+    table = ops.quote_name(AuthorAffinity._meta.db_table)
+    user, author, comments = (
+        ops.quote_name(AuthorAffinity._meta.get_field(name).column)
+        for name in ('user', 'author', 'comments')
+    )
+    return (
+        f'INSERT INTO {table} ({user}, {author}, {comments}) '
+        'VALUES (%s, %s, 1) '
+        f'ON CONFLICT ({user}, {author}) '
+        f'DO UPDATE SET {comments} = {table}.{comments} + 1'
+    )
+
+
+def record_comment(comment):
+    """Комментарий к чужому посту повышает интерес к его автору."""
+    author = comment.post.author_id
+    if comment.author_id == author:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(_increment_sql(), [comment.author_id, author])
+
+
+def backfill_affinity(batch_size=BATCH_SIZE):
+    """Пересобирает AuthorAffinity по всей истории комментариев."""
+    rows = Comment.objects.exclude(author=F('post__author')).values_list(
+        'author', 'post__author'
+    ).annotate(total=Count('id')).order_by()
+    created = 0
+    with transaction.atomic():
+        AuthorAffinity.objects.all().delete()
+        batch = []
+        for user, author, total in rows.iterator():
+            batch.append(AuthorAffinity(
+                user_id=user, author_id=author, comments=total
+            ))
+            if len(batch) == batch_size:
+                AuthorAffinity.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        AuthorAffinity.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def record_post(post):
+    """Метка нового поста для кешей лент его подписчиков."""
+    now = time.time()
+    markers = {_source_key('author', post.author_id): now}
+    if post.group_id:
+        markers[_source_key('group', post.group_id)] = now
+    cache.set_many(markers, settings.FEED_RANKED_TTL)
+
+
+def invalidate(user_id):
+    """Подписки пользователя изменились."""
+    cache.delete(_feed_key(user_id))
+
+
+def features(user, ids):
+    """Признаки кандидатов: параллельные массивы в порядке ids
+    и позиция (дата, id) самого нового из них."""
+    now = timezone.now()
+    rows = {
+        pk: (author, pub_date) for pk, author, pub_date in
+        Post.objects.filter(id__in=ids).values_list(
+            'id', 'author_id', 'pub_date'
+        )
+    }
+    ids = [pk for pk in ids if pk in rows]
+    newest = max(((rows[pk][1], pk) for pk in ids), default=None)
+    affinity = dict(AuthorAffinity.objects.filter(
+        user=user, author_id__in={author for author, _ in rows.values()}
+    ).values_list('author_id', 'comments'))
+    velocity = dict(PostActivity.objects.filter(
+        post_id__in=ids,
+        bucket__gte=now - timedelta(seconds=VELOCITY_WINDOW),
+    ).values('post').annotate(total=Sum('count')).order_by().values_list(
+        'post', 'total'
+    ))
+    return ids, newest, {
+        'affinity': array('d', (
+            affinity.get(rows[pk][0], 0) for pk in ids
+        )),
+        'age': array('d', (
+            (now - rows[pk][1]).total_seconds() for pk in ids
+        )),
+        'velocity': array('d', (velocity.get(pk, 0) for pk in ids)),
+    }
+
+
+def score(columns):
+    """Оценки кандидатов за один проход по столбцам признаков."""
+    log1p = math.log1p
+    decay = math.log(2) / RECENCY_HALF_LIFE
+    exp = math.exp
+    return [
+        AFFINITY_WEIGHT * log1p(affinity)
+        + RECENCY_WEIGHT * exp(-decay * max(age, 0))
+        + VELOCITY_WEIGHT * log1p(velocity)
+        for affinity, age, velocity in zip(
+            columns['affinity'], columns['age'], columns['velocity']
+        )
+    ]
+
+
+def ordered(ids, scores):
+    """Пары (оценка, id) по убыванию оценки."""
+    return sorted(zip(scores, ids), reverse=True)[:CANDIDATES]
+
+
+def rank(user):
+    """Запись кеша: кандидаты по убыванию оценки, их оценки,
+    источники ленты и позиция самого нового кандидата."""
+    feed_sources = sources(user)
+    candidates, _ = merged_ids(
+        user, limit=CANDIDATES, feed_sources=feed_sources,
+        per_source=CANDIDATES_PER_SOURCE,
+    )
+    ids, newest, columns = features(user, candidates)
+    pairs = ordered(ids, score(columns))
+    return {
+        'created': time.time(),
+        'sources': feed_sources,
+        'newest': newest,
+        'ids': [pk for _, pk in pairs],
+        'scores': [value for value, _ in pairs],
+    }
+
+
+def refresh(user, entry):
+    """Досчитывает в запись кеша посты новее её самого нового
+    кандидата: их единицы, поэтому это дешевле пересборки.
+
+    Оценки старых кандидатов остаются на момент сборки записи.
+    """
+    known = set(entry['ids'])
+    new_ids = {
+        pk for source in heads(
+            entry['sources'], entry['newest'], CANDIDATES_PER_SOURCE,
+            newer=True,
+        ) for _, pk in source if pk not in known
+    }
+    if not new_ids:
+        return entry
+    ids, newest, columns = features(user, list(new_ids))
+    pairs = ordered(
+        entry['ids'] + ids, entry['scores'] + score(columns)
+    )
+    return dict(
+        entry,
+        newest=max(entry['newest'], newest) if newest else entry['newest'],
+        ids=[pk for _, pk in pairs],
+        scores=[value for value, _ in pairs],
+    )
+
+
+def ranked_ids(user):
+    """Порядок ленты из кеша; устаревший дополняется новыми постами,
+    а старше FEED_RANKED_TTL — пересобирается."""
+    key = _feed_key(user.id)
+    entry = cache.get(key)
+    built = time.time()
+    if entry is not None:
+        markers = cache.get_many([
+            _source_key(*source) for source in entry['sources']
+        ])
+        if all(marker <= entry['built'] for marker in markers.values()):
+            return entry['ids']
+    if (entry is None or entry['newest'] is None
+            or built - entry['created'] > settings.FEED_RANKED_TTL):
+        entry = rank(user)
+    else:
+        entry = refresh(user, entry)
+    entry['built'] = built
+    cache.set(key, entry, settings.FEED_RANKED_TTL)
+    return entry['ids']
@@ -0,0 +1,188 @@
+"""Реакции на посты и шардированные счётчики к ним.
+
+Каждая реакция прибавляет единицу к случайному из REACTION_SHARDS
+рядов счётчика поста, поэтому одновременные лайки одного поста не
+ждут блокировку одной строки. Итог — сумма по шардам; compact()
+сворачивает шарды в один ряд. Его запускает задача очереди
+posts.compact_reactions в конце окна REACTION_COMPACT_INTERVAL, если
+за окно поменялась хоть одна реакция.
+"""
+import random
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.jobs import enqueue_window
+
+from .models import Reaction, ReactionCounter
+
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+# SQLite отвечает «locked», когда пишет другой поток или процесс:
+# транзакция реакции короткая, её можно просто повторить.
+LOCK_RETRIES = 8
+LOCK_BACKOFF = 0.005
+# Окно, для которого этот процесс уже поставил свёртку счётчиков:
+# лайк не пишет в таблицу задач каждый раз.
+_compact_window = None
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+def _upsert_sql():
+    """INSERT счётчика, а при конфликте — прибавление к нему.
+
+    Синтаксис ON CONFLICT понимают SQLite 3.24+ и PostgreSQL.
+    """
+    table = _table(ReactionCounter)
+    post, kind, shard, count = (
+        _column(ReactionCounter, name)
+        for name in ('post', 'kind', 'shard', 'count')
+    )
+    return (
+        f'INSERT INTO {table} ({post}, {kind}, {shard}, {count}) '
+        'VALUES (%s, %s, %s, %s) '
+        f'ON CONFLICT ({post}, {kind}, {shard}) '
+        f'DO UPDATE SET {count} = {table}.{count} + excluded.{count}'
+    )
+
+
+def set_reaction(user, post_id, kind, on=True, shards=None):
+    """Ставит или снимает реакцию; повтор с тем же on ничего не меняет.
+
+    Реакция пишется одной командой (INSERT с пропуском дубликата или
+    DELETE), счётчик трогается, только если она действительно
+    изменилась. Возвращает True, если что-то поменялось.
+    shards по умолчанию берётся из REACTION_SHARDS.
+    Вне чужой транзакции ошибка блокировки SQLite повторяется
+    до LOCK_RETRIES раз с растущей случайной паузой.
+    """
+    attempt = 0
+    while True:
+        try:
+            changed = _write_reaction(user, post_id, kind, on, shards)
+        except OperationalError as error:
+            attempt += 1
+            if (connection.in_atomic_block or 'locked' not in str(error)
+                    or attempt >= LOCK_RETRIES):
+                raise
+            time.sleep(random.uniform(0, LOCK_BACKOFF * 2 ** attempt))
+            continue
+        if changed:
+            schedule_compact()
+        return changed
+
+
+def schedule_compact():
+    """Ставит свёртку шардов в конец текущего окна, один раз на окно
+    в каждом процессе; повтор из другого процесса съест ключ задачи."""
+    global _compact_window
+    interval = settings.REACTION_COMPACT_INTERVAL
+    window = int(time.time() // interval)
+    if window != _compact_window:
+        _compact_window = window
+        enqueue_window('posts.compact_reactions', interval)
+
+
+def _write_reaction(user, post_id, kind, on, shards):
+    table = _table(Reaction)
+    user_column, post_column, kind_column = (
+        _column(Reaction, name) for name in ('user', 'post', 'kind')
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        if on:
+            ops = connection.ops
+            cursor.execute(
+                f'{ops.insert_statement(ignore_conflicts=True)} {table} '
+                f'({user_column}, {post_column}, {kind_column}, '
+                f'{_column(Reaction, "created")}) VALUES (%s, %s, %s, %s) '
+                f'{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}',
+                [user.id, post_id, kind,
+                 ops.adapt_datetimefield_value(timezone.now())]
+            )
+        else:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {user_column} = %s '
+                f'AND {post_column} = %s AND {kind_column} = %s',
+                [user.id, post_id, kind]
+            )
+        if cursor.rowcount != 1:
+            return False
+        cursor.execute(_upsert_sql(), [
+            post_id, kind,
+            random.randrange(shards or settings.REACTION_SHARDS),
+            1 if on else -1,
+        ])
+    return True
+
+
+def totals(post_ids):
+    """{id поста: {реакция: количество}} одним запросом."""
+    result = defaultdict(dict)
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), IN_CHUNK):
+        rows = ReactionCounter.objects.filter(
+            post_id__in=post_ids[start:start + IN_CHUNK]
+        ).values('post', 'kind').annotate(total=Sum('count')).order_by()
+        for row in rows:
+            result[row['post']][row['kind']] = row['total']
+    return result
+
+
+def attach(posts, user):
+    """Кладёт посту список (реакция, значок, количество, моя ли).
+
+    Счётчики всей страницы — один запрос, реакции читателя — ещё один.
+    """
+    post_ids = [post.id for post in posts]
+    counts = totals(post_ids)
+    mine = set()
+    if user.is_authenticated and post_ids:
+        mine = set(Reaction.objects.filter(
+            user=user, post_id__in=post_ids
+        ).values_list('post', 'kind'))
+    for post in posts:
+        post.reaction_list = [
+            (kind, label, counts[post.id].get(kind, 0),
+             (post.id, kind) in mine)
+            for kind, label in Reaction.KINDS
+        ]
+    return posts
+
+
+def compact():
+    """Сворачивает шарды каждого счётчика в шард 0.
+
+    Свёрнутые ряды блокируются до конца транзакции, поэтому
+    параллельный лайк либо успевает до чтения, либо ждёт и пишет
+    в уже свёрнутый счётчик. Возвращает число удалённых шардов.
+    """
+    with transaction.atomic():
+        rows = list(ReactionCounter.objects.select_for_update().filter(
+            shard__gt=0
+        ).values_list('id', 'post', 'kind', 'count'))
+        folded = defaultdict(int)
+        for _, post_id, kind, count in rows:
+            folded[post_id, kind] += count
+        with connection.cursor() as cursor:
+            cursor.executemany(_upsert_sql(), [
+                (post_id, kind, 0, count)
+                for (post_id, kind), count in folded.items()
+            ])
+        ids = [row[0] for row in rows]
+        for start in range(0, len(ids), IN_CHUNK):
+            ReactionCounter.objects.filter(
+                id__in=ids[start:start + IN_CHUNK]
+            ).delete()
+        ReactionCounter.objects.filter(count=0).delete()
+    return len(rows)
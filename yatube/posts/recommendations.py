@@ -0,0 +1,159 @@
+"""Рекомендации «кого почитать» по графу подписок.
+
+Оценка автора b для пользователя u складывается из двух частей:
+
+* друзья друзей — строка произведения A·A матрицы подписок A:
+  сколько авторов из подписок u сами подписаны на b, каждый путь
+  с весом 1/sqrt(число подписок промежуточного автора);
+* совместные подписки — для каждого автора a из подписок u берутся
+  SIMILAR_COUNT самых похожих авторов по косинусу столбцов A
+  (их читают одни и те же люди).
+
+Матрица не собирается целиком: строки считаются по одной поверх
+CSR-индексов posts.follow_graph, похожие авторы вычисляются лениво
+и запоминаются на время прогона. Память ограничена самим графом,
+топами похожих авторов и одним батчем пользователей.
+"""
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+
+from . import follow_graph
+from .models import Recommendation, RecommendationQueue, User
+
+BATCH_SIZE = 1000
+SIMILAR_COUNT = 20
+# У популярного автора похожих ищем по равномерной выборке подписчиков.
+MAX_FOLLOWERS = 200
+FOF_WEIGHT = 1.0
+COFOLLOW_WEIGHT = 2.0
+
+
+class Scorer:
+    def __init__(self, graph, count=None):
+        self.following = graph.following_index
+        self.followers = graph.followers_index
+        self.count = count or settings.RECOMMENDATIONS_COUNT
+        self.similar_cache = {}
+        # Число подписчиков по id: без бинарного поиска на каждого
+        # кандидата в похожие.
+        keys, offsets, _ = self.followers.arrays()
+        self.followers_count = array(
+            'i', [0] * ((keys[-1] + 1) if keys else 0)
+        )
+        for index, key in enumerate(keys):
+            self.followers_count[key] = offsets[index + 1] - offsets[index]
+
+    def similar(self, author):
+        """Авторы с тем же кругом читателей: [(id, косинус), ...]."""
+        if author in self.similar_cache:
+            return self.similar_cache[author]
+        followers = self.followers.neighbours(author)
+        step = max(1, len(followers) // MAX_FOLLOWERS)
+        together = Counter()
+        for follower in followers[::step]:
+            together.update(self.following.neighbours(follower))
+        del together[author]
+        scale = step / math.sqrt(len(followers) or 1)
+        counts = self.followers_count
+        similar = heapq.nlargest(SIMILAR_COUNT, [
+            (other, shared * scale / math.sqrt(counts[other]))
+            for other, shared in together.items()
+        ], key=itemgetter(1))
+        self.similar_cache[author] = similar
+        return similar
+
+    def score(self, user):
+        """Топ авторов для пользователя: [(id, оценка), ...]."""
+        followed = self.following.neighbours(user)
+        scores = defaultdict(float)
+        for author in followed:
+            authors = self.following.neighbours(author)
+            if authors:
+                weight = FOF_WEIGHT / math.sqrt(len(authors))
+                for other in authors:
+                    scores[other] += weight
+            for other, similarity in self.similar(author):
+                scores[other] += COFOLLOW_WEIGHT * similarity
+        for author in followed:
+            scores.pop(author, None)
+        scores.pop(user, None)
+        return heapq.nlargest(self.count, scores.items(), key=itemgetter(1))
+
+
+def write(scorer, users):
+    """Заменяет рекомендации пользователей батча одной транзакцией."""
+    rows = [
+        Recommendation(user_id=user, author_id=author, score=score)
+        for user in users for author, score in scorer.score(user)
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=users).delete()
+        Recommendation.objects.bulk_create(rows)
+    return len(rows)
+
+
+def mark_stale(user_ids):
+    """Ставит пользователей в очередь на пересчёт."""
+    RecommendationQueue.objects.bulk_create(
+        [RecommendationQueue(user_id=user) for user in user_ids],
+        ignore_conflicts=True
+    )
+
+
+def claim():
+    """Забирает очередь целиком: отметки, пришедшие позже, останутся
+    в ней до следующего прогона."""
+    with transaction.atomic():
+        users = list(
+            RecommendationQueue.objects.values_list('user_id', flat=True)
+        )
+        RecommendationQueue.objects.filter(user_id__in=users).delete()
+    return users
+
+
+def recompute(full=False, batch_size=BATCH_SIZE, progress=None):
+    """Пересчитывает рекомендации.
+
+    full=True — для всех, у кого есть подписки или старые
+    рекомендации, иначе только для пользователей из очереди.
+    Граф собирается после разбора очереди, поэтому видит все
+    изменения, из-за которых пользователи в неё попали.
+    Возвращает (пользователей, строк).
+    """
+    users = claim()
+    try:
+        graph = follow_graph.build()
+        if full:
+            users = set(graph.following_index.keys)
+            users.update(
+                Recommendation.objects.values_list('user_id', flat=True)
+            )
+        users = sorted(users)
+        scorer = Scorer(graph)
+        rows = 0
+        for start in range(0, len(users), batch_size):
+            batch = users[start:start + batch_size]
+            rows += write(scorer, batch)
+            if progress:
+                progress(start + len(batch), len(users))
+    except BaseException:
+        mark_stale(users)
+        raise
+    return len(users), rows
+
+
+def suggestions(user):
+    """Рекомендации для страницы одним запросом по индексу."""
+    if not user.is_authenticated:
+        return []
+    return list(User.objects.filter(
+        recommended_to__user=user
+    ).exclude(
+        following__user=user
+    ).order_by('-recommended_to__score')[:settings.RECOMMENDATIONS_COUNT])
@@ -0,0 +1,110 @@
+"""HTML текстов постов и комментариев, рассчитанный при записи.
+
+Шаблоны выводят готовый text_html. После изменения правил рендера
+увеличьте RENDERER_VERSION и запустите manage.py render_texts.
+"""
+import re
+
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils.html import escape
+
+from .models import User
+
+RENDERER_VERSION = 2
+BATCH_SIZE = 2000
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+TOKEN = re.compile(
+    r'(?P<url>https?://[^\s<>"]*[^\s<>".,:;!?\'()\[\]])'
+    r'|(?<![\w@])@(?P<mention>[\w.+-]*\w)'
+    r'|(?<![\w&#])#(?P<tag>\w+)'
+)
+
+
+def mentioned_usernames(text):
+    return {
+        match['mention'] for match in TOKEN.finditer(text)
+        if match['mention']
+    }
+
+
+def existing_usernames(names):
+    found = set()
+    names = list(names)
+    for start in range(0, len(names), IN_CHUNK):
+        found.update(User.objects.filter(
+            username__in=names[start:start + IN_CHUNK]
+        ).values_list('username', flat=True))
+    return found
+
+
+def _token_html(match, users):
+    if match['url']:
+        url = escape(match['url'])
+        return f'<a href="{url}" rel="nofollow noopener">{url}</a>'
+    if match['mention']:
+        name = match['mention']
+        if name not in users:
+            return escape(match.group())
+        url = reverse('posts:profile', args=(name,))
+        return f'<a class="mention" href="{url}">@{escape(name)}</a>'
+    url = reverse('posts:tag_posts', args=(match['tag'].lower(),))
+    return f'<a class="hashtag" href="{url}">#{escape(match["tag"])}</a>'
+
+
+def render(text, users=None):
+    """Экранированный текст со ссылками, упоминаниями и хештегами.
+
+    users — множество существующих имён; если не передано, имена из
+    текста проверяются одним запросом.
+    """
+    if users is None:
+        users = existing_usernames(mentioned_usernames(text))
+    parts, position = [], 0
+    for match in TOKEN.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_token_html(match, users))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    html = ''.join(parts)
+    return html.replace('\r\n', '\n').replace('\n', '<br>')
+
+
+def render_instance(instance):
+    instance.text_html = render(instance.text)
+    instance.render_version = RENDERER_VERSION
+
+
+def backfill(model, batch_size=BATCH_SIZE, progress=None):
+    """Перерисовывает тексты со старой версией рендера батчами.
+
+    Имена из упоминаний проверяются одним запросом на батч, строки
+    пишутся через executemany. Возвращает число обновлённых строк.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    sql = (
+        f'UPDATE {table} SET text_html = %s, render_version = %s '
+        'WHERE id = %s'
+    )
+    stale = model.objects.filter(
+        render_version__lt=RENDERER_VERSION
+    ).order_by('id').values_list('id', 'text')
+    done, last = 0, 0
+    while True:
+        batch = list(stale.filter(id__gt=last)[:batch_size])
+        if not batch:
+            return done
+        users = existing_usernames(set().union(
+            *(mentioned_usernames(text) for _, text in batch)
+        ))
+        rows = [
+            (render(text, users), RENDERER_VERSION, pk)
+            for pk, text in batch
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        done += len(rows)
+        last = batch[-1][0]
+        if progress:
+            progress(model, done)
@@ -0,0 +1,91 @@
+"""Лёгкие строки ленты вместо экземпляров Post, User и Group.
+
+Атрибуты называются так же, как у моделей, поэтому шаблон
+posts/includes/post_list.html работает с обоими вариантами.
+"""
+ROW_FIELDS = (
+    'id', 'text', 'text_html', 'pub_date', 'image', 'views',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+
+
+class AuthorRow:
+    __slots__ = ('username', 'first_name', 'last_name')
+
+    def __init__(self, username, first_name, last_name):
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __str__(self):
+        return self.username
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class GroupRow:
+    __slots__ = ('slug', 'title')
+
+    def __init__(self, slug, title):
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class PostRow:
+    __slots__ = (
+        'id', 'text', 'text_html', 'pub_date', 'image', 'views', 'author',
+        'group', 'reaction_list',
+    )
+
+    def __init__(self, id, text, text_html, pub_date, image, views, author,
+                 group):
+        self.id = id
+        self.text = text
+        self.text_html = text_html
+        self.pub_date = pub_date
+        self.image = image
+        self.views = views
+        self.reaction_list = ()
+        self.author = author
+        self.group = group
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def post_rows(queryset):
+    """Посты страницы одним запросом с JOIN автора и группы.
+
+    queryset — срез страницы. Он уходит подзапросом за id, чтобы
+    сортировка и LIMIT шли по узкой таблице постов, а JOIN касался
+    только строк страницы. Все ленты идут по дате публикации, поэтому
+    строки страницы сортируются порядком модели. Авторы и группы,
+    встречающиеся на странице несколько раз, создаются один раз.
+    """
+    model = queryset.model
+    page = model.objects.filter(
+        id__in=queryset.values('id')
+    ).order_by(*model._meta.ordering).values_list(*ROW_FIELDS)
+    authors, groups, rows = {}, {}, []
+    for (post_id, text, text_html, pub_date, image, views, username,
+         first_name, last_name, slug, title) in page:
+        author = authors.get(username)
+        if author is None:
+            author = authors[username] = AuthorRow(
+                username, first_name, last_name
+            )
+        group = None
+        if slug is not None:
+            group = groups.get(slug)
+            if group is None:
+                group = groups[slug] = GroupRow(slug, title)
+        rows.append(PostRow(
+            post_id, text, text_html, pub_date, image, views, author, group
+        ))
+    return rows
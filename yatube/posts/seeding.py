@@ -0,0 +1,181 @@
+"""Быстрое наполнение базы реалистичными данными для бенчмарков."""
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+from PIL import Image
+
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+TEXTS_POOL = 1000
+IMAGES_POOL = 20
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил даты из данных."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def power_law_weights(count, exponent=1.1):
+    """Накопленные веса Ципфа: первые объекты получают большую часть."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def _batched(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def make_images(count=IMAGES_POOL):
+    """Небольшой пул картинок, которые разделяют посты."""
+    names = []
+    for number in range(count):
+        name = f'posts/bench_{number}.jpg'
+        if not default_storage.exists(name):
+            buffer = io.BytesIO()
+            color = tuple(random.randrange(256) for _ in range(3))
+            Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def seed(posts, users=None, groups=None, follows_per_user=20,
+         comments=None, image_ratio=0.1, random_seed=0):
+    """Создаёт пользователей, группы, посты, комментарии и подписки.
+
+    Популярность авторов и постов распределена по степенному закону.
+    Возвращает словарь с числом созданных объектов.
+    """
+    rng = random.Random(random_seed)
+    faker = Faker('ru_RU')
+    Faker.seed(random_seed)
+    users = users or max(10, posts // 20)
+    groups = groups or max(5, posts // 1000)
+    comments = posts // 2 if comments is None else comments
+    texts = [faker.paragraph(nb_sentences=4) for _ in range(TEXTS_POOL)]
+    images = make_images() if image_ratio else []
+    password = make_password(None)
+    prefix = f'bench{User.objects.count()}_'
+
+    with transaction.atomic():
+        User.objects.bulk_create((
+            User(
+                username=f'{prefix}{number}',
+                first_name=faker.first_name(),
+                last_name=faker.last_name(),
+                password=password,
+            )
+            for number in range(users)
+        ))
+        mixer.cycle(groups).blend(
+            Group, slug=mixer.sequence(f'{prefix}group_{{0}}')
+        )
+    user_ids = list(User.objects.filter(
+        username__startswith=prefix
+    ).order_by('id').values_list('id', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith=prefix
+    ).values_list('id', flat=True))
+    author_weights = power_law_weights(len(user_ids))
+
+    last_post = Post.objects.aggregate(last=Max('id'))['last'] or 0
+    now = timezone.now()
+    post_dates = (
+        now - timedelta(minutes=posts - number) for number in range(posts)
+    )
+    with explicit_dates(Post._meta.get_field('pub_date')):
+        for batch in _batched(post_dates):
+            authors = rng.choices(user_ids, cum_weights=author_weights,
+                                  k=len(batch))
+            with transaction.atomic():
+                Post.objects.bulk_create([
+                    Post(
+                        text=rng.choice(texts),
+                        author_id=author,
+                        group_id=(
+                            rng.choice(group_ids)
+                            if rng.random() < 0.7 else None
+                        ),
+                        image=(
+                            rng.choice(images)
+                            if images and rng.random() < image_ratio else ''
+                        ),
+                        pub_date=pub_date,
+                    )
+                    for author, pub_date in zip(authors, batch)
+                ])
+
+    post_ids = list(Post.objects.filter(
+        id__gt=last_post
+    ).order_by('-pub_date').values_list('id', flat=True))
+    positions = range(len(post_ids))
+    post_weights = power_law_weights(len(post_ids), exponent=0.8)
+    with explicit_dates(Comment._meta.get_field('created')):
+        for batch in _batched(range(comments)):
+            targets = rng.choices(positions, cum_weights=post_weights,
+                                  k=len(batch))
+            with transaction.atomic():
+                Comment.objects.bulk_create([
+                    Comment(
+                        text=rng.choice(texts)[:200],
+                        author_id=rng.choice(user_ids),
+                        post_id=post_ids[position],
+                        created=now - timedelta(
+                            seconds=rng.randrange(60 * (position + 1))
+                        ),
+                    )
+                    for position in targets
+                ])
+
+    follows = set()
+    for user in user_ids:
+        count = min(
+            len(user_ids) - 1,
+            int(follows_per_user * rng.paretovariate(1.5) / 3) + 1
+        )
+        for author in rng.choices(user_ids, cum_weights=author_weights,
+                                  k=count):
+            if author != user:
+                follows.add((user, author))
+    with transaction.atomic():
+        for batch in _batched(follows):
+            Follow.objects.bulk_create(
+                [Follow(user_id=user, author_id=author)
+                 for user, author in batch],
+                ignore_conflicts=True
+            )
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': posts,
+        'comments': comments,
+        'follows': len(follows),
+        'images': len(images),
+    }
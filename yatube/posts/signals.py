@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.jobs import enqueue_window
+
+from . import feeds, follow_graph, notifications, ranking, trending
+from .recommendations import mark_stale
+from .models import Comment, Follow, GroupFollow, Post
+
+
+def recommend_later():
+    """Очередь рекомендаций разбирается задачей раз в окно."""
+    enqueue_window('posts.recommend', settings.RECOMMENDATIONS_INTERVAL)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        mark_stale([instance.user_id])
+        recommend_later()
+        ranking.invalidate(instance.user_id)
+        feeds.invalidate_sources(instance.user_id)
+    if created and settings.FOLLOW_GRAPH_ENABLED:
+        transaction.on_commit(lambda: follow_graph.get_graph().add(
+            instance.user_id, instance.author_id
+        ))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    mark_stale([instance.user_id])
+    recommend_later()
+    ranking.invalidate(instance.user_id)
+    feeds.invalidate_sources(instance.user_id)
+    if settings.FOLLOW_GRAPH_ENABLED:
+        transaction.on_commit(lambda: follow_graph.get_graph().remove(
+            instance.user_id, instance.author_id
+        ))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        trending.record_comment(instance)
+        ranking.record_comment(instance)
+        notifications.record_comment(instance)
+
+
+@receiver(post_save, sender=GroupFollow)
+def group_follow_created(sender, instance, created, **kwargs):
+    if created:
+        trending.record_group_follow(instance)
+    ranking.invalidate(instance.user_id)
+    feeds.invalidate_sources(instance.user_id)
+
+
+@receiver(post_delete, sender=GroupFollow)
+def group_follow_deleted(sender, instance, **kwargs):
+    ranking.invalidate(instance.user_id)
+    feeds.invalidate_sources(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        ranking.record_post(instance)
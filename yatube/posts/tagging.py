@@ -0,0 +1,104 @@
+"""Хештеги и упоминания постов в отдельных индексированных таблицах."""
+from django.db import transaction
+
+from .models import Mention, Post, Tag, TaggedPost, User
+from .rendering import TOKEN, existing_usernames
+
+BATCH_SIZE = 2000
+# Старые сборки SQLite не принимают больше 999 параметров в запросе.
+IN_CHUNK = 900
+
+
+def extract(text):
+    """Хештеги в нижнем регистре и упомянутые имена из текста."""
+    tags, names = set(), set()
+    for match in TOKEN.finditer(text):
+        if match['tag']:
+            tags.add(match['tag'].lower())
+        elif match['mention']:
+            names.add(match['mention'])
+    return tags, names
+
+
+def _lookup(model, field, values):
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), IN_CHUNK):
+        found.update(model.objects.filter(**{
+            f'{field}__in': values[start:start + IN_CHUNK]
+        }).values_list(field, 'id'))
+    return found
+
+
+def tag_ids(names):
+    """id хештегов по именам; недостающие создаются."""
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return _lookup(Tag, 'name', names)
+
+
+def user_ids(names):
+    return _lookup(User, 'username', existing_usernames(names))
+
+
+def sync_post(post):
+    """Обновляет хештеги и упоминания поста после записи.
+
+    Пишется только разница с тем, что уже есть в индексе: новые связи
+    добавляются, исчезнувшие из текста удаляются, остальные не
+    трогаются.
+    """
+    tags, names = extract(post.text)
+    old_tags = set(post.tagged.values_list('tag__name', flat=True))
+    old_names = set(post.mentions.values_list('user__username', flat=True))
+    with transaction.atomic():
+        if tags - old_tags:
+            TaggedPost.objects.bulk_create([
+                TaggedPost(tag_id=tag, post=post, pub_date=post.pub_date)
+                for tag in tag_ids(tags - old_tags).values()
+            ], ignore_conflicts=True)
+        if old_tags - tags:
+            post.tagged.filter(tag__name__in=old_tags - tags).delete()
+        if names - old_names:
+            Mention.objects.bulk_create([
+                Mention(user_id=user, post=post, pub_date=post.pub_date)
+                for user in user_ids(names - old_names).values()
+            ], ignore_conflicts=True)
+        if old_names - names:
+            post.mentions.filter(
+                user__username__in=old_names - names
+            ).delete()
+
+
+def backfill(since_id=0, batch_size=BATCH_SIZE, progress=None):
+    """Заполняет хештеги и упоминания постов с id больше since_id.
+
+    Повторный запуск безопасен: существующие связи пропускаются.
+    Возвращает число обработанных постов.
+    """
+    posts = Post.objects.order_by('id').values_list('id', 'text', 'pub_date')
+    done, last = 0, since_id
+    while True:
+        batch = list(posts.filter(id__gt=last)[:batch_size])
+        if not batch:
+            return done
+        extracted = [(pk, pub_date, *extract(text))
+                     for pk, text, pub_date in batch]
+        tags = tag_ids(set().union(*(row[2] for row in extracted)))
+        users = user_ids(set().union(*(row[3] for row in extracted)))
+        with transaction.atomic():
+            TaggedPost.objects.bulk_create([
+                TaggedPost(tag_id=tags[tag], post_id=pk, pub_date=pub_date)
+                for pk, pub_date, post_tags, _ in extracted
+                for tag in post_tags
+            ], ignore_conflicts=True)
+            Mention.objects.bulk_create([
+                Mention(user_id=users[name], post_id=pk, pub_date=pub_date)
+                for pk, pub_date, _, names in extracted
+                for name in names if name in users
+            ], ignore_conflicts=True)
+        done += len(batch)
+        last = batch[-1][0]
+        if progress:
+            progress(done)
@@ -0,0 +1,27 @@
+"""Обработчики фоновых задач постов (core.jobs)."""
+from core.jobs import job
+
+from .notifications import send_digests
+from .reactions import compact
+from .recommendations import recompute
+from .thumbnails import thumbnail_url
+
+
+@job('posts.thumbnail')
+def thumbnail(image):
+    thumbnail_url(image)
+
+
+@job('posts.send_digests')
+def digests():
+    send_digests()
+
+
+@job('posts.recommend')
+def recommend():
+    recompute()
+
+
+@job('posts.compact_reactions')
+def compact_reactions():
+    compact()
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase
+
+from posts import benchmarks, urls
+from posts.models import Comment, Follow, Post
+from posts.seeding import seed
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.created = seed(posts=60, users=10, groups=3, image_ratio=0)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_seed_creates_related_rows(self):
+        """Наполнение создаёт посты, комментарии и подписки."""
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), self.created['follows'])
+        self.assertFalse(Follow.objects.filter(user=F('author')))
+
+    def test_run_measures_every_url(self):
+        """Бенчмарк покрывает все маршруты posts."""
+        results = benchmarks.run(requests=2)
+        self.assertEqual(
+            set(results),
+            {f'posts:{pattern.name}' for pattern in urls.urlpatterns}
+        )
+        for stats in results.values():
+            self.assertLessEqual(stats['p50'], stats['p99'])
+
+    def test_regressions(self):
+        baseline = {'posts:index': {'p95': 10.0, 'queries': 5}}
+        self.assertEqual(benchmarks.regressions(
+            {'posts:index': {'p95': 12.0, 'queries': 5}}, baseline, 0.25
+        ), [])
+        self.assertEqual(len(benchmarks.regressions(
+            {'posts:index': {'p95': 20.0, 'queries': 6}}, baseline, 0.25
+        )), 2)
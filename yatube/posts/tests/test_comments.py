@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        cls.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(5)
+        ]
+        Comment.objects.bulk_create(
+            Comment(text=f'Комментарий {number}', post=cls.post,
+                    author=cls.readers[number % 5])
+            for number in range(45)
+        )
+        cls.url = reverse('posts:post_detail', args=(cls.post.id,))
+
+    def test_first_page_and_cursor(self):
+        """Страницы комментариев идут от новых к старым без повторов."""
+        expected = list(self.post.comments.order_by(
+            '-created', '-id'
+        ).values_list('id', flat=True))
+        seen, cursor = [], None
+        while True:
+            response = self.client.get(
+                self.url, {'cursor': cursor} if cursor else {}
+            )
+            comments = response.context['comments']
+            self.assertLessEqual(len(comments), settings.QUANTITY_COMMENTS)
+            seen += [comment.id for comment in comments]
+            cursor = response.context['comments_next']
+            if cursor is None:
+                break
+            self.assertContains(response, 'id="more-comments"')
+        self.assertEqual(seen, expected)
+
+    def test_query_count_does_not_depend_on_authors(self):
+        """Авторы комментариев загружаются вместе со страницей:
+        пост, комментарии, счётчики реакций и число постов автора."""
+        self.client.get(self.url)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_bad_cursor_redirects_to_first_page(self):
+        response = self.client.get(self.url, {'cursor': 'мусор'})
+        self.assertRedirects(response, self.url)
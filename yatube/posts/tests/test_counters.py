@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+from django.db import DatabaseError, connection
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.counters import BufferedCounter, post_views
+from posts.models import Post, User
+
+
+class BufferedCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        post_views.pending.clear()
+
+    def views(self):
+        return list(Post.objects.order_by('id').values_list(
+            'views', flat=True
+        ))
+
+    def test_post_detail_does_not_write(self):
+        """Просмотр копится в буфере и пишется только при сбросе."""
+        url = reverse('posts:post_detail', args=(self.posts[0].id,))
+        for _ in range(3):
+            self.client.get(url)
+        self.assertEqual(self.views(), [0, 0, 0])
+        post_views.flush()
+        self.assertEqual(self.views(), [3, 0, 0])
+
+    def test_flush_groups_by_amount(self):
+        """Одна команда UPDATE на каждую величину прироста."""
+        counter = BufferedCounter(Post, 'views')
+        for post, amount in zip(self.posts, (2, 2, 5)):
+            counter.incr(post.id, amount)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(counter.flush(), 3)
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.views(), [2, 2, 5])
+        self.assertEqual(counter.flush(), 0)
+
+    def test_database_error_keeps_counts(self):
+        counter = BufferedCounter(Post, 'views')
+        counter.incr(self.posts[0].id)
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError):
+            with self.assertLogs('posts.counters', 'ERROR'):
+                self.assertEqual(counter.flush(), 0)
+        self.assertEqual(counter.flush(), 1)
+        self.assertEqual(self.views(), [1, 0, 0])
+
+    @override_settings(VIEW_COUNTER_MAX_PENDING=2)
+    def test_full_buffer_flushes(self):
+        counter = BufferedCounter(Post, 'views')
+        counter.incr(self.posts[0].id)
+        counter.incr(self.posts[1].id)
+        self.assertEqual(self.views(), [1, 1, 0])
+
+    def test_fork_drops_parent_buffer(self):
+        """В дочернем процессе буфер родителя не пишется повторно."""
+        counter = BufferedCounter(Post, 'views')
+        counter.incr(self.posts[0].id)
+        counter.pid = -1
+        self.assertEqual(counter.flush(), 0)
+
+
+class FlusherThreadTests(TransactionTestCase):
+    @override_settings(VIEW_COUNTER_FLUSH_INTERVAL=0.05)
+    def test_background_flush(self):
+        """Фоновый поток сам пишет накопленные просмотры."""
+        user = User.objects.create_user(username='auth')
+        post = Post.objects.create(text='Пост', author=user)
+        counter = BufferedCounter(Post, 'views')
+        counter.start()
+        try:
+            counter.incr(post.id, 4)
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                post.refresh_from_db()
+                if post.views:
+                    break
+                time.sleep(0.05)
+        finally:
+            counter.shutdown()
+        self.assertEqual(post.views, 4)
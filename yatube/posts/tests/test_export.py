@@ -0,0 +1,79 @@
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        Post.objects.create(text='Второй пост', author=cls.user)
+        Comment.objects.create(text='Коммент', author=cls.user, post=cls.post)
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_export_streams_zip(self):
+        """Архив содержит NDJSON всех данных и исходные картинки."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_export', args=(self.user.username,))
+        )
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        posts = [
+            json.loads(line)
+            for line in archive.read('posts.ndjson').splitlines()
+        ]
+        self.assertEqual(
+            [post['text'] for post in posts],
+            ['Пост с картинкой', 'Второй пост']
+        )
+        self.assertEqual(len(archive.read('comments.ndjson').splitlines()), 1)
+        self.assertIn(b'leo', archive.read('following.ndjson'))
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), SMALL_GIF
+        )
+
+    def test_export_only_own_data(self):
+        response = self.authorized_client.get(
+            reverse('posts:profile_export', args=(self.author.username,))
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.author.username,))
+        )
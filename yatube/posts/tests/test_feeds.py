@@ -0,0 +1,121 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.paginator import Page
+from django.db.models import Q
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import feeds
+from posts.models import Follow, Group, GroupFollow, Post, User
+from posts.seeding import explicit_dates
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        cls.groups = [
+            Group.objects.create(title=f'Группа {number}', slug=f'g{number}')
+            for number in range(2)
+        ]
+        now = timezone.now()
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            Post.objects.bulk_create(
+                Post(
+                    text=f'Пост {number}',
+                    author=cls.authors[number % 3],
+                    group=cls.groups[number % 2] if number % 5 else None,
+                    # Одинаковые даты: порядок решает id.
+                    pub_date=now - timedelta(minutes=number // 2),
+                )
+                for number in range(60)
+            )
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.reader, author=cls.authors[1])
+        GroupFollow.objects.create(user=cls.reader, group=cls.groups[0])
+        cls.expected = list(Post.objects.filter(
+            Q(author__in=cls.authors[:2]) | Q(group=cls.groups[0])
+        ).order_by('-pub_date', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def walk(self, limit=7):
+        ids, position = [], None
+        while True:
+            page, more = feeds.merged_ids(self.reader, position, limit)
+            ids += page
+            if not more:
+                return ids
+            post = Post.objects.get(id=page[-1])
+            position = (post.pub_date, post.id)
+
+    def test_merge_matches_or_query(self):
+        """Слияние совпадает с OR-запросом, без повторов и пропусков."""
+        self.assertEqual(self.walk(), self.expected)
+
+    def test_sources_split_into_queries(self):
+        with mock.patch.object(feeds, 'SOURCES_PER_QUERY', 1):
+            with self.assertNumQueries(5):
+                ids, _ = feeds.merged_ids(self.reader, limit=7)
+        self.assertEqual(ids, self.expected[:7])
+
+    def test_page_and_cursor(self):
+        url = reverse('posts:follow_index')
+        response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertIs(type(page_obj), Page)
+        self.assertEqual([post.id for post in page_obj], self.expected[:10])
+        self.assertTrue(page_obj.has_next())
+        self.assertContains(response, page_obj.next_cursor)
+        with self.assertNumQueries(10):
+            response = self.client.get(url, {
+                'cursor': page_obj.next_cursor, 'page': 2
+            })
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertTrue(page_obj.has_previous())
+        self.assertEqual(
+            [post.id for post in page_obj], self.expected[10:20]
+        )
+
+    def test_bad_cursor_redirects(self):
+        response = self.client.get(
+            reverse('posts:follow_index'), {'cursor': 'испорчен'}
+        )
+        self.assertRedirects(response, reverse('posts:follow_index'))
+
+    def test_group_follow_and_unfollow(self):
+        group = self.groups[1]
+        self.client.get(reverse('posts:group_follow', args=(group.slug,)))
+        self.client.get(reverse('posts:group_follow', args=(group.slug,)))
+        self.assertEqual(self.reader.group_follows.count(), 2)
+        response = self.client.get(
+            reverse('posts:group_list', args=(group.slug,))
+        )
+        self.assertTrue(response.context['following'])
+        self.client.get(reverse('posts:group_unfollow', args=(group.slug,)))
+        self.assertFalse(
+            self.reader.group_follows.filter(group=group).exists()
+        )
+
+    def test_api_feed(self):
+        response = self.client.get(
+            reverse('api:follow_index'), {'limit': 25}
+        )
+        data = response.json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], self.expected[:25]
+        )
+        data = self.client.get(reverse('api:follow_index'), {
+            'limit': 25, 'cursor': data['next']
+        }).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], self.expected[25:50]
+        )
@@ -0,0 +1,200 @@
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.follow_graph import Adjacency
+from posts.models import Follow, User
+
+SNAPSHOT_DIR = tempfile.mkdtemp()
+SNAPSHOT = os.path.join(SNAPSHOT_DIR, 'follow_graph.snapshot')
+
+
+@override_settings(FOLLOW_GRAPH_SNAPSHOT=SNAPSHOT)
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(5)
+        ]
+        ids = [user.id for user in cls.users]
+        cls.edges = {
+            (ids[0], ids[1]), (ids[0], ids[2]), (ids[1], ids[2]),
+            (ids[3], ids[2]), (ids[4], ids[0]),
+        }
+        Follow.objects.bulk_create(
+            Follow(user_id=user, author_id=author)
+            for user, author in cls.edges
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SNAPSHOT_DIR, ignore_errors=True)
+
+    def setUp(self):
+        follow_graph.reset()
+
+    def tearDown(self):
+        follow_graph.reset()
+        cache.clear()
+        if os.path.exists(SNAPSHOT):
+            os.remove(SNAPSHOT)
+
+    def assert_matches_edges(self, graph, edges):
+        ids = [user.id for user in self.users]
+        for user in ids:
+            expected = sorted(a for u, a in edges if u == user)
+            self.assertEqual(list(graph.following(user)), expected)
+            self.assertEqual(graph.following_count(user), len(expected))
+            self.assertEqual(
+                graph.followers_count(user),
+                sum(a == user for _, a in edges)
+            )
+            for author in ids:
+                self.assertEqual(
+                    graph.is_following(user, author),
+                    (user, author) in edges
+                )
+
+    def test_adjacency(self):
+        index = Adjacency.from_pairs([(1, 2), (1, 5), (3, 4)])
+        self.assertEqual(list(index.neighbours(1)), [2, 5])
+        self.assertEqual(index.count(2), 0)
+        self.assertTrue(index.contains(3, 4))
+        self.assertFalse(index.contains(1, 3))
+
+    def test_build_and_snapshot(self):
+        """Граф из базы и граф из снимка через mmap совпадают."""
+        graph = follow_graph.build()
+        self.assert_matches_edges(graph, self.edges)
+        graph.save(SNAPSHOT)
+        self.assert_matches_edges(follow_graph.load(SNAPSHOT), self.edges)
+
+    def test_concurrent_saves_publish_whole_snapshot(self):
+        """Одновременные сохранения не смешивают байты в одном файле."""
+        graph = follow_graph.build()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: graph.save(SNAPSHOT), range(8)))
+        self.assert_matches_edges(follow_graph.load(SNAPSHOT), self.edges)
+        self.assertEqual(os.listdir(SNAPSHOT_DIR), ['follow_graph.snapshot'])
+
+    def test_overlay(self):
+        """Подписки после сборки видны сразу, повторы не считаются."""
+        graph = follow_graph.build()
+        first, second = self.users[0].id, self.users[1].id
+        graph.remove(first, second)
+        graph.remove(first, second)
+        graph.add(second, first)
+        graph.add(second, first)
+        edges = self.edges - {(first, second)} | {(second, first)}
+        self.assert_matches_edges(graph, edges)
+        graph.add(first, second)
+        self.assert_matches_edges(graph, edges | {(first, second)})
+
+    @override_settings(FOLLOW_GRAPH_MAX_AGE=60)
+    def test_get_graph_reuses_fresh_snapshot(self):
+        graph = follow_graph.get_graph()
+        self.assertIs(follow_graph.get_graph(), graph)
+        self.assertTrue(os.path.exists(SNAPSHOT))
+        follow_graph.reset()
+        loaded = follow_graph.get_graph()
+        self.assertEqual(loaded.built, graph.built)
+        self.assertIsInstance(loaded.following_index.keys, memoryview)
+
+    @override_settings(FOLLOW_GRAPH_ENABLED=True)
+    def test_profile_reads_graph(self):
+        """Профиль берёт подписку и счётчики из графа."""
+        follow_graph.get_graph()
+        self.client.force_login(self.users[0])
+        response = self.client.get(
+            reverse('posts:profile', args=(self.users[2].username,))
+        )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['followers_count'], 3)
+        self.assertEqual(response.context['following_count'], 0)
+
+    @override_settings(FOLLOW_GRAPH_ENABLED=True, FOLLOW_GRAPH_MAX_AGE=60)
+    def test_follow_ignores_stale_graph(self):
+        """Отписка в другом процессе: граф здесь ещё видит подписку,
+        но подписка всё равно создаётся."""
+        follow_graph.get_graph()
+        reader, author = self.users[0], self.users[1]
+        Follow.objects.filter(user=reader, author=author).delete()
+        follow_graph.get_graph().add(reader.id, author.id)
+        self.client.force_login(reader)
+        self.client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=author).exists()
+        )
+
+
+@override_settings(FOLLOW_GRAPH_ENABLED=True, FOLLOW_GRAPH_SNAPSHOT=None)
+class FollowGraphSignalsTests(TransactionTestCase):
+    def setUp(self):
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        follow_graph.reset()
+
+    def test_follow_and_unfollow_update_graph(self):
+        """Подписка и отписка попадают в граф после коммита."""
+        graph = follow_graph.get_graph()
+        self.client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertTrue(graph.is_following(self.user.id, self.author.id))
+        self.assertEqual(graph.followers_count(self.author.id), 1)
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertFalse(graph.is_following(self.user.id, self.author.id))
+        self.assertEqual(graph.followers_count(self.author.id), 0)
+
+    def test_warm_builds_graph_before_requests(self):
+        graph = follow_graph.warm()
+        self.assertIs(follow_graph.get_graph(), graph)
+        with override_settings(FOLLOW_GRAPH_ENABLED=False):
+            self.assertIsNone(follow_graph.warm())
+
+    def test_stale_graph_is_served_while_rebuilding(self):
+        """Старый граф отдаётся без ожидания пересборки; подписка,
+        сделанная во время пересборки, попадает в новый граф."""
+        built = threading.Event()
+        release = threading.Event()
+        build = follow_graph.build
+
+        def slow_build():
+            graph = build()
+            built.set()
+            release.wait(5)
+            return graph
+
+        old = follow_graph.get_graph()
+        old.built -= 3600
+        with mock.patch.object(follow_graph, 'build', slow_build):
+            self.assertIs(follow_graph.get_graph(), old)
+            self.assertTrue(built.wait(5))
+            self.client.get(
+                reverse('posts:profile_follow', args=(self.author.username,))
+            )
+            self.assertIs(follow_graph.get_graph(), old)
+            release.set()
+            follow_graph._refresher.join(5)
+        graph = follow_graph.get_graph()
+        self.assertIsNot(graph, old)
+        self.assertTrue(graph.is_following(self.user.id, self.author.id))
+        self.assertEqual(graph.followers_count(self.author.id), 1)
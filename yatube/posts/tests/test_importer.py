@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from posts.importer import TABLES, Importer, read_records
+from posts.models import Comment, Follow, Group, Post, User
+
+RECORDS = [
+    {'type': 'post', 'id': 'a1', 'author': 'leo', 'group': 'test',
+     'text': 'Первый пост', 'pub_date': '2020-01-01T10:00:00'},
+    {'type': 'post', 'id': 'a2', 'author': 'anna', 'text': 'Второй пост'},
+    {'type': 'comment', 'post': 'a1', 'author': 'anna', 'text': 'Ответ'},
+    {'type': 'comment', 'post': 'missing', 'author': 'anna', 'text': '?'},
+    {'type': 'follow', 'user': 'anna', 'author': 'leo'},
+    {'type': 'follow', 'user': 'leo', 'author': 'leo'},
+]
+
+
+class ImporterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test', description='Описание'
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'dump.ndjson')
+        with open(self.path, 'w', encoding='utf-8') as dump:
+            for record in RECORDS:
+                dump.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.checkpoint = self.path + '.checkpoint'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_import_resolves_users_groups_and_posts(self):
+        """Ссылки на авторов, группы и внешние id постов разрешаются."""
+        stats = Importer(self.checkpoint, create_users=True).run(
+            read_records(self.path)
+        )
+        self.assertEqual(stats, {
+            'post': 2, 'comment': 1, 'follow': 1, 'skipped': 2
+        })
+        post = Post.objects.get(text='Первый пост')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(post.text_html, 'Первый пост')
+        self.assertEqual(Comment.objects.get().text_html, 'Ответ')
+        self.assertTrue(Follow.objects.filter(
+            user__username='anna', author__username='leo'
+        ).exists())
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_unknown_users_skipped_without_create_users(self):
+        User.objects.create_user(username='leo')
+        stats = Importer(self.checkpoint).run(read_records(self.path))
+        self.assertEqual(stats['post'], 1)
+        self.assertFalse(User.objects.filter(username='anna').exists())
+
+    def test_resume_from_checkpoint(self):
+        """После сбоя импорт продолжается с первой незаписанной строки."""
+        def interrupted():
+            yield from RECORDS[:2]
+            raise RuntimeError('сбой')
+
+        with self.assertRaises(RuntimeError):
+            Importer(self.checkpoint, create_users=True, batch_size=2).run(
+                interrupted()
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        stats = Importer(self.checkpoint, create_users=True).run(
+            read_records(self.path)
+        )
+        self.assertEqual(stats['post'], 0)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            Comment.objects.get().post.text, 'Первый пост'
+        )
+
+    def test_posts_created_during_import_do_not_collide(self):
+        """id постов берутся в транзакции батча, а не при старте."""
+        author = User.objects.create_user(username='live')
+
+        def live_post(line, stats):
+            Post.objects.create(text=f'С сайта {line}', author=author)
+
+        stats = Importer(
+            self.checkpoint, create_users=True, batch_size=1
+        ).run(read_records(self.path), progress=live_post)
+        self.assertEqual(stats['post'], 2)
+        self.assertEqual(Post.objects.count(), 2 + len(RECORDS))
+        self.assertEqual(
+            Comment.objects.get().post.text, 'Первый пост'
+        )
+
+    def test_unmapped_post_id_is_not_a_site_id(self):
+        """Комментарий к пропущенному внешнему посту не уходит к посту
+        сайта с тем же числовым id."""
+        author = User.objects.create_user(username='leo')
+        site_post = Post.objects.create(text='Пост сайта', author=author)
+        records = [
+            {'type': 'post', 'id': str(site_post.id), 'author': 'ghost'},
+            {'type': 'comment', 'post': str(site_post.id), 'author': 'leo',
+             'text': 'Чужой'},
+        ]
+        stats = Importer(self.checkpoint).run(iter(records))
+        self.assertEqual(stats['skipped'], 2)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_import_without_checkpoint(self):
+        stats = Importer(create_users=True).run(read_records(self.path))
+        self.assertEqual(stats['post'], 2)
+        self.assertEqual(stats['comment'], 1)
+
+    def test_csv_import(self):
+        path = os.path.join(self.directory, 'follows.csv')
+        with open(path, 'w', encoding='utf-8') as dump:
+            dump.write('user,author\nanna,leo\nleo,anna\n')
+        User.objects.create_user(username='leo')
+        User.objects.create_user(username='anna')
+        stats = Importer(path + '.checkpoint').run(
+            read_records(path, kind='follow')
+        )
+        self.assertEqual(stats['follow'], 2)
+
+
+def index_sql():
+    placeholders = ', '.join(['%s'] * len(TABLES))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            f"AND sql IS NOT NULL AND tbl_name IN ({placeholders})",
+            TABLES
+        )
+        return dict(cursor.fetchall())
+
+
+class ImporterSyncTests(TransactionTestCase):
+    def setUp(self):
+        self.indexes = index_sql()
+
+    def tearDown(self):
+        """Импорт снимает индексы в общей тестовой базе: что бы ни
+        случилось в тесте, следующие тесты получают их обратно."""
+        with connection.cursor() as cursor:
+            for sql in self.indexes.values():
+                cursor.execute(sql.replace(
+                    'CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1
+                ))
+
+    def test_indexes_restored_after_failure(self):
+        """Без контрольной точки SQL снятых индексов не теряется."""
+        def broken():
+            yield RECORDS[0]
+            raise RuntimeError('сбой')
+
+        self.assertTrue(self.indexes)
+        with self.assertRaises(RuntimeError):
+            Importer(create_users=True, batch_size=1).run(broken())
+        self.assertEqual(index_sql(), self.indexes)
+
+    def test_synchronous_restored_after_failure(self):
+        """PRAGMA synchronous возвращается и после сбоя импорта."""
+        def broken():
+            raise RuntimeError('сбой')
+            yield
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            before = cursor.fetchone()[0]
+        with self.assertRaises(RuntimeError):
+            Importer().run(broken())
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], before)
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.test import TransactionTestCase
+
+from posts import loadtest
+from posts.models import Comment, Post, User
+
+ACCESS_LOG = (
+    '127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 512',
+    '127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "GET / HTTP/1.1" 200 512',
+    '127.0.0.1 - - [19/Oct/2026:10:00:02 +0000] '
+    '"POST /posts/1/comment/ HTTP/1.1" 302 0 "-" "curl"',
+    '127.0.0.1 - - [19/Oct/2026:10:00:03 +0000] '
+    '"GET /nope/a/b HTTP/1.1" 404 0',
+)
+
+
+class LoadTestTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(text='Тестовый пост', author=self.user)
+
+    def test_profile_from_log(self):
+        """Профиль строится по access-логу, неизвестные адреса пропускаются."""
+        profile = loadtest.profile_from_log(ACCESS_LOG)
+        self.assertEqual(
+            [(line['view'], line['weight'], line['auth'])
+             for line in profile],
+            [('posts:index', 2, False), ('posts:add_comment', 1, True)]
+        )
+
+    def test_login_views_come_from_resolver(self):
+        """Авторизация нужна всем view под login_required, в том числе
+        под другими декораторами."""
+        paths = {
+            '/': False,
+            f'/posts/{self.post.pk}/': False,
+            '/follow/': True,
+            '/follow/ranked/': True,
+            '/notifications/': True,
+            '/group/any/follow/': True,
+            f'/posts/{self.post.pk}/react/like/': True,
+        }
+        for path, auth in paths.items():
+            with self.subTest(path=path):
+                self.assertEqual(loadtest.entry('GET', path)['auth'], auth)
+
+    def test_run_reports_every_view(self):
+        """Авторизованные записи проходят CSRF и попадают в отчёт."""
+        application = get_wsgi_application()
+        profile = [
+            loadtest.entry('GET', '/', 1),
+            loadtest.entry('POST', f'/posts/{self.post.pk}/comment/', 1),
+        ]
+        result = loadtest.run(
+            application, profile, threads=2, requests=20, users=1
+        )
+        self.assertEqual(result['requests'], 20)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(
+            Comment.objects.count(),
+            result['views']['posts:add_comment']['requests']
+        )
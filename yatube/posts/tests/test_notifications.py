@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import notifications
+from posts.models import Inbox, Notification, Post, User
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    NOTIFY_DIGEST_ITEMS=2,
+)
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.silent = User.objects.create_user(username='silent')
+        cls.post = Post.objects.create(text='Пост автора', author=cls.author)
+        cls.silent_post = Post.objects.create(
+            text='Пост без адреса', author=cls.silent
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def comment(self, post=None, text='Комментарий'):
+        self.client.post(
+            reverse('posts:add_comment', args=((post or self.post).id,)),
+            {'text': text}
+        )
+
+    def test_comment_appends_event_and_bumps_counter(self):
+        self.comment()
+        self.comment()
+        self.client.force_login(self.author)
+        self.comment()
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.author).count(), 2
+        )
+        self.assertEqual(Inbox.objects.get(user=self.author).unread, 2)
+        self.assertEqual(len(mail.outbox), 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(notifications.unread_count(self.author), 2)
+
+    def test_digest_coalesces_events_per_recipient(self):
+        for number in range(3):
+            self.comment(text=f'Комментарий {number}')
+        self.comment(self.silent_post)
+        result = notifications.send_digests(workers=2)
+        self.assertEqual(result, {'emails': 1, 'events': 4})
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, [self.author.email])
+        self.assertIn('3', message.subject)
+        self.assertIn('Комментарий 2', message.body)
+        self.assertNotIn('Комментарий 0', message.body)
+        self.assertIn('И ещё 1.', message.body)
+        self.assertFalse(Notification.objects.filter(sent=False).exists())
+        self.assertEqual(
+            notifications.send_digests(), {'emails': 0, 'events': 0}
+        )
+
+    def test_failed_delivery_is_retried(self):
+        self.comment()
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=ConnectionError
+        ), self.assertLogs('posts.notifications', 'ERROR'):
+            self.assertEqual(
+                notifications.send_digests(), {'emails': 0, 'events': 0}
+            )
+        self.assertEqual(notifications.send_digests()['emails'], 1)
+
+    def test_page_marks_read(self):
+        self.comment(text='Первый')
+        self.comment(text='Второй')
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'badge')
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertEqual(len(response.context['unread_ids']), 2)
+        self.assertEqual(notifications.unread_count(self.author), 0)
+        response = self.client.get(reverse('posts:notifications'))
+        self.assertEqual(response.context['unread_ids'], set())
+        self.assertNotContains(response, 'badge')
+
+    def test_mark_read_keeps_later_comments(self):
+        """Комментарий между чтением счётчика и сбросом не теряется."""
+        self.comment(text='Первый')
+        read = notifications.unread_count(self.author)
+        self.comment(text='Второй')
+        notifications.mark_read(self.author, read)
+        self.assertEqual(notifications.unread_count(self.author), 1)
+        notifications.mark_read(self.author, 5)
+        self.assertEqual(notifications.unread_count(self.author), 0)
@@ -0,0 +1,123 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import ranking
+from posts.models import AuthorAffinity, Comment, Follow, Post, User
+from posts.seeding import explicit_dates
+
+
+@override_settings(FEED_RANKED_ENABLED=True)
+class RankedFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.favourite = User.objects.create_user(username='favourite')
+        cls.other = User.objects.create_user(username='other')
+        cls.stranger = User.objects.create_user(username='stranger')
+        for author in (cls.favourite, cls.other):
+            Follow.objects.create(user=cls.reader, author=author)
+        now = timezone.now()
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            cls.older = Post.objects.create(
+                text='Любимый автор', author=cls.favourite,
+                pub_date=now - timedelta(hours=3),
+            )
+            cls.newer = Post.objects.create(
+                text='Другой автор', author=cls.other, pub_date=now,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def comment(self, post, author=None):
+        Comment.objects.create(
+            post=post, author=author or self.reader, text='Комментарий'
+        )
+
+    def test_affinity_counts_comments_on_others_posts(self):
+        self.comment(self.older)
+        self.comment(self.older)
+        self.comment(self.older, author=self.favourite)
+        self.assertEqual(
+            list(AuthorAffinity.objects.values_list(
+                'user', 'author', 'comments'
+            )),
+            [(self.reader.id, self.favourite.id, 2)]
+        )
+        AuthorAffinity.objects.all().delete()
+        self.assertEqual(ranking.backfill_affinity(), 1)
+        self.assertEqual(
+            AuthorAffinity.objects.get(user=self.reader).comments, 2
+        )
+
+    def test_affinity_outranks_recency(self):
+        self.assertEqual(
+            ranking.ranked_ids(self.reader), [self.newer.id, self.older.id]
+        )
+        for _ in range(5):
+            self.comment(self.older)
+        ranking.invalidate(self.reader.id)
+        self.assertEqual(
+            ranking.ranked_ids(self.reader), [self.older.id, self.newer.id]
+        )
+
+    def test_cache_and_invalidation(self):
+        """Кеш живёт до нового поста в источниках ленты."""
+        ranking.ranked_ids(self.reader)
+        Post.objects.create(text='Чужой', author=self.stranger)
+        with self.assertNumQueries(0):
+            ranking.ranked_ids(self.reader)
+        post = Post.objects.create(text='Новый', author=self.other)
+        self.assertIn(post.id, ranking.ranked_ids(self.reader))
+        Follow.objects.create(user=self.reader, author=self.stranger)
+        self.assertEqual(len(ranking.ranked_ids(self.reader)), 4)
+
+    def test_new_post_is_scored_without_rebuild(self):
+        """Новый пост досчитывается в кешированный порядок, кандидаты
+        и их признаки заново не выбираются."""
+        ranking.ranked_ids(self.reader)
+        for _ in range(5):
+            self.comment(self.older)
+        post = Post.objects.create(text='Новый', author=self.favourite)
+        with mock.patch.object(ranking, 'merged_ids') as merged_ids:
+            ids = ranking.ranked_ids(self.reader)
+        merged_ids.assert_not_called()
+        self.assertEqual(ids, [post.id, self.newer.id, self.older.id])
+
+    def test_old_entry_is_rebuilt(self):
+        ranking.ranked_ids(self.reader)
+        for _ in range(5):
+            self.comment(self.older)
+        Post.objects.create(text='Новый', author=self.stranger)
+        Post.objects.create(text='Новый', author=self.other)
+        with mock.patch.object(
+            ranking.time, 'time',
+            return_value=time.time() + settings.FEED_RANKED_TTL + 1
+        ):
+            ids = ranking.ranked_ids(self.reader)
+        self.assertEqual(ids[0], self.older.id)
+
+    @override_settings(FEED_RANKED_ENABLED=False)
+    def test_disabled_by_setting(self):
+        self.assertEqual(
+            self.client.get(reverse('posts:follow_ranked')).status_code, 404
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, reverse('posts:follow_ranked'))
+
+    def test_ranked_page(self):
+        response = self.client.get(reverse('posts:follow_ranked'))
+        page_obj = response.context['page_obj']
+        self.assertIs(type(page_obj), Page)
+        self.assertTrue(response.context['ranked'])
+        self.assertEqual(list(page_obj), [self.newer, self.older])
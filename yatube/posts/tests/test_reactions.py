@@ -0,0 +1,124 @@
+import json
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from posts import benchmarks, reactions
+from posts.models import Post, Reaction, ReactionCounter, User
+from posts.reactions import attach, compact, set_reaction, totals
+
+
+class ReactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.user)
+            for number in range(3)
+        ]
+        cls.post = cls.posts[0]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_set_reaction_is_idempotent(self):
+        """Повтор той же реакции не меняет ни строки, ни счётчик."""
+        self.assertTrue(set_reaction(self.user, self.post.id, 'like'))
+        self.assertFalse(set_reaction(self.user, self.post.id, 'like'))
+        self.assertEqual(totals([self.post.id]), {self.post.id: {'like': 1}})
+        self.assertTrue(set_reaction(self.user, self.post.id, 'like', False))
+        self.assertFalse(
+            set_reaction(self.user, self.post.id, 'like', False)
+        )
+        self.assertFalse(Reaction.objects.exists())
+        self.assertEqual(totals([self.post.id])[self.post.id]['like'], 0)
+
+    def test_react_view(self):
+        url = reverse('posts:react', args=(self.post.id, 'fire'))
+        next_url = reverse('posts:index')
+        response = self.client.post(url, {'on': '1', 'next': next_url})
+        self.assertRedirects(response, next_url)
+        self.assertTrue(Reaction.objects.filter(kind='fire').exists())
+        response = self.client.post(
+            url, {'on': '0', 'next': 'https://evil.example/'}
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertFalse(Reaction.objects.exists())
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(
+            reverse('posts:react', args=(self.post.id, 'nope'))
+        ).status_code, 404)
+
+    def test_attach_uses_two_queries(self):
+        """Счётчики и реакции читателя для страницы — два запроса."""
+        for post in self.posts:
+            set_reaction(self.user, post.id, 'like')
+        with self.assertNumQueries(2):
+            attach(self.posts, self.user)
+        self.assertEqual(
+            self.posts[1].reaction_list[0], ('like', '👍', 1, True)
+        )
+
+    def test_compact_keeps_totals(self):
+        """Сжатие оставляет один ряд на счётчик и не меняет итог."""
+        users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(30)
+        ]
+        for user in users:
+            set_reaction(user, self.post.id, 'like')
+        set_reaction(users[0], self.post.id, 'like', False)
+        self.assertGreater(ReactionCounter.objects.count(), 1)
+        compact()
+        self.assertEqual(ReactionCounter.objects.get().count, 29)
+        self.assertEqual(totals([self.post.id])[self.post.id]['like'], 29)
+
+
+class ConcurrentReactionTests(TransactionTestCase):
+    def test_compaction_is_scheduled_once_per_window(self):
+        """Изменённая реакция ставит свёртку шардов в очередь, но не
+        чаще раза за окно."""
+        reactions._compact_window = None
+        users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(5)
+        ]
+        post = Post.objects.create(text='Пост', author=users[0])
+        for user in users:
+            set_reaction(user, post.id, 'like', shards=8)
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'posts.compact_reactions')
+        jobs.REGISTRY[job.name](**json.loads(job.payload))
+        self.assertEqual(
+            list(ReactionCounter.objects.values_list('shard', 'count')),
+            [(0, 5)]
+        )
+
+    def test_many_simultaneous_likes(self):
+        """Лайки одного поста из многих потоков не теряются.
+
+        Тестовая база SQLite в памяти сразу отвечает «table is locked»
+        вместо ожидания; set_reaction повторяет такие записи.
+        """
+        users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(40)
+        ]
+        post = Post.objects.create(text='Горячий пост', author=users[0])
+        result = benchmarks.like_storm(post.id, users, threads=8)
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['changed'], 40)
+        self.assertEqual(Reaction.objects.count(), 40)
+        self.assertEqual(
+            ReactionCounter.objects.aggregate(total=Sum('count'))['total'],
+            40
+        )
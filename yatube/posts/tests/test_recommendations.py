@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Recommendation, RecommendationQueue, User
+from posts.recommendations import recompute, suggestions
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.fan = User.objects.create_user(username='fan')
+        cls.author = User.objects.create_user(username='author')
+        cls.similar = User.objects.create_user(username='similar')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.bulk_create([
+            Follow(user=cls.reader, author=cls.friend),
+            Follow(user=cls.friend, author=cls.author),
+            Follow(user=cls.fan, author=cls.friend),
+            Follow(user=cls.fan, author=cls.similar),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def recommended(self, user):
+        return list(Recommendation.objects.filter(user=user).order_by(
+            '-score'
+        ).values_list('author__username', flat=True))
+
+    def test_full_run(self):
+        """Друзья друзей и авторы с общими читателями, без своих
+        подписок и без самого пользователя."""
+        recompute(full=True)
+        self.assertCountEqual(
+            self.recommended(self.reader), ['author', 'similar']
+        )
+        self.assertNotIn('stranger', self.recommended(self.fan))
+        self.assertNotIn('friend', self.recommended(self.fan))
+
+    def test_incremental_run(self):
+        """Без --full пересчитываются только пользователи из очереди."""
+        recompute(full=True)
+        self.assertFalse(RecommendationQueue.objects.exists())
+        Follow.objects.create(user=self.stranger, author=self.friend)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertCountEqual(
+            RecommendationQueue.objects.values_list('user_id', flat=True),
+            [self.stranger.id, self.reader.id]
+        )
+        self.assertEqual(recompute(), (2, 2))
+        self.assertEqual(self.recommended(self.reader), [])
+        self.assertCountEqual(
+            self.recommended(self.stranger), ['author', 'similar']
+        )
+        self.assertFalse(RecommendationQueue.objects.exists())
+
+    def test_pages_show_suggestions(self):
+        recompute(full=True)
+        self.client.force_login(self.reader)
+        with self.assertNumQueries(1):
+            self.assertCountEqual(
+                suggestions(self.reader), [self.author, self.similar]
+            )
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=(self.reader.username,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(
+                    response,
+                    reverse('posts:profile_follow', args=('similar',))
+                )
+
+    def test_followed_author_hidden_before_recompute(self):
+        recompute(full=True)
+        Follow.objects.create(user=self.reader, author=self.similar)
+        self.assertEqual(suggestions(self.reader), [self.author])
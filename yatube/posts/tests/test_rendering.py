@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import rendering
+from posts.models import Comment, Post, User
+
+
+class RenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+
+    def test_render(self):
+        """Текст экранируется, ссылки, упоминания и хештеги
+        оформляются."""
+        html = rendering.render(
+            '<b>Привет</b>, @leo и @ghost!\nСм. https://example.com/a?b=1. '
+            '#новости'
+        )
+        self.assertIn('&lt;b&gt;Привет&lt;/b&gt;', html)
+        self.assertIn(
+            '<a class="mention" href="/profile/leo/">@leo</a>', html
+        )
+        self.assertIn('@ghost!<br>', html)
+        self.assertIn('<a href="https://example.com/a?b=1" ', html)
+        self.assertIn(
+            '<a class="hashtag" href="{}">#новости</a>'.format(
+                reverse('posts:tag_posts', args=('новости',))
+            ),
+            html
+        )
+
+    def test_forms_render_on_save(self):
+        """Формы поста и комментария сохраняют готовый HTML."""
+        self.client.force_login(self.user)
+        self.client.post(reverse('posts:post_create'), {'text': 'Пост #1'})
+        post = Post.objects.get()
+        self.assertEqual(
+            post.text_html,
+            'Пост <a class="hashtag" href="/tags/1/">#1</a>'
+        )
+        self.assertEqual(post.render_version, rendering.RENDERER_VERSION)
+        self.client.post(
+            reverse('posts:post_edit', args=(post.id,)), {'text': 'a\nb'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, 'a<br>b')
+        self.client.post(
+            reverse('posts:add_comment', args=(post.id,)),
+            {'text': 'Спасибо, @leo'}
+        )
+        self.assertIn('class="mention"', Comment.objects.get().text_html)
+
+    def test_backfill(self):
+        """Бэкфилл перерисовывает только устаревшие строки батчами."""
+        posts = Post.objects.bulk_create(
+            Post(text=f'@leo {number}', author=self.user)
+            for number in range(5)
+        )
+        Post.objects.filter(text='@leo 0').update(
+            render_version=rendering.RENDERER_VERSION, text_html='готово'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            done = rendering.backfill(Post, batch_size=2)
+        self.assertEqual(done, len(posts) - 1)
+        user_lookups = [
+            query for query in queries if 'auth_user' in query['sql']
+        ]
+        self.assertEqual(len(user_lookups), 2)
+        self.assertFalse(Post.objects.filter(
+            render_version__lt=rendering.RENDERER_VERSION
+        ))
+        self.assertEqual(
+            Post.objects.get(text='@leo 0').text_html, 'готово'
+        )
+        self.assertTrue(Post.objects.get(
+            text='@leo 1'
+        ).text_html.startswith('<a class="mention"'))
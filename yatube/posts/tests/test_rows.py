@@ -0,0 +1,74 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import benchmarks
+from posts.models import Follow, Group, Post, User
+from posts.rows import PostRow
+
+CSRF_TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+class FeedRowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Анна', last_name='Ахматова'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(13):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_fast_path_renders_same_pages(self):
+        """Строки дают ту же разметку, что и модели."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            for page in ('1', '2'):
+                with self.subTest(url=url, page=page):
+                    expected = CSRF_TOKEN.sub(
+                        b'', self.client.get(url, {'page': page}).content
+                    )
+                    cache.clear()
+                    with self.settings(FEED_FAST_PATH=True):
+                        response = self.client.get(url, {'page': page})
+                    cache.clear()
+                    self.assertIsInstance(
+                        response.context['page_obj'][0], PostRow
+                    )
+                    self.assertEqual(
+                        CSRF_TOKEN.sub(b'', response.content), expected
+                    )
+
+    @override_settings(FEED_FAST_PATH=True)
+    def test_authors_and_groups_shared(self):
+        """Автор и группа создаются один раз на страницу."""
+        page_obj = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertEqual(len({id(post.author) for post in page_obj}), 1)
+        groups = {id(post.group) for post in page_obj if post.group}
+        self.assertEqual(len(groups), 1)
+
+    def test_compare_rows(self):
+        results = benchmarks.compare_rows(repeat=2)
+        self.assertEqual(set(results), {'models', 'rows'})
+        self.assertLess(results['rows']['blocks'], results['models']['blocks'])
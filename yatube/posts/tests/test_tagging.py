@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts import tagging
+from posts.models import Mention, Post, Tag, TaggedPost, User
+
+
+class TaggingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+        cls.anna = User.objects.create_user(username='anna')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def tags(self, post):
+        return set(post.tagged.values_list('tag__name', flat=True))
+
+    def test_extract(self):
+        self.assertEqual(
+            tagging.extract('#Django и #django, привет @anna! &#39;'),
+            ({'django'}, {'anna'})
+        )
+
+    def test_create_and_edit_sync_index(self):
+        """Создание и правка поста обновляют только разницу."""
+        self.client.post(
+            reverse('posts:post_create'), {'text': '#один #два @anna'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(self.tags(post), {'один', 'два'})
+        self.assertEqual(Mention.objects.get().user, self.anna)
+        kept = TaggedPost.objects.get(tag__name='два').pk
+
+        self.client.post(
+            reverse('posts:post_edit', args=(post.id,)), {'text': '#два #три'}
+        )
+        self.assertEqual(self.tags(post), {'два', 'три'})
+        self.assertEqual(TaggedPost.objects.get(tag__name='два').pk, kept)
+        self.assertFalse(Mention.objects.exists())
+
+    def test_tag_page(self):
+        """Страница хештега показывает его посты от новых к старым."""
+        for number in range(3):
+            self.client.post(
+                reverse('posts:post_create'), {'text': f'#Тег {number}'}
+            )
+        self.client.post(reverse('posts:post_create'), {'text': 'без тега'})
+        response = self.client.get(reverse('posts:tag_posts', args=('тег',)))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['#Тег 2', '#Тег 1', '#Тег 0']
+        )
+        self.assertEqual(self.client.get(
+            reverse('posts:tag_posts', args=('нет',))
+        ).status_code, 404)
+
+    def test_backfill(self):
+        """Бэкфилл индексирует старые посты и безопасен при повторе."""
+        Post.objects.bulk_create(
+            Post(text=f'#старое @anna {number}', author=self.user)
+            for number in range(5)
+        )
+        self.assertEqual(tagging.backfill(batch_size=2), 5)
+        tagging.backfill()
+        self.assertEqual(Tag.objects.get().posts.count(), 5)
+        self.assertEqual(Mention.objects.count(), 5)
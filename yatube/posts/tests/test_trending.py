@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import (
+    Comment, Group, GroupActivity, GroupFollow, Post, PostActivity,
+    TrendingGroup, TrendingPost, User,
+)
+
+
+@override_settings(
+    TRENDING_BUCKET=3600, TRENDING_HALF_LIFE=6 * 3600,
+    TRENDING_WINDOW=48 * 3600,
+)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.old = Post.objects.create(text='Старый', author=cls.user)
+        cls.fresh = Post.objects.create(
+            text='Свежий', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def test_bucket_start(self):
+        start = trending.bucket_start(self.now)
+        self.assertEqual(start.minute, 0)
+        self.assertLessEqual(start, self.now)
+        self.assertLess(self.now - start, timedelta(hours=1))
+
+    def test_writes_bump_buckets(self):
+        """Комментарии и подписки на группу копятся в одной строке
+        на объект и интервал."""
+        for text in ('раз', 'два'):
+            Comment.objects.create(post=self.fresh, author=self.user,
+                                   text=text)
+        GroupFollow.objects.create(user=self.user, group=self.group)
+        self.assertEqual(
+            list(PostActivity.objects.values_list('post', 'count')),
+            [(self.fresh.id, 2)]
+        )
+        self.assertEqual(
+            list(GroupActivity.objects.values_list('group', 'count')),
+            [(self.group.id, 3)]
+        )
+
+    def test_update_decays_and_compacts(self):
+        """Недавняя активность важнее старой, истёкшие интервалы
+        удаляются и не учитываются."""
+        PostActivity.objects.bulk_create([
+            PostActivity(post=self.old, count=4,
+                         bucket=self.now - timedelta(hours=12, minutes=30)),
+            PostActivity(post=self.old, count=100,
+                         bucket=self.now - timedelta(hours=49)),
+            PostActivity(post=self.fresh, count=2,
+                         bucket=trending.bucket_start(self.now)),
+        ])
+        GroupActivity.objects.create(
+            group=self.other_group, count=1,
+            bucket=trending.bucket_start(self.now)
+        )
+        result = trending.update(self.now)
+        self.assertEqual(result, {'posts': 2, 'groups': 1, 'expired': 1})
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post', flat=True)),
+            [self.fresh.id, self.old.id]
+        )
+        self.assertAlmostEqual(
+            TrendingPost.objects.get(post=self.old).score, 1.0
+        )
+        self.assertEqual(PostActivity.objects.count(), 2)
+
+    def test_trending_page(self):
+        TrendingPost.objects.bulk_create([
+            TrendingPost(post=self.old, score=2),
+            TrendingPost(post=self.fresh, score=1),
+        ])
+        TrendingGroup.objects.create(group=self.group, score=1)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.old, self.fresh]
+        )
+        self.assertEqual(response.context['groups'], [self.group])
+        self.assertContains(
+            response, reverse('posts:group_list', args=(self.group.slug,))
+        )
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.warmup import warm_up, warmup_urls
+
+
+class WarmupTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test',
+            description='Тестовое описание',
+        )
+        Post.objects.create(text='Тестовый пост', author=self.user,
+                            group=self.group)
+
+    def test_warmup_urls(self):
+        """В прогрев попадают главная, группы и профили."""
+        urls = warmup_urls(pages=2, groups=1, profiles=1)
+        self.assertEqual(urls, [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        ])
+
+    def test_warm_up_fills_page_cache(self):
+        """После прогрева главная отдаётся из кеша."""
+        results = warm_up(pages=1, groups=0, profiles=0, concurrency=2,
+                          host='testserver')
+        pages = [result for result in results if result.kind == 'page']
+        self.assertEqual([result.status for result in pages], [200])
+        self.assertTrue(
+            all(result.status == 'ok' for result in results
+                if result.kind == 'template')
+        )
+        Post.objects.create(text='Новый пост', author=self.user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Новый пост')
@@ -0,0 +1,20 @@
+"""Миниатюры постов вне шаблонов."""
+from django.core.cache import cache
+from sorl.thumbnail import get_thumbnail
+
+# Должно совпадать с параметрами {% thumbnail %} в шаблонах постов.
+GEOMETRY = '960x339'
+OPTIONS = {'crop': 'center', 'upscale': True}
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def thumbnail_url(image):
+    """URL миниатюры по имени файла; после первого вызова — из кеша."""
+    if not image:
+        return None
+    key = f'thumbnail:{GEOMETRY}:{image}'
+    url = cache.get(key)
+    if url is None:
+        url = get_thumbnail(image, GEOMETRY, **OPTIONS).url
+        cache.set(key, url, CACHE_TIMEOUT)
+    return url
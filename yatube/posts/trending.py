@@ -0,0 +1,115 @@
+"""Популярные посты и группы: счётчики по интервалам и затухание.
+
+Каждый Comment прибавляет единицу посту и его группе, каждый
+GroupFollow — группе; счётчик один на объект и интервал
+TRENDING_BUCKET и обновляется одним upsert. Фоновый прогон update()
+считает оценку sum(count * 2 ** (-возраст / TRENDING_HALF_LIFE)) по
+интервалам не старше TRENDING_WINDOW, переписывает TrendingPost
+и TrendingGroup и удаляет истёкшие интервалы, поэтому таблицы
+счётчиков не растут без предела.
+"""
+import heapq
+from collections import defaultdict
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import GroupActivity, PostActivity, TrendingGroup, TrendingPost
+
+
+def bucket_start(moment=None):
+    moment = moment or timezone.now()
+    size = settings.TRENDING_BUCKET
+    return datetime.fromtimestamp(
+        moment.timestamp() // size * size, tz=timezone.utc
+    )
+
+
+def _bump_sql(model, key):
+    """Счётчик интервала: INSERT, а при конфликте — плюс один."""
+    ops = connection.ops
+    table = ops.quote_name(model._meta.db_table)
+    key, bucket, count = (
+        ops.quote_name(model._meta.get_field(name).column)
+        for name in (key, 'bucket', 'count')
+    )
+    return (
+        f'INSERT INTO {table} ({key}, {bucket}, {count}) '
+        'VALUES (%s, %s, 1) '
+        f'ON CONFLICT ({key}, {bucket}) '
+        f'DO UPDATE SET {count} = {table}.{count} + 1'
+    )
+
+
+def bump(model, key, pk, moment=None):
+    bucket = connection.ops.adapt_datetimefield_value(bucket_start(moment))
+    with connection.cursor() as cursor:
+        cursor.execute(_bump_sql(model, key), [pk, bucket])
+
+
+def record_comment(comment):
+    bump(PostActivity, 'post', comment.post_id)
+    if comment.post.group_id:
+        bump(GroupActivity, 'group', comment.post.group_id)
+
+
+def record_group_follow(follow):
+    bump(GroupActivity, 'group', follow.group_id)
+
+
+def scores(model, key, now):
+    """Оценки с затуханием по живым интервалам: {id: оценка}.
+
+    Возраст интервала считается от его середины.
+    """
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    middle = settings.TRENDING_BUCKET / 2
+    half_life = settings.TRENDING_HALF_LIFE
+    totals = defaultdict(float)
+    rows = model.objects.filter(bucket__gte=since).values_list(
+        key, 'bucket', 'count'
+    )
+    for pk, bucket, count in rows.iterator():
+        age = max((now - bucket).total_seconds() - middle, 0)
+        totals[pk] += count * 0.5 ** (age / half_life)
+    return totals
+
+
+def materialize(model, key, totals, size):
+    """Заменяет рейтинг одной транзакцией: читатели видят старый
+    или новый список целиком."""
+    top = heapq.nlargest(size, totals.items(), key=itemgetter(1))
+    with transaction.atomic():
+        model.objects.all().delete()
+        model.objects.bulk_create(
+            model(**{f'{key}_id': pk, 'score': score}) for pk, score in top
+        )
+    return len(top)
+
+
+def compact(now):
+    """Удаляет интервалы старше окна; возвращает число строк."""
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    deleted = 0
+    for model in (PostActivity, GroupActivity):
+        deleted += model.objects.filter(bucket__lt=since).delete()[0]
+    return deleted
+
+
+def update(now=None):
+    """Пересчитывает популярное и чистит истёкшие интервалы."""
+    now = now or timezone.now()
+    return {
+        'posts': materialize(
+            TrendingPost, 'post', scores(PostActivity, 'post', now),
+            settings.TRENDING_POSTS,
+        ),
+        'groups': materialize(
+            TrendingGroup, 'group', scores(GroupActivity, 'group', now),
+            settings.TRENDING_GROUPS,
+        ),
+        'expired': compact(now),
+    }
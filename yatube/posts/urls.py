@@ -6,15 +6,30 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('tags/<str:tag>/', views.tag_posts, name='tag_posts'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/react/<str:kind>/', views.react, name='react'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/ranked/', views.follow_ranked, name='follow_ranked'),
+    path('notifications/', views.notifications, name='notifications'),
+    path(
+        'group/<slug:slug>/follow/', views.group_follow, name='group_follow'
+    ),
+    path(
+        'group/<slug:slug>/unfollow/',
+        views.group_unfollow,
+        name='group_unfollow'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -25,4 +40,9 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        'profile/<str:username>/export/',
+        views.profile_export,
+        name='profile_export'
+    ),
 ]
@@ -2,16 +2,40 @@ from django.shortcuts import get_object_or_404, render, redirect
 from django.core.paginator import Paginator
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, StreamingHttpResponse
+from django.utils.http import is_safe_url
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
 
-from .models import Group, Post, User, Follow
+from core.group_commit import write
+from core.jobs import enqueue_on_commit
+from core.pagination import encode_cursor, paginate
+
+from .models import (
+    Group, GroupFollow, Notification, Post, Reaction, Tag, TrendingGroup,
+    TrendingPost, User, Follow,
+)
 from .forms import CommentForm, PostForm
+from .export import export_chunks
+from .feeds import fetch_posts, follow_page, mark_seen
+from .follow_graph import get_graph
+from .notifications import mark_read, unread_count
+from .counters import post_views
+from .ranking import ranked_ids
+from .reactions import attach, set_reaction
+from .recommendations import suggestions
+from .rows import post_rows
+from .tagging import sync_post
 
 
 def pagination(request, post_list):
     paginator = Paginator(post_list, settings.QUANTITY_POSTS)
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page_obj = paginator.get_page(page_number)
+    if settings.FEED_FAST_PATH:
+        page_obj.object_list = post_rows(page_obj.object_list)
+    page_obj.object_list = attach(list(page_obj.object_list), request.user)
+    return page_obj
 
 
 @cache_page(20)
@@ -23,44 +47,115 @@ def index(request):
     })
 
 
+def trending(request):
+    posts = [
+        item.post for item in
+        TrendingPost.objects.select_related('post__author', 'post__group')
+    ]
+    paginator = Paginator(posts, settings.QUANTITY_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = attach(list(page_obj.object_list), request.user)
+    return render(request, 'posts/trending.html', {
+        'groups': [
+            item.group for item in
+            TrendingGroup.objects.select_related('group')
+        ],
+        'page_obj': page_obj,
+    })
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.all()
     page_obj = pagination(request, post_list)
     return render(request, 'posts/group_list.html', {
         'group': group,
+        'following': request.user.is_authenticated and (
+            GroupFollow.objects.filter(user=request.user, group=group)
+            .exists()
+        ),
         'page_obj': page_obj,
     })
 
 
+def is_following(user, author):
+    if not user.is_authenticated or user == author:
+        return False
+    if settings.FOLLOW_GRAPH_ENABLED:
+        return get_graph().is_following(user.id, author.id)
+    return Follow.objects.filter(user=user, author=author).exists()
+
+
+def follow_counts(author):
+    if settings.FOLLOW_GRAPH_ENABLED:
+        graph = get_graph()
+        return (
+            graph.followers_count(author.id), graph.following_count(author.id)
+        )
+    return author.following.count(), author.follower.count()
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     post_list = author.posts.all()
     page_obj = pagination(request, post_list)
-    following = (
-        (
-            request.user.is_authenticated
-        ) and (
-            Follow.objects.filter(user=request.user, author=author).exists()
-        ) and (request.user != author)
-    )
+    followers_count, following_count = follow_counts(author)
     return render(request, 'posts/profile.html', {
         'author': author,
-        'following': following,
+        'following': is_following(request.user, author),
+        'followers_count': followers_count,
+        'following_count': following_count,
+        'suggestions': (
+            suggestions(request.user) if request.user == author else []
+        ),
         'page_obj': page_obj,
     })
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     form = CommentForm(request.POST or None,)
+    try:
+        comments, comments_next = paginate(
+            post.comments.select_related('author'), request,
+            date_field='created', limit=settings.QUANTITY_COMMENTS,
+        )
+    except ValueError:
+        return redirect('posts:post_detail', post_id=post_id)
+    post_views.incr(post.id)
+    attach([post], request.user)
     return render(request, 'posts/post_detail.html', {
         'post': post,
         'form': form,
-        'comments': post.comments.all()
+        'comments': comments,
+        'comments_next': comments_next,
     })
 
 
+def tag_posts(request, tag):
+    tag = get_object_or_404(Tag, name=tag.lower())
+    post_list = Post.objects.filter(tagged__tag=tag).order_by(
+        '-tagged__pub_date'
+    )
+    page_obj = pagination(request, post_list)
+    return render(request, 'posts/tag.html', {
+        'tag': tag,
+        'page_obj': page_obj,
+    })
+
+
+def make_thumbnail(post):
+    """Миниатюра нового изображения режется воркером, а не первым
+    запросом, который покажет пост."""
+    if post.image:
+        enqueue_on_commit(
+            'posts.thumbnail', {'image': post.image.name},
+            key=f'thumbnail:{post.image.name}',
+        )
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -71,6 +166,8 @@ def post_create(request):
         form = form.save(commit=False)
         form.author = request.user
         form.save()
+        sync_post(form)
+        make_thumbnail(form)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -88,6 +185,10 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'text' in form.changed_data:
+            sync_post(post)
+        if 'image' in form.changed_data:
+            make_thumbnail(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'post': post,
@@ -105,30 +206,127 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        write(comment.save)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@require_POST
+def react(request, post_id, kind):
+    if kind not in dict(Reaction.KINDS):
+        raise Http404
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    set_reaction(request.user, post.id, kind, request.POST.get('on') != '0')
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+        next_url, allowed_hosts={request.get_host()},
+        require_https=request.is_secure(),
+    ):
+        return redirect(next_url)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = pagination(request, post_list)
-    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+    try:
+        page_obj = follow_page(
+            request.user, request.GET.get('cursor'), request.GET.get('page')
+        )
+    except ValueError:
+        return redirect('posts:follow_index')
+    page_obj.object_list = attach(page_obj.object_list, request.user)
+    newest = None
+    if page_obj.number == 1 and page_obj.object_list:
+        newest = page_obj.object_list[0]
+        mark_seen(request.user, newest)
+    return render(request, 'posts/follow.html', {
+        'page_obj': page_obj,
+        'suggestions': suggestions(request.user),
+        'newest_cursor': newest and encode_cursor(newest.pub_date, newest.id),
+        'ranked_enabled': settings.FEED_RANKED_ENABLED,
+    })
+
+
+@login_required
+def follow_ranked(request):
+    if not settings.FEED_RANKED_ENABLED:
+        raise Http404
+    paginator = Paginator(ranked_ids(request.user), settings.QUANTITY_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    page_obj.object_list = attach(
+        fetch_posts(page_obj.object_list), request.user
+    )
+    return render(request, 'posts/follow.html', {
+        'page_obj': page_obj,
+        'ranked': True,
+        'ranked_enabled': True,
+        'suggestions': suggestions(request.user),
+    })
+
+
+@login_required
+def notifications(request):
+    """Уведомления пользователя; новые подсвечены, счётчик
+    непрочитанного обнуляется."""
+    unread = unread_count(request.user)
+    notification_list = Notification.objects.filter(
+        recipient=request.user
+    ).select_related('comment__author', 'comment__post')
+    paginator = Paginator(notification_list, settings.QUANTITY_COMMENTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    unread_ids = set()
+    if unread:
+        unread_ids = set(
+            notification_list.values_list('id', flat=True)[:unread]
+        )
+        mark_read(request.user, unread)
+    return render(request, 'posts/notifications.html', {
+        'page_obj': page_obj,
+        'unread_ids': unread_ids,
+    })
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
+    # Без проверки по графу: его копия в процессе может отставать,
+    # а уникальный ключ и так делает повторную подписку пустой.
     if request.user != author:
-        if not Follow.objects.filter(user=request.user, author=author):
-            Follow.objects.create(user=request.user, author=author)
+        write(lambda: Follow.objects.get_or_create(
+            user=request.user, author=author
+        ))
     return redirect('posts:profile', username=author.username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author)
-    if follow.exists():
-        follow.delete()
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=author.username)
+
+
+@login_required
+def group_follow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    GroupFollow.objects.filter(user=request.user, group=group).delete()
+    return redirect('posts:group_list', slug=slug)
+
+
+@login_required
+def profile_export(request, username):
+    if request.user.username != username:
+        return redirect('posts:profile', username=username)
+    response = StreamingHttpResponse(
+        export_chunks(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{username}.zip"'
+    )
+    return response
@@ -0,0 +1,113 @@
+"""Прогрев кешей после деплоя или перезапуска воркера."""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+from django.test import Client
+from django.urls import reverse
+
+from core.preload import template_names
+
+from .models import Group, Post, User
+from .thumbnails import thumbnail_url
+
+WarmupResult = namedtuple('WarmupResult', 'kind target status seconds')
+# Сначала то, что больше всего смотрят, затем то, где больше постов.
+POPULARITY = {
+    'views_count': Coalesce(Sum('posts__views'), 0),
+    'posts_count': Count('posts'),
+}
+
+
+def warmup_urls(pages, groups, profiles):
+    """Адреса страниц, которые первыми получают трафик.
+
+    cache_page различает адреса с query string, поэтому первая
+    страница главной — это «/», а не «/?page=1». Группы и профили
+    в кеш страниц не попадают (он есть только у главной): их рендер
+    открывает соединение с базой и прогревает ORM, шаблоны с
+    реальными данными и кеш миниатюр.
+    """
+    index = reverse('posts:index')
+    urls = [index][:pages] + [
+        index + f'?page={number}' for number in range(2, pages + 1)
+    ]
+    top_groups = Group.objects.annotate(**POPULARITY).order_by(
+        '-views_count', '-posts_count'
+    ).values_list('slug', flat=True)[:groups]
+    urls += [reverse('posts:group_list', args=(slug,)) for slug in top_groups]
+    top_authors = User.objects.annotate(**POPULARITY).order_by(
+        '-views_count', '-posts_count'
+    ).values_list('username', flat=True)[:profiles]
+    urls += [reverse('posts:profile', args=(name,)) for name in top_authors]
+    return urls
+
+
+def _timed(kind, target, func):
+    started = time.perf_counter()
+    try:
+        status = func()
+    except Exception as error:
+        status = f'error: {error!r}'
+    finally:
+        connection.close()
+    return WarmupResult(kind, target, status, time.perf_counter() - started)
+
+
+def _render_page(url, host):
+    return Client(HTTP_HOST=host).get(url).status_code
+
+
+def _load_template(name):
+    get_template(name)
+    return 'ok'
+
+
+def _warm_thumbnail(image):
+    thumbnail_url(image)
+    return 'ok'
+
+
+def warm_up(pages=None, groups=None, profiles=None, concurrency=None,
+            host=None):
+    """Прогревает шаблоны, миниатюры и кеш страниц.
+
+    Страницы запрашиваются через полный стек middleware с заданным
+    HTTP_HOST, чтобы ключи cache_page совпали с боевыми. LocMemCache
+    живёт внутри процесса, поэтому кеш страниц прогревается только
+    у того процесса, который вызвал функцию.
+    Возвращает список WarmupResult.
+    """
+    pages = settings.WARMUP_PAGES if pages is None else pages
+    groups = settings.WARMUP_GROUPS if groups is None else groups
+    profiles = settings.WARMUP_PROFILES if profiles is None else profiles
+    concurrency = concurrency or settings.WARMUP_CONCURRENCY
+    host = host or settings.WARMUP_HOST
+
+    urls = warmup_urls(pages, groups, profiles)
+    images = Post.objects.exclude(image='').values_list(
+        'image', flat=True
+    )[:pages * settings.QUANTITY_POSTS]
+    tasks = [
+        ('template', name, partial(_load_template, name))
+        for name in template_names()
+    ]
+    tasks += [
+        ('thumbnail', image, partial(_warm_thumbnail, image))
+        for image in images
+    ]
+    tasks += [('page', url, partial(_render_page, url, host)) for url in urls]
+    connection.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(_timed, kind, target, func)
+            for kind, target, func in tasks
+        ]
+        return [future.result() for future in futures]
@@ -1,6 +1,8 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from core.jobs import enqueue_on_commit
+
 
 User = get_user_model()
 
@@ -9,3 +11,29 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой отправляет воркер.
+
+    В очередь уходят только id пользователя, адрес и несекретная часть
+    контекста: payload задачи хранится после отправки (JOBS_KEEP),
+    поэтому ссылку с токеном воркер рисует сам.
+    """
+    SECRET_CONTEXT = ('user', 'uid', 'token')
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        enqueue_on_commit('users.password_reset', {
+            'user_id': context['user'].pk,
+            'to_email': to_email,
+            'context': {
+                key: value for key, value in context.items()
+                if key not in self.SECRET_CONTEXT
+            },
+            'subject_template_name': subject_template_name,
+            'email_template_name': email_template_name,
+            'html_email_template_name': html_email_template_name,
+            'from_email': from_email,
+        }, priority=10)
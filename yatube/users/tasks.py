@@ -0,0 +1,30 @@
+"""Обработчики фоновых задач пользователей (core.jobs)."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.jobs import job
+
+User = get_user_model()
+
+
+@job('users.password_reset')
+def password_reset(user_id, to_email, context, subject_template_name,
+                   email_template_name, html_email_template_name=None,
+                   from_email=None):
+    """Письмо сброса пароля: токен создаётся только здесь и в базу
+    не попадает. Неактивному или удалённому пользователю письма нет."""
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+    context.update(
+        user=user,
+        uid=urlsafe_base64_encode(force_bytes(user.pk)),
+        token=default_token_generator.make_token(user),
+    )
+    PasswordResetForm().send_mail(
+        subject_template_name, email_template_name, context, from_email,
+        to_email, html_email_template_name=html_email_template_name,
+    )
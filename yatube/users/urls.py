@@ -2,6 +2,7 @@ from django.contrib.auth.views import LogoutView, LoginView, PasswordResetView
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -18,5 +19,6 @@ urlpatterns = [
         name='login'
     ),
     path('password_reset/', PasswordResetView.as_view(
-        template_name='users/password_reset_form.html'),
+        template_name='users/password_reset_form.html',
+        form_class=QueuedPasswordResetForm),
         name='password_reset_form')]
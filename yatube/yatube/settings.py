@@ -20,8 +20,103 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 QUANTITY_POSTS = 10
+QUANTITY_COMMENTS = 20
+# Ленты строят страницу из posts.rows вместо экземпляров моделей.
+FEED_FAST_PATH = False
 
 QUANTITY_LETERS_FOR_STR = 27
+
+WARMUP_PAGES = 3
+WARMUP_GROUPS = 5
+WARMUP_PROFILES = 5
+WARMUP_CONCURRENCY = 4
+WARMUP_HOST = 'localhost'
+
+VIEW_COUNTER_FLUSH_INTERVAL = 5
+VIEW_COUNTER_MAX_PENDING = 10000
+
+REACTION_SHARDS = 8
+# Шарды счётчиков реакций сворачиваются задачей раз в этот интервал.
+REACTION_COMPACT_INTERVAL = 10 * 60
+
+# Проверки и счётчики подписок из графа в памяти (posts.follow_graph).
+FOLLOW_GRAPH_ENABLED = False
+FOLLOW_GRAPH_MAX_AGE = 60
+FOLLOW_GRAPH_SNAPSHOT = os.path.join(BASE_DIR, 'follow_graph.snapshot')
+
+RECOMMENDATIONS_COUNT = 10
+# Пересчёт после изменения подписок ставится в очередь задач
+# не чаще раза в этот интервал.
+RECOMMENDATIONS_INTERVAL = 3600
+
+# Популярное: счётчики по интервалам и затухание с периодом полураспада.
+TRENDING_BUCKET = 3600
+TRENDING_HALF_LIFE = 6 * 3600
+TRENDING_WINDOW = 48 * 3600
+TRENDING_POSTS = 100
+TRENDING_GROUPS = 10
+
+# Лента подписок «сначала интересные» (posts.ranking). Полная
+# пересборка порядка раз в FEED_RANKED_TTL дороже хронологической
+# страницы, поэтому режим выключен по умолчанию.
+FEED_RANKED_ENABLED = False
+FEED_RANKED_TTL = 300
+# Кеш списка подписок для опроса новых постов в ленте. С LocMemCache
+# подписка, сделанная в другом процессе, видна опросу не позже TTL.
+FEED_SOURCES_TTL = 300
+
+# Уведомления о комментариях: дайджест на получателя, отправка пулом.
+NOTIFY_WORKERS = 4
+NOTIFY_BATCH = 500
+NOTIFY_DIGEST_ITEMS = 20
+# Дайджест ставится в очередь задач не чаще раза в этот интервал.
+NOTIFY_DIGEST_INTERVAL = 15 * 60
+
+# Фоновые задачи (core.jobs): аренда, повторы и хранение выполненных.
+JOBS_THREADS = 4
+JOBS_POLL_INTERVAL = 1.0
+# Аренда продлевается, пока задача выполняется; истекает, только
+# если воркер умер.
+JOBS_LEASE = 300
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 30
+JOBS_KEEP = 24 * 3600
+
+# Групповой коммит комментариев и подписок (core.group_commit).
+WRITE_BATCHING = False
+WRITE_BATCH_WINDOW = 0.002
+WRITE_BATCH_MAX = 100
+WRITE_BATCH_TIMEOUT = 10
+
+PROFILING_SAMPLE_RATE = 0.1
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+SLOW_QUERY_THRESHOLD_MS = 100
+SLOW_QUERY_EXPLAIN_RATE = 0.2
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
@@ -65,10 +160,13 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,6 +190,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'posts.context_processors.notifications',
             ],
         },
     },
@@ -3,6 +3,8 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics
+
 handler404 = 'core.views.page_not_found'
 
 handler403 = 'core.views.csrf_failure'
@@ -13,6 +15,8 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
+    path('metrics/', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -3,6 +3,20 @@ WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Set ``YATUBE_PRELOAD=1`` (together with the server's preload option,
+e.g. ``gunicorn --preload``) to import apps, URLconf, templates and
+models in the master process and freeze them with ``gc.freeze()``
+before workers are forked.
+
+With ``FOLLOW_GRAPH_ENABLED`` the in-memory follow graph is built here,
+in the master when preloading, so no request waits for it.
+
+Set ``YATUBE_WARMUP=1`` to prewarm templates, thumbnails and the page
+cache of this process before it starts serving requests.
+
+Post view counters are buffered in memory and written by a background
+thread; each forked worker starts its own thread on the first view.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 """
@@ -14,3 +28,26 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('YATUBE_PRELOAD'):
+    from core.preload import preload
+
+    preload()
+
+from posts.follow_graph import warm  # noqa: E402
+
+warm()
+
+if os.environ.get('YATUBE_WARMUP'):
+    from posts.warmup import warm_up
+
+    warm_up()
+
+if os.environ.get('YATUBE_PRELOAD'):
+    from core.preload import freeze
+
+    freeze()
+
+from posts.counters import post_views  # noqa: E402
+
+post_views.start()